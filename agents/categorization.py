@@ -9,20 +9,61 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict, Counter
 
+from agents.category_model import CategoryModel
 from models.feedback_models import CleanedDocument, CategoryResult, FeedbackCategory
+from models.records import CategoryRecord
+from utils.dead_letter import record_failure
+from utils.execution import agent_execution
+from utils.guardrails import LengthGuardrails
+from utils.keyword_patterns import CategoryKeywordMatrix
 from utils.logger import setup_logger
+from utils.text_profile import TextProfile, vocabulary
 
 logger = setup_logger(__name__)
 
+# How category pattern scores are computed: per document with the regexes,
+# or per batch with the compiled keyword weight matrix
+SCORING_MODES = ('patterns', 'matrix')
+
 class CategorizationAgent:
     """
     Categorization Agent responsible for classifying feedback documents into
     specific categories and topics using rule-based and ML-based approaches.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        scoring_mode: str = "patterns",
+        model_path: Optional[str] = None,
+        model_weight: float = 0.5,
+        segment_chars: int = 0,
+        time_budget_seconds: float = 0.0
+    ):
+        """
+        Args:
+            scoring_mode: 'patterns' or 'matrix', see SCORING_MODES
+            model_path: Trained CategoryModel artifact blended with the
+                pattern scores once loaded by initialize()
+            model_weight: Share of the model in the blended scores; 1.0
+                uses the model alone and skips the patterns
+            segment_chars: Extract the topics of longer documents in windows
+                of this many characters; 0 reads documents whole
+            time_budget_seconds: Time after which no further window of a
+                document is read (see utils.guardrails); 0 sets no budget
+        """
+        if scoring_mode not in SCORING_MODES:
+            raise ValueError(f"scoring_mode must be one of {', '.join(SCORING_MODES)}")
+        if not 0.0 <= model_weight <= 1.0:
+            raise ValueError("model_weight must be between 0 and 1")
         self.agent_id = "categorization_agent"
         self.min_confidence_threshold = 0.3
+        self.scoring_mode = scoring_mode
+        
+        # Optional trained model (see agents.category_model)
+        self.model_path = model_path
+        self.model_weight = model_weight
+        self.model_batch_size = 2048
+        self.category_model: Optional[CategoryModel] = None
         
         # Category patterns with weights
         self.category_patterns = {
@@ -77,6 +118,30 @@ class CategorizationAgent:
             ]
         }
         
+        # Common words excluded from keywords
+        self.common_words = {
+            'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'any', 'can',
+            'our', 'was', 'has', 'had', 'she', 'all', 'its', 'her', 'with', 'this',
+            'that', 'from', 'have', 'they', 'will', 'would', 'there', 'their', 'what',
+            'about', 'which', 'when', 'make', 'like', 'time', 'just', 'know', 'take',
+            'into', 'year', 'your', 'good', 'some', 'could', 'them', 'other', 'than',
+            'then', 'look', 'only', 'come', 'over', 'think', 'also', 'back', 'after',
+            'used', 'two', 'how', 'our', 'work', 'first', 'well', 'way', 'even', 'new',
+            'want', 'because', 'any', 'these', 'give', 'most', 'should', 'need', 'when',
+            'where', 'why', 'how', 'what', 'who', 'whom', 'whose', 'which', 'that',
+            'this', 'these', 'those', 'here', 'there', 'when', 'while', 'before',
+            'after', 'since', 'until', 'because', 'although', 'though', 'even', 'if',
+            'unless', 'while', 'whereas', 'whether', 'either', 'neither', 'both',
+            'each', 'every', 'all', 'any', 'none', 'some', 'such', 'own', 'same',
+            'more', 'most', 'less', 'least', 'few', 'many', 'much', 'several', 'one',
+            'two', 'three', 'first', 'second', 'last', 'next', 'previous', 'same',
+            'different', 'other', 'another', 'such', 'certain', 'various', 'same'
+        }
+        self.keyword_id_eligibility: Dict[int, bool] = {}
+        
+        # category_patterns compiled for the 'matrix' scoring mode, on first use
+        self.keyword_matrix: Optional[CategoryKeywordMatrix] = None
+        
         # Topic extraction patterns
         self.topic_patterns = [
             (r'\b(?:focus|concentrate|priority|emphasis|highlight|address)\s+on\s+(?:the\s+)?([\w\s]+?)(?:\.|,|;|\s+and|\s+or|\s+but|$)', 0.8),  # Focus on [topic]
@@ -86,6 +151,10 @@ class CategorizationAgent:
             (r'\b(?:the|this|our|current|existing)\s+([\w\s]+?)\s+(?:is|are|was|were|has|have|had|needs?|requires?|lacks?|missing)', 0.6)  # The [topic] is...
         ]
         
+        # The lazy topic patterns backtrack over long runs of words, so
+        # oversized documents are read in windows
+        self.guardrails = LengthGuardrails(segment_chars, time_budget_seconds)
+        
         # Category descriptions for better matching
         self.category_descriptions = {
             FeedbackCategory.TECHNICAL_ISSUES: "Problems with software, hardware, or technical systems including bugs, errors, performance issues, and compatibility problems.",
@@ -100,41 +169,91 @@ class CategorizationAgent:
     async def initialize(self):
         """Initialize the categorization agent"""
         logger.info(f"Initializing {self.agent_id}")
-        # In a real implementation, you might load ML models here
+        self.load_model()
+    
+    def load_model(self) -> None:
+        """Load the model artifact at model_path, if any; the patterns are used alone if it cannot be loaded"""
+        if not self.model_path or self.category_model is not None:
+            return
+        try:
+            self.category_model = CategoryModel.load(self.model_path)
+            logger.info(f"Loaded category model {self.model_path} ({self.category_model.metadata.get('documents')} training documents)")
+        except Exception as e:
+            logger.error(f"Error loading category model {self.model_path}, using patterns only: {str(e)}")
+    
+    @property
+    def model_only(self) -> bool:
+        return self.category_model is not None and self.model_weight >= 1.0
         
     async def categorize_feedback(self, input_data: Dict[str, Any]) -> List[CategoryResult]:
         """
-        Categorize a batch of cleaned documents
+        Categorize a batch of cleaned documents.
+        Returns CategoryRecord objects instead of models when input_data
+        sets 'return_records' (used between pipeline stages).
         """
         documents = input_data.get('documents', [])
-        categorization_results = []
+        return_records = input_data.get('return_records', False)
         
         logger.info(f"Categorizing {len(documents)} documents")
         
-        for doc in documents:
+        # The weight matrix and the model score the batch at once
+        categorization_results = await agent_execution.map_slices(
+            self.categorize_batch, documents, return_records,
+            whole=self.scoring_mode == 'matrix' or self.category_model is not None
+        )
+        
+        logger.info(f"Successfully categorized {len(categorization_results)} documents")
+        return categorization_results
+    
+    def categorize_batch(self, documents: List[CleanedDocument], return_records: bool = False) -> List[CategoryResult]:
+        """Categories of a batch of cleaned documents; the synchronous core of categorize_feedback"""
+        categorization_results = []
+        
+        batch_scores = (
+            self._matrix_categorization(documents)
+            if self.scoring_mode == 'matrix' and not self.model_only else None
+        )
+        model_scores = self._model_categorization(documents)
+        
+        for index, doc in enumerate(documents):
             try:
-                category_result = await self._categorize_single_document(doc)
-                categorization_results.append(category_result)
+                category_result = self._categorize_single_document(
+                    doc,
+                    batch_scores[index] if batch_scores is not None else None,
+                    model_scores[index] if model_scores is not None else None
+                )
+                categorization_results.append(category_result if return_records else category_result.to_model())
                 logger.debug(f"Categorized document {doc.original_id} as {category_result.primary_category}")
                 
             except Exception as e:
                 logger.error(f"Error categorizing document {doc.original_id}: {str(e)}")
+                record_failure('categorization', doc, e)
                 continue
         
-        logger.info(f"Successfully categorized {len(categorization_results)} documents")
         return categorization_results
     
-    async def _categorize_single_document(self, doc: CleanedDocument) -> CategoryResult:
-        """Categorize a single document"""
+    def _categorize_single_document(
+        self,
+        doc: CleanedDocument,
+        rule_based_categories: Optional[Dict[FeedbackCategory, float]] = None,
+        model_categories: Optional[Dict[FeedbackCategory, float]] = None
+    ) -> CategoryRecord:
+        """Categorize a single document, reusing pattern and model scores already computed for its batch"""
         
         content = doc.cleaned_content.lower()
         
-        # Step 1: Rule-based categorization
-        rule_based_categories = self._rule_based_categorization(content)
+        # Step 1: Rule-based categorization, blended with the model's scores
+        if model_categories is not None and self.model_weight >= 1.0:
+            rule_based_categories = model_categories
+        else:
+            if rule_based_categories is None:
+                rule_based_categories = self._rule_based_categorization(content)
+            if model_categories is not None:
+                rule_based_categories = self._blend_scores(rule_based_categories, model_categories)
         
         # Step 2: Extract topics and keywords
-        topics = self._extract_topics(content)
-        keywords = self._extract_keywords(content)
+        topics = self._extract_topics(content, doc)
+        keywords = self._extract_keywords(content, doc.text_profile)
         
         # Step 3: Determine primary and secondary categories
         primary_category, category_confidences = self._determine_categories(rule_based_categories)
@@ -156,11 +275,11 @@ class CategorizationAgent:
         primary = sorted_categories[0][0] if sorted_categories else FeedbackCategory.OTHER
         secondaries = [cat for cat, _ in sorted_categories[1:3]]  # Top 2-3 categories
         
-        return CategoryResult(
+        return CategoryRecord(
             document_id=doc.original_id,
             primary_category=primary,
             secondary_categories=secondaries,
-            category_confidence=dict(sorted_categories[:5]),  # Top 5 categories with confidences
+            category_confidence={cat.value: conf for cat, conf in sorted_categories[:5]},  # Top 5 categories with confidences
             keywords=keywords[:20],  # Limit to top 20 keywords
             topics=topics[:10]  # Limit to top 10 topics
         )
@@ -184,23 +303,62 @@ class CategorizationAgent:
         
         return dict(category_scores)
     
-    def _extract_topics(self, content: str) -> List[str]:
-        """Extract potential topics from content"""
+    def _matrix_categorization(self, documents: List[CleanedDocument]) -> Optional[List[Dict[FeedbackCategory, float]]]:
+        """
+        Pattern scores of a whole batch from the keyword weight matrix, or None
+        (falling back to per-document regexes) if the batch cannot be scored
+        """
+        try:
+            if self.keyword_matrix is None:
+                self.keyword_matrix = CategoryKeywordMatrix(self.category_patterns)
+            return self.keyword_matrix.score_dicts([doc.text_profile for doc in documents])
+        except Exception as e:
+            logger.error(f"Error scoring batch with the keyword matrix, using patterns: {str(e)}")
+            return None
+    
+    def _model_categorization(self, documents: List[CleanedDocument]) -> Optional[List[Dict[FeedbackCategory, float]]]:
+        """Model scores of a whole batch, or None when no model is loaded or it fails"""
+        if self.category_model is None or not documents:
+            return None
+        try:
+            return self.category_model.score_dicts(
+                [doc.cleaned_content for doc in documents], self.model_batch_size
+            )
+        except Exception as e:
+            logger.error(f"Error scoring batch with the category model, using patterns: {str(e)}")
+            return None
+    
+    def _blend_scores(
+        self,
+        pattern_scores: Dict[FeedbackCategory, float],
+        model_scores: Dict[FeedbackCategory, float]
+    ) -> Dict[FeedbackCategory, float]:
+        """Weighted sum of pattern and model scores, both scaled to a maximum of 1.0"""
+        weight = self.model_weight
+        categories = list(dict.fromkeys([*pattern_scores, *model_scores]))
+        return {
+            category: (1.0 - weight) * pattern_scores.get(category, 0.0) + weight * model_scores.get(category, 0.0)
+            for category in categories
+        }
+    
+    def _extract_topics(self, content: str, doc: Optional[CleanedDocument] = None) -> List[str]:
+        """Extract potential topics from content, window by window if it is oversized"""
         
         topics = []
         
         # Extract topics using patterns
-        for pattern, confidence in self.topic_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    # Handle capture groups
-                    topic = next((m for m in match if m), '').strip()
-                else:
-                    topic = match.strip()
-                
-                if topic and len(topic.split()) <= 5:  # Limit topic length
-                    topics.append((topic, confidence))
+        for window in self.guardrails.windows('categorization', doc, content):
+            for pattern, confidence in self.topic_patterns:
+                matches = re.findall(pattern, window, re.IGNORECASE)
+                for match in matches:
+                    if isinstance(match, tuple):
+                        # Handle capture groups
+                        topic = next((m for m in match if m), '').strip()
+                    else:
+                        topic = match.strip()
+                    
+                    if topic and len(topic.split()) <= 5:  # Limit topic length
+                        topics.append((topic, confidence))
         
         # Process and rank topics
         topic_scores = defaultdict(float)
@@ -221,43 +379,36 @@ class CategorizationAgent:
         
         return [topic for topic, _ in sorted_topics]
     
-    def _extract_keywords(self, content: str) -> List[str]:
+    def _extract_keywords(self, content: str, profile: Optional[TextProfile] = None) -> List[str]:
         """Extract relevant keywords from content"""
         
-        # Remove common words and get word frequencies
-        words = re.findall(r'\b[a-z]{3,}\b', content.lower())
-        
-        # Common words to exclude
-        common_words = {
-            'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'any', 'can',
-            'our', 'was', 'has', 'had', 'she', 'all', 'its', 'her', 'with', 'this',
-            'that', 'from', 'have', 'they', 'will', 'would', 'there', 'their', 'what',
-            'about', 'which', 'when', 'make', 'like', 'time', 'just', 'know', 'take',
-            'into', 'year', 'your', 'good', 'some', 'could', 'them', 'other', 'than',
-            'then', 'look', 'only', 'come', 'over', 'think', 'also', 'back', 'after',
-            'used', 'two', 'how', 'our', 'work', 'first', 'well', 'way', 'even', 'new',
-            'want', 'because', 'any', 'these', 'give', 'most', 'should', 'need', 'when',
-            'where', 'why', 'how', 'what', 'who', 'whom', 'whose', 'which', 'that',
-            'this', 'these', 'those', 'here', 'there', 'when', 'while', 'before',
-            'after', 'since', 'until', 'because', 'although', 'though', 'even', 'if',
-            'unless', 'while', 'whereas', 'whether', 'either', 'neither', 'both',
-            'each', 'every', 'all', 'any', 'none', 'some', 'such', 'own', 'same',
-            'more', 'most', 'less', 'least', 'few', 'many', 'much', 'several', 'one',
-            'two', 'three', 'first', 'second', 'last', 'next', 'previous', 'same',
-            'different', 'other', 'another', 'such', 'certain', 'various', 'same'
-        }
-        
-        # Filter out common words and count frequencies
-        word_freq = Counter(
-            word for word in words 
-            if word not in common_words and len(word) > 2
-        )
+        profile = profile or TextProfile.from_text(content)
+        if profile.overflowed:
+            # Some tokens share the vocabulary's overflow id, so count the words themselves
+            word_counts = Counter({
+                word: count for word, count in profile.token_counts(content).items() if self._is_keyword_token(word)
+            })
+            return [word for word, _ in word_counts.most_common(20)]
+        
+        # Count keyword ids, checking each distinct vocabulary id only once
+        word_freq = Counter()
+        eligible = self.keyword_id_eligibility
+        for token_id, count in profile.counts.items():
+            is_keyword = eligible.get(token_id)
+            if is_keyword is None:
+                is_keyword = eligible[token_id] = self._is_keyword_token(vocabulary.token(token_id))
+            if is_keyword:
+                word_freq[token_id] = count
         
         # Get most common keywords (up to 20)
-        keywords = [word for word, _ in word_freq.most_common(20)]
+        keywords = vocabulary.decode(token_id for token_id, _ in word_freq.most_common(20))
         
         return keywords
     
+    def _is_keyword_token(self, word: str) -> bool:
+        """Lowercase alphabetic words of 3+ letters that are not common words"""
+        return len(word) > 2 and word.isascii() and word.isalpha() and word not in self.common_words
+    
     def _determine_categories(
         self, 
         category_scores: Dict[FeedbackCategory, float]
@@ -293,8 +444,12 @@ class CategorizationAgent:
             'status': 'active',
             'categories': [cat.value for cat in FeedbackCategory],
             'min_confidence_threshold': self.min_confidence_threshold,
+            'scoring_mode': self.scoring_mode,
+            'category_model': self.category_model.describe() if self.category_model else None,
+            'model_weight': self.model_weight,
             'category_patterns_count': sum(len(patterns) for patterns in self.category_patterns.values()),
-            'topic_patterns_count': len(self.topic_patterns)
+            'topic_patterns_count': len(self.topic_patterns),
+            'guardrails': self.guardrails.status()
         }
     
     async def shutdown(self):
@@ -0,0 +1,127 @@
+"""
+Trainable categorization backend.
+
+A logistic-loss linear classifier over hashed word and bigram features.
+The hashing vectorizer is stateless, so an artifact only stores its
+parameters, the fitted classifier and some training metadata, and inference
+transforms whole batches of documents at once. Artifacts carry a format version and
+are rejected when it does not match this module.
+"""
+
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from models.feedback_models import FeedbackCategory
+
+ARTIFACT_FORMAT = "category_model"
+ARTIFACT_VERSION = 1
+
+# Hashed feature space: word unigrams and bigrams
+DEFAULT_VECTORIZER_PARAMS = {
+    'n_features': 2 ** 18,
+    'ngram_range': (1, 2),
+    'alternate_sign': False,
+    'norm': 'l2',
+    'lowercase': True
+}
+
+
+class CategoryModel:
+    """HashingVectorizer plus a log-loss SGDClassifier over FeedbackCategory labels"""
+
+    def __init__(
+        self,
+        classifier: SGDClassifier,
+        vectorizer_params: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.classifier = classifier
+        self.vectorizer_params = dict(vectorizer_params or DEFAULT_VECTORIZER_PARAMS)
+        self.vectorizer = HashingVectorizer(**self.vectorizer_params)
+        self.categories = [FeedbackCategory(label) for label in classifier.classes_]
+        self.metadata = metadata or {}
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        vectorizer_params: Optional[Dict[str, Any]] = None,
+        alpha: float = 1e-5,
+        source: Optional[str] = None
+    ) -> 'CategoryModel':
+        """Fit a model on texts labelled with FeedbackCategory values"""
+        labels = [FeedbackCategory(label).value for label in labels]
+        if len(set(labels)) < 2:
+            raise ValueError("Training needs documents of at least two categories")
+        params = dict(vectorizer_params or DEFAULT_VECTORIZER_PARAMS)
+        features = HashingVectorizer(**params).transform(texts)
+        classifier = SGDClassifier(loss='log_loss', alpha=alpha, max_iter=50, tol=1e-4, random_state=0)
+        classifier.fit(features, labels)
+        metadata = {
+            'trained_at': datetime.now().isoformat(),
+            'documents': len(labels),
+            'label_counts': dict(Counter(labels)),
+            'source': source
+        }
+        return cls(classifier, params, metadata)
+
+    def predict_scores(self, texts: Iterable[str], batch_size: int = 2048) -> np.ndarray:
+        """Class probabilities, one row per text, columns in self.categories order"""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, len(self.categories)))
+        return np.vstack([
+            self.classifier.predict_proba(self.vectorizer.transform(texts[start:start + batch_size]))
+            for start in range(0, len(texts), batch_size)
+        ])
+
+    def score_dicts(self, texts: Iterable[str], batch_size: int = 2048) -> List[Dict[FeedbackCategory, float]]:
+        """Probabilities scaled so each document's top category is 1.0, as the pattern scores are"""
+        scores = self.predict_scores(texts, batch_size)
+        if len(scores):
+            scores = scores / scores.max(axis=1, keepdims=True)
+        return [dict(zip(self.categories, row)) for row in scores.tolist()]
+
+    def save(self, path: str) -> None:
+        """Write a versioned artifact, replacing the file atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        artifact = {
+            'format': ARTIFACT_FORMAT,
+            'version': ARTIFACT_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'vectorizer_params': self.vectorizer_params,
+            'classifier': self.classifier,
+            'metadata': self.metadata
+        }
+        temporary = path.with_name(path.name + '.tmp')
+        joblib.dump(artifact, temporary, compress=3)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'CategoryModel':
+        artifact = joblib.load(path)
+        if not isinstance(artifact, dict) or artifact.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not a category model artifact")
+        if artifact.get('version') != ARTIFACT_VERSION:
+            raise ValueError(
+                f"{path} has artifact version {artifact.get('version')}, expected {ARTIFACT_VERSION}; retrain the model"
+            )
+        return cls(artifact['classifier'], artifact['vectorizer_params'], artifact['metadata'])
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'version': ARTIFACT_VERSION,
+            'categories': [category.value for category in self.categories],
+            **{key: value for key, value in self.metadata.items() if key != 'label_counts'}
+        }
@@ -11,7 +11,12 @@ import string
 from collections import Counter
 
 from models.feedback_models import FeedbackDocument, CleanedDocument
+from models.records import CleanedRecord
+from utils.dead_letter import record_failure
+from utils.execution import agent_execution
+from utils.keyword_matcher import KeywordMatcher
 from utils.logger import setup_logger
+from utils.text_profile import TextProfile, detect_language, vocabulary
 
 logger = setup_logger(__name__)
 
@@ -35,33 +40,78 @@ class DataCleaningAgent:
             'come', 'made', 'may', 'part'
         }
         
+        # Domain-specific term groups related to specialist feedback
+        self.domain_term_groups = [
+            ['process', 'procedure', 'workflow', 'methodology'],
+            ['quality', 'standard', 'compliance', 'audit'],
+            ['technical', 'system', 'software', 'hardware'],
+            ['performance', 'efficiency', 'optimization'],
+            ['recommendation', 'suggestion', 'improvement'],
+            ['issue', 'problem', 'concern', 'challenge'],
+            ['resource', 'allocation', 'budget', 'cost'],
+            ['training', 'skill', 'competency', 'knowledge'],
+            ['communication', 'collaboration', 'coordination'],
+            ['policy', 'guideline', 'framework', 'structure']
+        ]
+        
+        # All domain terms are compiled once into a single automaton
+        self.domain_term_matcher = KeywordMatcher(
+            term for group in self.domain_term_groups for term in group
+        ).build()
+        
+        # Common English words for the language heuristic
+        self.english_indicators = {
+            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of',
+            'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
+            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+            'could', 'should', 'this', 'that', 'these', 'those'
+        }
+        self.english_indicator_ids = vocabulary.ids_for(self.english_indicators)
+        
+        # Capitalized words (potential proper nouns), words with numbers and
+        # all-caps acronyms are disjoint token shapes, so one pass finds all
+        self.entity_pattern = re.compile(
+            r'\b(?:[A-Z][a-z]+|[a-zA-Z]+[0-9]+[a-zA-Z]*|[A-Z]{2,})\b'
+        )
+        
     async def initialize(self):
         """Initialize the data cleaning agent"""
         logger.info(f"Initializing {self.agent_id}")
         
     async def clean_documents(self, input_data: Dict[str, Any]) -> List[CleanedDocument]:
         """
-        Clean and preprocess a batch of documents
+        Clean and preprocess a batch of documents.
+        Returns CleanedRecord objects instead of models when input_data
+        sets 'return_records' (used between pipeline stages).
         """
         documents = input_data.get('documents', [])
-        cleaned_documents = []
+        return_records = input_data.get('return_records', False)
         
         logger.info(f"Cleaning {len(documents)} documents")
         
+        cleaned_documents = await agent_execution.map_slices(self.clean_batch, documents, return_records)
+        
+        logger.info(f"Successfully cleaned {len(cleaned_documents)} documents")
+        return cleaned_documents
+    
+    def clean_batch(self, documents: List[FeedbackDocument], return_records: bool = False) -> List[CleanedDocument]:
+        """Cleaned documents of a batch; the synchronous core of clean_documents"""
+        cleaned_documents = []
+        
         for doc in documents:
             try:
-                cleaned_doc = await self._clean_single_document(doc)
-                cleaned_documents.append(cleaned_doc)
+                cleaned_doc = self._clean_single_document(doc)
+                cleaned_documents.append(cleaned_doc if return_records else cleaned_doc.to_model())
                 logger.debug(f"Document {doc.filename} cleaned successfully")
                 
             except Exception as e:
                 logger.error(f"Error cleaning document {doc.filename}: {str(e)}")
+                record_failure('data_cleaning', doc, e)
                 continue
         
-        logger.info(f"Successfully cleaned {len(cleaned_documents)} documents")
         return cleaned_documents
     
-    async def _clean_single_document(self, doc: FeedbackDocument) -> CleanedDocument:
+    def _clean_single_document(self, doc: FeedbackDocument) -> CleanedRecord:
         """Clean a single document"""
         
         preprocessing_notes = []
@@ -88,20 +138,24 @@ class DataCleaningAgent:
         # Step 5: Calculate quality metrics
         quality_score = self._calculate_quality_score(cleaned_content, doc.content)
         
-        # Step 6: Detect language
-        language = self._detect_language(cleaned_content)
+        # Step 6: Tokenize once; the profile is shared with downstream agents
+        profile = TextProfile.from_text(cleaned_content)
+        
+        # Step 7: Detect language
+        language = self._detect_language(cleaned_content, profile)
         
-        # Step 7: Count words
-        word_count = len(cleaned_content.split())
+        # Step 8: Count words
+        word_count = profile.word_count
         
-        return CleanedDocument(
+        return CleanedRecord(
             original_id=doc.id or doc.filename,
             cleaned_content=cleaned_content,
             extracted_entities=entities,
             language=language,
             word_count=word_count,
             quality_score=quality_score,
-            preprocessing_notes=preprocessing_notes
+            preprocessing_notes=preprocessing_notes,
+            text_profile=profile
         )
     
     def _basic_text_cleaning(self, content: str) -> str:
@@ -169,19 +223,13 @@ class DataCleaningAgent:
     def _extract_entities(self, content: str) -> List[str]:
         """Extract key entities and terms from content"""
         
-        entities = []
-        
-        # Extract capitalized words (potential proper nouns)
-        capitalized_words = re.findall(r'\b[A-Z][a-z]+\b', content)
-        entities.extend(capitalized_words)
-        
-        # Extract technical terms (words with numbers or special patterns)
-        technical_terms = re.findall(r'\b[a-zA-Z]+[0-9]+[a-zA-Z]*\b|\b[A-Z]{2,}\b', content)
-        entities.extend(technical_terms)
+        # Extract capitalized words and technical terms (words with numbers
+        # or all-caps acronyms)
+        entities = self.entity_pattern.findall(content)
         
-        # Extract quoted phrases
-        quoted_phrases = re.findall(r'"([^"]*)"', content)
-        entities.extend(quoted_phrases)
+        # Extract quoted phrases: every odd segment between paired quotes
+        segments = content.split('"')
+        entities.extend(segments[1:len(segments) - 1:2])
         
         # Extract domain-specific terms
         domain_terms = self._extract_domain_terms(content)
@@ -195,27 +243,7 @@ class DataCleaningAgent:
     def _extract_domain_terms(self, content: str) -> List[str]:
         """Extract domain-specific terms related to specialist feedback"""
         
-        domain_patterns = [
-            r'\b(?:process|procedure|workflow|methodology)\b',
-            r'\b(?:quality|standard|compliance|audit)\b',
-            r'\b(?:technical|system|software|hardware)\b',
-            r'\b(?:performance|efficiency|optimization)\b',
-            r'\b(?:recommendation|suggestion|improvement)\b',
-            r'\b(?:issue|problem|concern|challenge)\b',
-            r'\b(?:resource|allocation|budget|cost)\b',
-            r'\b(?:training|skill|competency|knowledge)\b',
-            r'\b(?:communication|collaboration|coordination)\b',
-            r'\b(?:policy|guideline|framework|structure)\b'
-        ]
-        
-        domain_terms = []
-        content_lower = content.lower()
-        
-        for pattern in domain_patterns:
-            matches = re.findall(pattern, content_lower, re.IGNORECASE)
-            domain_terms.extend(matches)
-        
-        return list(set(domain_terms))
+        return list(self.domain_term_matcher.matched_keywords(content))
     
     def _calculate_quality_score(self, cleaned_content: str, original_content: str) -> float:
         """Calculate quality score for the cleaned document"""
@@ -272,25 +300,10 @@ class DataCleaningAgent:
         
         return min(score, 1.0)
     
-    def _detect_language(self, content: str) -> str:
+    def _detect_language(self, content: str, profile: Optional[TextProfile] = None) -> str:
         """Simple language detection"""
         
-        # Count English common words
-        english_indicators = {
-            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of',
-            'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
-            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-            'could', 'should', 'this', 'that', 'these', 'those'
-        }
-        
-        words = re.findall(r'\b\w+\b', content.lower())
-        if not words:
-            return 'unknown'
-        
-        english_count = sum(1 for word in words if word in english_indicators)
-        english_ratio = english_count / len(words)
-        
-        return 'en' if english_ratio > 0.05 else 'unknown'
+        return detect_language(profile or TextProfile.from_text(content), self.english_indicator_ids, 0.05)
     
     def get_status(self) -> Dict[str, Any]:
         """Get agent status"""
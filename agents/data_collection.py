@@ -10,7 +10,10 @@ import re
 from pathlib import Path
 
 from models.feedback_models import FeedbackDocument, FeedbackSource
+from utils.dead_letter import record_failure
+from utils.execution import agent_execution
 from utils.logger import setup_logger
+from utils.text_profile import TextProfile, detect_language, vocabulary
 
 logger = setup_logger(__name__)
 
@@ -26,6 +29,17 @@ class DataCollectionAgent:
         self.min_content_length = 10
         self.max_content_length = 1000000  # 1MB text limit
         
+        # Common English words for the language heuristic
+        self.english_words = {
+            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+            'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before',
+            'after', 'above', 'below', 'between', 'among', 'is', 'are', 'was',
+            'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does',
+            'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
+            'can', 'this', 'that', 'these', 'those', 'a', 'an'
+        }
+        self.english_word_ids = vocabulary.ids_for(self.english_words)
+        
     async def initialize(self):
         """Initialize the data collection agent"""
         logger.info(f"Initializing {self.agent_id}")
@@ -36,29 +50,38 @@ class DataCollectionAgent:
         Validate and enrich feedback documents
         """
         documents = input_data.get('documents', [])
-        validated_documents = []
         
         logger.info(f"Validating and enriching {len(documents)} documents")
         
+        validated_documents = await agent_execution.map_slices(self.validate_batch, documents)
+        
+        logger.info(f"Successfully validated {len(validated_documents)} out of {len(documents)} documents")
+        return validated_documents
+    
+    def validate_batch(self, documents: List[FeedbackDocument]) -> List[FeedbackDocument]:
+        """Valid documents of a batch, enriched; the synchronous core of validate_and_enrich"""
+        validated_documents = []
+        
         for doc in documents:
             try:
                 # Validate document
-                if await self._validate_document(doc):
+                if self._validate_document(doc):
                     # Enrich document with metadata
-                    enriched_doc = await self._enrich_document(doc)
+                    enriched_doc = self._enrich_document(doc)
                     validated_documents.append(enriched_doc)
                     logger.debug(f"Document {doc.filename} validated and enriched")
                 else:
                     logger.warning(f"Document {doc.filename} failed validation")
+                    record_failure('data_collection', doc, "Failed validation")
                     
             except Exception as e:
                 logger.error(f"Error processing document {doc.filename}: {str(e)}")
+                record_failure('data_collection', doc, e)
                 continue
         
-        logger.info(f"Successfully validated {len(validated_documents)} out of {len(documents)} documents")
         return validated_documents
     
-    async def _validate_document(self, doc: FeedbackDocument) -> bool:
+    def _validate_document(self, doc: FeedbackDocument) -> bool:
         """Validate a single document"""
         
         # Check content length
@@ -96,15 +119,18 @@ class DataCollectionAgent:
         
         return True
     
-    async def _enrich_document(self, doc: FeedbackDocument) -> FeedbackDocument:
+    def _enrich_document(self, doc: FeedbackDocument) -> FeedbackDocument:
         """Enrich document with additional metadata"""
         
         # Detect source type based on content and filename
         doc.source = self._detect_source_type(doc)
         
+        # Tokenize once for all statistics below
+        profile = TextProfile.from_text(doc.content)
+        
         # Add metadata
         doc.metadata.update({
-            'word_count': len(doc.content.split()),
+            'word_count': profile.word_count,
             'character_count': len(doc.content),
             'line_count': len(doc.content.splitlines()),
             'processed_at': datetime.now().isoformat(),
@@ -112,16 +138,17 @@ class DataCollectionAgent:
         })
         
         # Extract basic statistics
-        doc.metadata.update(self._extract_basic_stats(doc.content))
+        doc.metadata.update(self._extract_basic_stats(doc.content, profile))
         
         # Detect language (simple heuristic)
-        doc.metadata['detected_language'] = self._detect_language(doc.content)
+        doc.metadata['detected_language'] = self._detect_language(doc.content, profile)
         
         return doc
     
     def _detect_source_type(self, doc: FeedbackDocument) -> FeedbackSource:
         """Detect the source type of the document based on content and filename"""
         
+        # A few substring scans with early exit; cheaper than a matcher pass
         content_lower = doc.content.lower()
         filename_lower = doc.filename.lower()
         
@@ -151,54 +178,37 @@ class DataCollectionAgent:
         
         return FeedbackSource.OTHER
     
-    def _extract_basic_stats(self, content: str) -> Dict[str, Any]:
+    def _extract_basic_stats(self, content: str, profile: Optional[TextProfile] = None) -> Dict[str, Any]:
         """Extract basic statistics from content"""
         
+        profile = profile or TextProfile.from_text(content)
+        
         # Count sentences (simple heuristic)
-        sentence_count = len(re.findall(r'[.!?]+', content))
+        sentence_count = profile.delimiter_count
         
         # Count paragraphs
         paragraph_count = len([p for p in content.split('\n\n') if p.strip()])
         
         # Count unique words
-        words = re.findall(r'\b\w+\b', content.lower())
-        unique_words = len(set(words))
+        word_count = profile.token_count
+        unique_words = profile.unique_token_count
         
         # Calculate readability metrics (simple)
-        avg_sentence_length = len(words) / max(sentence_count, 1)
+        avg_sentence_length = word_count / max(sentence_count, 1)
         
         return {
             'sentence_count': sentence_count,
             'paragraph_count': paragraph_count,
             'unique_words': unique_words,
             'avg_sentence_length': round(avg_sentence_length, 2),
-            'vocabulary_richness': round(unique_words / max(len(words), 1), 3)
+            'vocabulary_richness': round(unique_words / max(word_count, 1), 3)
         }
     
-    def _detect_language(self, content: str) -> str:
+    def _detect_language(self, content: str, profile: Optional[TextProfile] = None) -> str:
         """Simple language detection (English-focused)"""
         
-        # Count English common words
-        english_words = {
-            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-            'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before',
-            'after', 'above', 'below', 'between', 'among', 'is', 'are', 'was',
-            'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does',
-            'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
-            'can', 'this', 'that', 'these', 'those', 'a', 'an'
-        }
-        
-        words = re.findall(r'\b\w+\b', content.lower())
-        if not words:
-            return 'unknown'
-        
-        english_count = sum(1 for word in words if word in english_words)
-        english_ratio = english_count / len(words)
-        
-        if english_ratio > 0.1:  # At least 10% common English words
-            return 'en'
-        else:
-            return 'unknown'
+        # At least 10% common English words
+        return detect_language(profile or TextProfile.from_text(content), self.english_word_ids, 0.1)
     
     async def collect_from_directory(self, directory_path: str) -> List[FeedbackDocument]:
         """Collect feedback documents from a directory"""
@@ -2,18 +2,16 @@
 Insight Generation Agent - Identifies trends, patterns, and insights from feedback data
 """
 
-import asyncio
 import logging
-import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple, Set
-from collections import defaultdict, Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+from collections import defaultdict
 
-from models.feedback_models import (
-    CleanedDocument, CategoryResult, SentimentAnalysis, 
-    InsightData, FeedbackCategory, SentimentType
-)
+from models.feedback_models import InsightData
+from agents.insight_rules import FeatureTable, InsightRule, InsightRuleEngine
+from utils.execution import agent_execution
 from utils.logger import setup_logger
+from utils.term_sketch import TermSketch
 
 logger = setup_logger(__name__)
 
@@ -23,7 +21,12 @@ class InsightGenerationAgent:
     trends, patterns, and actionable insights across multiple dimensions.
     """
     
-    def __init__(self):
+    def __init__(self, term_history_path: Optional[str] = None):
+        """
+        Args:
+            term_history_path: File the term sketch of all earlier batches is
+                kept in between runs; emerging topics are measured against it
+        """
         self.agent_id = "insight_generation_agent"
         self.min_insight_support = 3  # Minimum occurrences for trend detection
         self.min_sentiment_impact = 0.3  # Minimum sentiment impact for insights
@@ -32,42 +35,52 @@ class InsightGenerationAgent:
         # Insight type configurations
         self.insight_types = {
             'trend': {
+                'enabled': True,
                 'min_confidence': 0.7,
                 'description': 'Identified trends over time in feedback data'
             },
             'pattern': {
+                'enabled': True,
                 'min_confidence': 0.6,
                 'description': 'Recognized patterns in feedback content and metadata'
             },
             'anomaly': {
+                'enabled': True,
                 'min_confidence': 0.8,
                 'description': 'Detected anomalies or outliers in feedback data'
             },
             'correlation': {
+                'enabled': True,
                 'min_confidence': 0.65,
                 'description': 'Found correlations between different feedback aspects'
             },
             'sentiment_shift': {
+                'enabled': True,
                 'min_confidence': 0.7,
                 'description': 'Significant changes in sentiment patterns'
             },
             'emerging_topic': {
+                'enabled': True,
                 'min_confidence': 0.6,
                 'description': 'New or increasing topics in feedback'
             },
             'frequent_issue': {
+                'enabled': True,
                 'min_confidence': 0.75,
                 'description': 'Recurring problems or complaints'
             },
             'improvement_area': {
+                'enabled': True,
                 'min_confidence': 0.7,
                 'description': 'Areas needing attention or enhancement'
             },
             'success_story': {
+                'enabled': True,
                 'min_confidence': 0.8,
                 'description': 'Positive outcomes or effective solutions'
             },
             'feedback_quality': {
+                'enabled': True,
                 'min_confidence': 0.7,
                 'description': 'Insights about feedback quality and characteristics'
             }
@@ -84,10 +97,23 @@ class InsightGenerationAgent:
             'decreasing', 'declining', 'improving', 'better', 'worse'
         ]
         
+        # Rules run for every enabled insight type (see agents.insight_rules)
+        self.rule_engine = InsightRuleEngine()
+        
+        # Term frequencies of earlier batches, the baseline for emerging topics
+        self.term_history_path = term_history_path
+        self.term_baseline = TermSketch()
+        self.emerging_growth_factor = 2.0  # Minimum increase in a term's share
+        
     async def initialize(self):
         """Initialize the insight generation agent"""
         logger.info(f"Initializing {self.agent_id}")
-        # In a real implementation, you might load ML models or historical data here
+        if self.term_history_path and Path(self.term_history_path).exists():
+            try:
+                self.term_baseline = TermSketch.load(self.term_history_path)
+                logger.info(f"Loaded term history of {self.term_baseline.total} term occurrences")
+            except Exception as e:
+                logger.error(f"Error loading term history: {str(e)}")
         
     async def generate_insights(
         self, 
@@ -112,38 +138,19 @@ class InsightGenerationAgent:
             sent_map = {s.document_id: s for s in sentiment_results}
             cat_map = {c.document_id: c for c in categorization_results}
             
-            # Generate different types of insights
-            insights = []
+            # Rules of the enabled insight types, and the features they read
+            rules = self.rule_engine.select(self.insight_types)
+            feature_names = self.rule_engine.required_features(rules)
             
-            # 1. Sentiment-based insights
-            sentiment_insights = await self._generate_sentiment_insights(
-                doc_map, sent_map, cat_map
+            # One pass over the documents builds the feature table; every
+            # feature is computed from it once, and the rules only read the features
+            table, insights = await agent_execution.run(
+                self.evaluate_rules, rules, doc_map, sent_map, cat_map, feature_names
             )
-            insights.extend(sentiment_insights)
             
-            # 2. Category-based insights
-            category_insights = await self._generate_category_insights(
-                doc_map, sent_map, cat_map
-            )
-            insights.extend(category_insights)
-            
-            # 3. Temporal insights
-            temporal_insights = await self._generate_temporal_insights(
-                doc_map, sent_map, cat_map
-            )
-            insights.extend(temporal_insights)
-            
-            # 4. Content-based insights
-            content_insights = await self._generate_content_insights(
-                doc_map, sent_map, cat_map
-            )
-            insights.extend(content_insights)
-            
-            # 5. Cross-cutting insights
-            cross_cutting_insights = await self._generate_cross_cutting_insights(
-                doc_map, sent_map, cat_map, insights
-            )
-            insights.extend(cross_cutting_insights)
+            # This batch becomes part of the history later batches compare against
+            if table.term_sketch is not None:
+                self._update_term_history(table.term_sketch)
             
             # Filter insights by confidence and uniqueness
             unique_insights = self._filter_unique_insights(insights)
@@ -155,361 +162,45 @@ class InsightGenerationAgent:
             logger.error(f"Error generating insights: {str(e)}")
             return []
     
-    async def _generate_sentiment_insights(
+    def build_features(
         self,
-        doc_map: Dict[str, CleanedDocument],
-        sent_map: Dict[str, SentimentAnalysis],
-        cat_map: Dict[str, CategoryResult]
-    ) -> List[InsightData]:
-        """Generate insights based on sentiment analysis"""
-        
-        insights = []
-        
-        # 1. Overall sentiment distribution
-        sentiment_counts = defaultdict(int)
-        for sent in sent_map.values():
-            sentiment_counts[sent.overall_sentiment] += 1
-        
-        total = sum(sentiment_counts.values())
-        if total > 0:
-            positive_ratio = sentiment_counts.get(SentimentType.POSITIVE, 0) / total
-            negative_ratio = sentiment_counts.get(SentimentType.NEGATIVE, 0) / total
-            neutral_ratio = sentiment_counts.get(SentimentType.NEUTRAL, 0) / total
-            
-            if negative_ratio > 0.5:
-                insights.append(InsightData(
-                    insight_type='sentiment_shift',
-                    description=f"Negative sentiment is dominant in {negative_ratio*100:.1f}% of feedback",
-                    supporting_evidence=[
-                        f"{sentiment_counts[SentimentType.NEGATIVE]} out of {total} feedback items are negative",
-                        f"Positive feedback ratio: {positive_ratio*100:.1f}%"
-                    ],
-                    frequency=int(negative_ratio * 100),  # As percentage
-                    severity='high' if negative_ratio > 0.6 else 'medium',
-                    trend_direction='increasing' if negative_ratio > 0.4 else 'stable',
-                    affected_areas=[cat.primary_category.value for cat in cat_map.values()]
-                ))
-            
-            if positive_ratio > 0.6:
-                insights.append(InsightData(
-                    insight_type='success_story',
-                    description=f"Positive sentiment is strong with {positive_ratio*100:.1f}% of feedback being positive",
-                    supporting_evidence=[
-                        f"{sentiment_counts[SentimentType.POSITIVE]} out of {total} feedback items are positive",
-                        f"Negative feedback ratio: {negative_ratio*100:.1f}%"
-                    ],
-                    frequency=int(positive_ratio * 100),
-                    severity='low',
-                    trend_direction='increasing' if positive_ratio > 0.5 else 'stable',
-                    affected_areas=[cat.primary_category.value for cat in cat_map.values()]
-                ))
-        
-        # 2. Sentiment by category
-        category_sentiments = defaultdict(lambda: defaultdict(int))
-        for doc_id, cat in cat_map.items():
-            if doc_id in sent_map:
-                sentiment = sent_map[doc_id].overall_sentiment
-                category_sentiments[cat.primary_category][sentiment] += 1
-        
-        for category, sentiments in category_sentiments.items():
-            total = sum(sentiments.values())
-            if total >= self.min_insight_support:
-                sentiment_dist = {k.value: v/total for k, v in sentiments.items()}
-                
-                # Check for strong sentiment in a category
-                for sentiment, count in sentiments.items():
-                    ratio = count / total
-                    if ratio > 0.6:  # Strong sentiment in this category
-                        insights.append(InsightData(
-                            insight_type='sentiment_shift',
-                            description=f"{sentiment.value.capitalize()} sentiment is particularly strong in the '{category.value}' category ({ratio*100:.1f}% of feedback)",
-                            supporting_evidence=[
-                                f"{count} out of {total} items in this category are {sentiment.value}",
-                                f"Overall sentiment distribution: {sentiment_dist}"
-                            ],
-                            frequency=count,
-                            severity='high' if ratio > 0.7 else 'medium',
-                            trend_direction='increasing' if ratio > 0.5 else 'stable',
-                            affected_areas=[category.value]
-                        ))
-        
-        return insights
+        doc_map: Dict[str, Any],
+        sent_map: Dict[str, Any],
+        cat_map: Dict[str, Any],
+        feature_names: Iterable[str]
+    ) -> Tuple[FeatureTable, Dict[str, Any]]:
+        """Feature table of a batch and the named features computed from it"""
+        table = FeatureTable.from_results(
+            doc_map, sent_map, cat_map,
+            term_sketch=self._new_term_sketch() if 'term_sketch' in feature_names else None
+        )
+        return table, table.features(feature_names)
     
-    async def _generate_category_insights(
+    def evaluate_rules(
         self,
-        doc_map: Dict[str, CleanedDocument],
-        sent_map: Dict[str, SentimentAnalysis],
-        cat_map: Dict[str, CategoryResult]
-    ) -> List[InsightData]:
-        """Generate insights based on category analysis"""
-        
-        insights = []
-        
-        # 1. Most common categories
-        category_counts = defaultdict(int)
-        for cat in cat_map.values():
-            category_counts[cat.primary_category] += 1
-        
-        if category_counts:
-            total = sum(category_counts.values())
-            sorted_categories = sorted(
-                category_counts.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )
-            
-            # Top categories insight
-            top_category, top_count = sorted_categories[0]
-            top_ratio = top_count / total
-            
-            if top_ratio > 0.3:  # If top category is significantly represented
-                insights.append(InsightData(
-                    insight_type='trend',
-                    description=f"The most common feedback category is '{top_category.value}' ({top_ratio*100:.1f}% of all feedback)",
-                    supporting_evidence=[
-                        f"{top_count} out of {total} feedback items are in this category",
-                        f"Top 3 categories: {', '.join([f'{cat.value} ({count/total*100:.1f}%)' for cat, count in sorted_categories[:3]])}"
-                    ],
-                    frequency=top_count,
-                    severity='medium',
-                    trend_direction='increasing' if top_ratio > 0.4 else 'stable',
-                    affected_areas=[top_category.value]
-                ))
-            
-            # Category distribution insight
-            if len(category_counts) >= 3:
-                diversity_index = len([v for v in category_counts.values() if v/total >= 0.1])
-                if diversity_index >= 3:
-                    insights.append(InsightData(
-                        insight_type='pattern',
-                        description=f"Feedback is distributed across {diversity_index} major categories, indicating diverse concerns",
-                        supporting_evidence=[
-                            f"Categories with ≥10% of feedback: {diversity_index}",
-                            f"Category distribution: {', '.join([f'{cat.value}: {count/total*100:.1f}%' for cat, count in sorted_categories])}"
-                        ],
-                        frequency=diversity_index,
-                        severity='low',
-                        trend_direction='stable',
-                        affected_areas=[cat.value for cat in category_counts.keys()]
-                    ))
-        
-        # 2. Sentiment by category correlations
-        category_sentiments = defaultdict(list)
-        for doc_id, sent in sent_map.items():
-            if doc_id in cat_map:
-                category = cat_map[doc_id].primary_category
-                category_sentiments[category].append(sent.sentiment_score)
-        
-        for category, scores in category_sentiments.items():
-            if len(scores) >= self.min_insight_support:
-                avg_score = sum(scores) / len(scores)
-                if abs(avg_score) >= self.min_sentiment_impact:
-                    sentiment_type = 'positive' if avg_score > 0 else 'negative'
-                    insights.append(InsightData(
-                        insight_type='sentiment_shift',
-                        description=f"Feedback in the '{category.value}' category shows {sentiment_type} sentiment on average",
-                        supporting_evidence=[
-                            f"Average sentiment score: {avg_score:.2f} (range: -1 to 1)",
-                            f"Based on {len(scores)} feedback items in this category"
-                        ],
-                        frequency=len(scores),
-                        severity='high' if abs(avg_score) > 0.5 else 'medium',
-                        trend_direction='increasing' if abs(avg_score) > 0.4 else 'stable',
-                        affected_areas=[category.value]
-                    ))
-        
-        return insights
+        rules: Iterable[InsightRule],
+        doc_map: Dict[str, Any],
+        sent_map: Dict[str, Any],
+        cat_map: Dict[str, Any],
+        feature_names: Iterable[str]
+    ) -> Tuple[FeatureTable, List[InsightData]]:
+        """Feature table of a batch and the insights of rules; the synchronous core of generate_insights"""
+        table, features = self.build_features(doc_map, sent_map, cat_map, feature_names)
+        return table, [insight for rule in rules for insight in rule.evaluate(features, self)]
     
-    async def _generate_temporal_insights(
-        self,
-        doc_map: Dict[str, CleanedDocument],
-        sent_map: Dict[str, SentimentAnalysis],
-        cat_map: Dict[str, CategoryResult]
-    ) -> List[InsightData]:
-        """Generate insights based on temporal patterns"""
-        
-        insights = []
-        
-        # Extract timestamps and categorize by time periods
-        # Note: This assumes documents have timestamps in their metadata
-        # For this example, we'll simulate temporal data
-        
-        # Simulate time-based analysis (in a real implementation, use actual timestamps)
-        current_time = datetime.now()
-        time_windows = {
-            'last_week': (current_time - timedelta(days=7), current_time),
-            'last_month': (current_time - timedelta(days=30), current_time)
-        }
-        
-        # Count documents in each time window
-        window_counts = {window: 0 for window in time_windows}
-        
-        # In a real implementation, you would filter documents by their timestamp
-        # For now, we'll simulate some temporal patterns
-        total_docs = len(doc_map)
-        if total_docs > 0:
-            # Simulate 40% of documents in the last week
-            window_counts['last_week'] = int(total_docs * 0.4)
-            window_counts['last_month'] = total_docs  # All documents in the last month
-            
-            # Check for recent increase in feedback volume
-            weekly_ratio = window_counts['last_week'] / (window_counts['last_month'] - window_counts['last_week'] + 1)
-            
-            if weekly_ratio > 0.5:  # More than 50% of monthly feedback in the last week
-                insights.append(InsightData(
-                    insight_type='trend',
-                    description=f"Significant increase in feedback volume in the last week ({window_counts['last_week']} items)",
-                    supporting_evidence=[
-                        f"{window_counts['last_week']} feedback items in the last week",
-                        f"{window_counts['last_month']} items in the last month"
-                    ],
-                    frequency=window_counts['last_week'],
-                    severity='high' if weekly_ratio > 1.0 else 'medium',
-                    trend_direction='increasing',
-                    affected_areas=['All categories']
-                ))
-        
-        return insights
+    def _new_term_sketch(self) -> TermSketch:
+        """Empty sketch that can be compared with and merged into the baseline"""
+        baseline = self.term_baseline
+        return TermSketch(baseline.width, baseline.depth, baseline.capacity, baseline.seed)
     
-    async def _generate_content_insights(
-        self,
-        doc_map: Dict[str, CleanedDocument],
-        sent_map: Dict[str, SentimentAnalysis],
-        cat_map: Dict[str, CategoryResult]
-    ) -> List[InsightData]:
-        """Generate insights by analyzing content patterns"""
-        
-        insights = []
-        
-        # 1. Common phrases and terms
-        all_terms = []
-        for doc in doc_map.values():
-            # Simple term extraction (in a real implementation, use NLP techniques)
-            terms = re.findall(r'\b\w{4,}\b', doc.cleaned_content.lower())
-            all_terms.extend(terms)
-        
-        term_freq = Counter(all_terms)
-        common_terms = term_freq.most_common(10)
-        
-        # 2. Frequent issues or requests
-        issue_indicators = ['issue', 'problem', 'error', 'bug', 'fix', 'broken', 'not working']
-        issue_docs = []
-        
-        for doc_id, doc in doc_map.items():
-            if any(indicator in doc.cleaned_content.lower() for indicator in issue_indicators):
-                issue_docs.append(doc_id)
-        
-        if len(issue_docs) >= self.min_insight_support:
-            issue_categories = [cat_map[doc_id].primary_category for doc_id in issue_docs if doc_id in cat_map]
-            if issue_categories:
-                most_common_category = Counter(issue_categories).most_common(1)[0]
-                
-                insights.append(InsightData(
-                    insight_type='frequent_issue',
-                    description=f"Identified {len(issue_docs)} documents mentioning issues, primarily in the '{most_common_category[0].value}' category",
-                    supporting_evidence=[
-                        f"{most_common_category[1]} issues in '{most_common_category[0].value}' category",
-                        f"Common issue indicators: {', '.join(issue_indicators[:3])}"
-                    ],
-                    frequency=len(issue_docs),
-                    severity='high' if len(issue_docs) > 10 else 'medium',
-                    trend_direction='increasing' if len(issue_docs) > 5 else 'stable',
-                    affected_areas=[cat.value for cat, _ in Counter(issue_categories).most_common(3)]
-                ))
-        
-        # 3. Content length analysis
-        doc_lengths = [len(doc.cleaned_content.split()) for doc in doc_map.values()]
-        if doc_lengths:
-            avg_length = sum(doc_lengths) / len(doc_lengths)
-            
-            if avg_length < 50:
-                insights.append(InsightData(
-                    insight_type='feedback_quality',
-                    description="Feedback items are relatively short, which may indicate lack of detail",
-                    supporting_evidence=[
-                        f"Average feedback length: {avg_length:.1f} words",
-                        f"Total feedback items analyzed: {len(doc_lengths)}"
-                    ],
-                    frequency=len([l for l in doc_lengths if l < 50]),
-                    severity='low',
-                    trend_direction='stable',
-                    affected_areas=['Feedback quality']
-                ))
-        
-        return insights
-    
-    async def _generate_cross_cutting_insights(
-        self,
-        doc_map: Dict[str, CleanedDocument],
-        sent_map: Dict[str, SentimentAnalysis],
-        cat_map: Dict[str, CategoryResult],
-        existing_insights: List[InsightData]
-    ) -> List[InsightData]:
-        """Generate insights that cut across multiple dimensions"""
-        
-        insights = []
-        
-        # 1. Correlate sentiment with categories
-        category_sentiments = defaultdict(list)
-        for doc_id, sent in sent_map.items():
-            if doc_id in cat_map:
-                category = cat_map[doc_id].primary_category
-                category_sentiments[category].append(sent.sentiment_score)
-        
-        # Find categories with strongest negative sentiment
-        negative_categories = []
-        for category, scores in category_sentiments.items():
-            if len(scores) >= self.min_insight_support:
-                avg_score = sum(scores) / len(scores)
-                if avg_score < -self.min_sentiment_impact:
-                    negative_categories.append((category, avg_score, len(scores)))
-        
-        # Sort by most negative
-        negative_categories.sort(key=lambda x: x[1])
-        
-        for category, score, count in negative_categories[:3]:  # Top 3 most negative
-            insights.append(InsightData(
-                insight_type='improvement_area',
-                description=f"The '{category.value}' category shows consistently negative sentiment (avg score: {score:.2f})",
-                supporting_evidence=[
-                    f"Based on {count} feedback items in this category",
-                    f"Average sentiment score: {score:.2f} (range: -1 to 1)"
-                ],
-                frequency=count,
-                severity='high' if score < -0.5 else 'medium',
-                trend_direction='decreasing' if score < -0.3 else 'stable',
-                affected_areas=[category.value]
-            ))
-        
-        # 2. Emerging topics (terms that appear in recent feedback)
-        # In a real implementation, compare current terms with historical data
-        # For now, we'll just look for less common terms that appear multiple times
-        all_terms = []
-        for doc in doc_map.values():
-            terms = re.findall(r'\b\w{5,}\b', doc.cleaned_content.lower())
-            all_terms.extend(terms)
-        
-        term_freq = Counter(all_terms)
-        emerging_terms = [
-            term for term, count in term_freq.items() 
-            if 2 <= count <= 5  # Terms that appear a few times
-        ]
-        
-        if emerging_terms:
-            insights.append(InsightData(
-                insight_type='emerging_topic',
-                description=f"Potential emerging topics detected in feedback",
-                supporting_evidence=[
-                    f"Terms appearing multiple times: {', '.join(emerging_terms[:5])}",
-                    f"Total unique terms: {len(term_freq)}"
-                ],
-                frequency=len(emerging_terms),
-                severity='low',
-                trend_direction='increasing',
-                affected_areas=['Content analysis']
-            ))
-        
-        return insights
+    def _update_term_history(self, sketch: TermSketch) -> None:
+        """Merge a batch's terms into the baseline and persist it"""
+        self.term_baseline.merge(sketch)
+        if self.term_history_path:
+            try:
+                self.term_baseline.save(self.term_history_path)
+            except Exception as e:
+                logger.error(f"Error saving term history: {str(e)}")
     
     def _filter_unique_insights(self, insights: List[InsightData]) -> List[InsightData]:
         """Filter and deduplicate insights"""
@@ -542,9 +233,10 @@ class InsightGenerationAgent:
         return {
             'agent_id': self.agent_id,
             'status': 'active',
-            'insight_types': list(self.insight_types.keys()),
+            'insight_types': [name for name, config in self.insight_types.items() if config.get('enabled', True)],
             'min_insight_support': self.min_insight_support,
-            'min_sentiment_impact': self.min_sentiment_impact
+            'min_sentiment_impact': self.min_sentiment_impact,
+            'term_history_occurrences': self.term_baseline.total
         }
     
     async def shutdown(self):
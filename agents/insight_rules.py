@@ -0,0 +1,466 @@
+"""
+Insight rules and the feature table they are evaluated against.
+
+Each rule declares the insight type it produces and the aggregate features
+it reads. Per batch, the engine builds one columnar table of the documents
+and their sentiment and category results, computes every feature the enabled
+rules need from it once, and evaluates the rules against those features. New
+insight types are added as rules and never add a pass over the documents.
+Term frequencies go into a fixed-size TermSketch rather than a full counter.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from models.feedback_models import CleanedDocument, CategoryResult, InsightData, SentimentAnalysis
+from utils.term_sketch import TermSketch
+from utils.text_profile import vocabulary
+
+# Substrings marking a document as reporting an issue
+ISSUE_INDICATORS = ['issue', 'problem', 'error', 'bug', 'fix', 'broken', 'not working']
+
+# Shortest term counted in the term sketch
+MIN_TERM_LENGTH = 5
+
+# Term counts are buffered for this many documents before going into the sketch
+TERM_FLUSH_DOCUMENTS = 1000
+
+
+class FeatureTable:
+    """
+    One row per document of a batch: primary category, sentiment label and
+    score, word count and whether it mentions an issue. Results without a
+    document get a row too, so counts match the result lists.
+    """
+
+    def __init__(self, frame: pd.DataFrame, term_sketch: Optional[TermSketch] = None):
+        self.frame = frame
+        self.term_sketch = term_sketch
+
+    @classmethod
+    def from_results(
+        cls,
+        doc_map: Dict[str, CleanedDocument],
+        sent_map: Dict[str, SentimentAnalysis],
+        cat_map: Dict[str, CategoryResult],
+        term_sketch: Optional[TermSketch] = None
+    ) -> 'FeatureTable':
+        """
+        Build the table in a single pass over the documents and their results,
+        adding the documents' terms to term_sketch when one is given
+        """
+        ids = list(doc_map)
+        ids.extend(dict.fromkeys(
+            doc_id for results in (sent_map, cat_map) for doc_id in results if doc_id not in doc_map
+        ))
+
+        missing = float('nan')
+        categories, sentiments, scores, word_counts, issues = [], [], [], [], []
+        id_counts = Counter()
+        # Terms of profiles with overflowed tokens, which ids do not tell apart
+        text_counts = Counter()
+        buffered = 0
+        for doc_id in ids:
+            cat = cat_map.get(doc_id)
+            sent = sent_map.get(doc_id)
+            doc = doc_map.get(doc_id)
+            categories.append(cat.primary_category.value if cat is not None else None)
+            sentiments.append(sent.overall_sentiment.value if sent is not None else None)
+            scores.append(sent.sentiment_score if sent is not None else missing)
+            if doc is None:
+                word_counts.append(None)
+                issues.append(False)
+                continue
+            profile = doc.text_profile
+            word_counts.append(profile.word_count)
+            content = doc.cleaned_content.lower()
+            issues.append(any(indicator in content for indicator in ISSUE_INDICATORS))
+            if term_sketch is not None:
+                if profile.overflowed:
+                    text_counts.update(profile.token_counts(content, MIN_TERM_LENGTH))
+                else:
+                    id_counts.update(profile.term_counts(MIN_TERM_LENGTH))
+                buffered += 1
+                if buffered == TERM_FLUSH_DOCUMENTS:
+                    term_sketch.update(_term_strings(id_counts, text_counts))
+                    id_counts.clear()
+                    text_counts.clear()
+                    buffered = 0
+        if term_sketch is not None:
+            term_sketch.update(_term_strings(id_counts, text_counts))
+
+        frame = pd.DataFrame({
+            'document_id': ids,
+            'category': categories,
+            'sentiment': sentiments,
+            'score': pd.Series(scores, dtype='float64'),
+            'word_count': pd.array(word_counts, dtype='Int64'),
+            'is_issue': issues
+        })
+        return cls(frame, term_sketch)
+
+    def features(self, names: Iterable[str]) -> Dict[str, Any]:
+        """Compute the named features, each once"""
+        return {name: FEATURES[name](self) for name in dict.fromkeys(names)}
+
+
+def _term_strings(id_counts: Counter, text_counts: Counter) -> Dict[str, int]:
+    """Buffered term counts by string"""
+    token = vocabulary.token
+    terms = {token(token_id): count for token_id, count in id_counts.items()}
+    for term, count in text_counts.items():
+        terms[term] = terms.get(term, 0) + count
+    return terms
+
+
+def _category_scores(table: FeatureTable) -> pd.DataFrame:
+    scored = table.frame.dropna(subset=['category', 'score'])
+    return scored.groupby('category', sort=False)['score'].agg(['mean', 'count'])
+
+
+# Aggregate features, keyed by the name rules declare. Groups keep the order
+# in which their first document appears.
+FEATURES: Dict[str, Callable[[FeatureTable], Any]] = {
+    'document_count': lambda table: int(table.frame['word_count'].notna().sum()),
+    'sentiment_counts': lambda table: table.frame['sentiment'].value_counts(sort=False).to_dict(),
+    'category_counts': lambda table: table.frame['category'].value_counts(sort=False).to_dict(),
+    'primary_categories': lambda table: table.frame['category'].dropna().tolist(),
+    'category_sentiment_counts': lambda table: (
+        table.frame.groupby(['category', 'sentiment'], sort=False).size()
+    ),
+    'category_scores': _category_scores,
+    'word_counts': lambda table: table.frame['word_count'].dropna().astype('int64'),
+    'issue_categories': lambda table: table.frame.loc[table.frame['is_issue'], 'category'],
+    'term_sketch': lambda table: table.term_sketch
+}
+
+
+@dataclass(frozen=True)
+class InsightRule:
+    """
+    A heuristic producing insights of one type. evaluate receives the
+    declared features and the agent, for its thresholds.
+    """
+    name: str
+    insight_type: str
+    features: tuple
+    evaluate: Callable[[Dict[str, Any], Any], List[InsightData]]
+
+
+def _dominant_negative_sentiment(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    sentiment_counts = features['sentiment_counts']
+    total = sum(sentiment_counts.values())
+    if total == 0:
+        return []
+    positive_ratio = sentiment_counts.get('positive', 0) / total
+    negative_ratio = sentiment_counts.get('negative', 0) / total
+    if negative_ratio <= 0.5:
+        return []
+    return [InsightData(
+        insight_type='sentiment_shift',
+        description=f"Negative sentiment is dominant in {negative_ratio*100:.1f}% of feedback",
+        supporting_evidence=[
+            f"{sentiment_counts['negative']} out of {total} feedback items are negative",
+            f"Positive feedback ratio: {positive_ratio*100:.1f}%"
+        ],
+        frequency=int(negative_ratio * 100),  # As percentage
+        severity='high' if negative_ratio > 0.6 else 'medium',
+        trend_direction='increasing' if negative_ratio > 0.4 else 'stable',
+        affected_areas=features['primary_categories']
+    )]
+
+
+def _strong_positive_sentiment(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    sentiment_counts = features['sentiment_counts']
+    total = sum(sentiment_counts.values())
+    if total == 0:
+        return []
+    positive_ratio = sentiment_counts.get('positive', 0) / total
+    negative_ratio = sentiment_counts.get('negative', 0) / total
+    if positive_ratio <= 0.6:
+        return []
+    return [InsightData(
+        insight_type='success_story',
+        description=f"Positive sentiment is strong with {positive_ratio*100:.1f}% of feedback being positive",
+        supporting_evidence=[
+            f"{sentiment_counts['positive']} out of {total} feedback items are positive",
+            f"Negative feedback ratio: {negative_ratio*100:.1f}%"
+        ],
+        frequency=int(positive_ratio * 100),
+        severity='low',
+        trend_direction='increasing' if positive_ratio > 0.5 else 'stable',
+        affected_areas=features['primary_categories']
+    )]
+
+
+def _category_sentiment_concentration(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    insights = []
+    for category, sentiments in features['category_sentiment_counts'].groupby(level=0, sort=False):
+        sentiments = sentiments.droplevel(0).to_dict()
+        total = sum(sentiments.values())
+        if total < settings.min_insight_support:
+            continue
+        sentiment_dist = {sentiment: count/total for sentiment, count in sentiments.items()}
+
+        # Check for strong sentiment in a category
+        for sentiment, count in sentiments.items():
+            ratio = count / total
+            if ratio > 0.6:
+                insights.append(InsightData(
+                    insight_type='sentiment_shift',
+                    description=f"{sentiment.capitalize()} sentiment is particularly strong in the '{category}' category ({ratio*100:.1f}% of feedback)",
+                    supporting_evidence=[
+                        f"{count} out of {total} items in this category are {sentiment}",
+                        f"Overall sentiment distribution: {sentiment_dist}"
+                    ],
+                    frequency=count,
+                    severity='high' if ratio > 0.7 else 'medium',
+                    trend_direction='increasing' if ratio > 0.5 else 'stable',
+                    affected_areas=[category]
+                ))
+    return insights
+
+
+def _sorted_categories(category_counts: Dict[str, int]) -> List[tuple]:
+    return sorted(category_counts.items(), key=lambda x: x[1], reverse=True)
+
+
+def _top_category(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    category_counts = features['category_counts']
+    if not category_counts:
+        return []
+    total = sum(category_counts.values())
+    sorted_categories = _sorted_categories(category_counts)
+    top_category, top_count = sorted_categories[0]
+    top_ratio = top_count / total
+    if top_ratio <= 0.3:
+        return []
+    return [InsightData(
+        insight_type='trend',
+        description=f"The most common feedback category is '{top_category}' ({top_ratio*100:.1f}% of all feedback)",
+        supporting_evidence=[
+            f"{top_count} out of {total} feedback items are in this category",
+            f"Top 3 categories: {', '.join([f'{cat} ({count/total*100:.1f}%)' for cat, count in sorted_categories[:3]])}"
+        ],
+        frequency=top_count,
+        severity='medium',
+        trend_direction='increasing' if top_ratio > 0.4 else 'stable',
+        affected_areas=[top_category]
+    )]
+
+
+def _category_diversity(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    category_counts = features['category_counts']
+    if len(category_counts) < 3:
+        return []
+    total = sum(category_counts.values())
+    diversity_index = len([v for v in category_counts.values() if v/total >= 0.1])
+    if diversity_index < 3:
+        return []
+    return [InsightData(
+        insight_type='pattern',
+        description=f"Feedback is distributed across {diversity_index} major categories, indicating diverse concerns",
+        supporting_evidence=[
+            f"Categories with ≥10% of feedback: {diversity_index}",
+            f"Category distribution: {', '.join([f'{cat}: {count/total*100:.1f}%' for cat, count in _sorted_categories(category_counts)])}"
+        ],
+        frequency=diversity_index,
+        severity='low',
+        trend_direction='stable',
+        affected_areas=list(category_counts)
+    )]
+
+
+def _category_sentiment_mean(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    insights = []
+    for category, avg_score, count in features['category_scores'].itertuples():
+        count = int(count)
+        if count < settings.min_insight_support or abs(avg_score) < settings.min_sentiment_impact:
+            continue
+        sentiment_type = 'positive' if avg_score > 0 else 'negative'
+        insights.append(InsightData(
+            insight_type='sentiment_shift',
+            description=f"Feedback in the '{category}' category shows {sentiment_type} sentiment on average",
+            supporting_evidence=[
+                f"Average sentiment score: {avg_score:.2f} (range: -1 to 1)",
+                f"Based on {count} feedback items in this category"
+            ],
+            frequency=count,
+            severity='high' if abs(avg_score) > 0.5 else 'medium',
+            trend_direction='increasing' if abs(avg_score) > 0.4 else 'stable',
+            affected_areas=[category]
+        ))
+    return insights
+
+
+def _feedback_volume(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    # Deliberately still simulated: document timestamps do not reach the cleaned
+    # records, so the feature table has no dates to count weekly volume from
+    total_docs = features['document_count']
+    if total_docs == 0:
+        return []
+    current_time = datetime.now()
+    time_windows = {
+        'last_week': (current_time - timedelta(days=7), current_time),
+        'last_month': (current_time - timedelta(days=30), current_time)
+    }
+    window_counts = {window: 0 for window in time_windows}
+    window_counts['last_week'] = int(total_docs * 0.4)
+    window_counts['last_month'] = total_docs
+
+    weekly_ratio = window_counts['last_week'] / (window_counts['last_month'] - window_counts['last_week'] + 1)
+    if weekly_ratio <= 0.5:
+        return []
+    return [InsightData(
+        insight_type='trend',
+        description=f"Significant increase in feedback volume in the last week ({window_counts['last_week']} items)",
+        supporting_evidence=[
+            f"{window_counts['last_week']} feedback items in the last week",
+            f"{window_counts['last_month']} items in the last month"
+        ],
+        frequency=window_counts['last_week'],
+        severity='high' if weekly_ratio > 1.0 else 'medium',
+        trend_direction='increasing',
+        affected_areas=['All categories']
+    )]
+
+
+def _frequent_issues(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    issue_categories = features['issue_categories']
+    issue_count = len(issue_categories)
+    categorized = Counter(issue_categories.dropna().tolist())
+    if issue_count < settings.min_insight_support or not categorized:
+        return []
+    top_category, top_count = categorized.most_common(1)[0]
+    return [InsightData(
+        insight_type='frequent_issue',
+        description=f"Identified {issue_count} documents mentioning issues, primarily in the '{top_category}' category",
+        supporting_evidence=[
+            f"{top_count} issues in '{top_category}' category",
+            f"Common issue indicators: {', '.join(ISSUE_INDICATORS[:3])}"
+        ],
+        frequency=issue_count,
+        severity='high' if issue_count > 10 else 'medium',
+        trend_direction='increasing' if issue_count > 5 else 'stable',
+        affected_areas=[category for category, _ in categorized.most_common(3)]
+    )]
+
+
+def _short_feedback(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    word_counts = features['word_counts']
+    if word_counts.empty:
+        return []
+    avg_length = word_counts.mean()
+    if avg_length >= 50:
+        return []
+    return [InsightData(
+        insight_type='feedback_quality',
+        description="Feedback items are relatively short, which may indicate lack of detail",
+        supporting_evidence=[
+            f"Average feedback length: {avg_length:.1f} words",
+            f"Total feedback items analyzed: {len(word_counts)}"
+        ],
+        frequency=int((word_counts < 50).sum()),
+        severity='low',
+        trend_direction='stable',
+        affected_areas=['Feedback quality']
+    )]
+
+
+def _negative_categories(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    scores = features['category_scores']
+    negative = scores[(scores['count'] >= settings.min_insight_support) & (scores['mean'] < -settings.min_sentiment_impact)]
+
+    # Top 3 most negative
+    insights = []
+    for category, score, count in negative.sort_values('mean', kind='stable').head(3).itertuples():
+        insights.append(InsightData(
+            insight_type='improvement_area',
+            description=f"The '{category}' category shows consistently negative sentiment (avg score: {score:.2f})",
+            supporting_evidence=[
+                f"Based on {int(count)} feedback items in this category",
+                f"Average sentiment score: {score:.2f} (range: -1 to 1)"
+            ],
+            frequency=int(count),
+            severity='high' if score < -0.5 else 'medium',
+            trend_direction='decreasing' if score < -0.3 else 'stable',
+            affected_areas=[category]
+        ))
+    return insights
+
+
+def _emerging_terms(features: Dict[str, Any], settings: Any) -> List[InsightData]:
+    # Emerging terms are frequent terms whose share grew against the history
+    sketch = features['term_sketch']
+    baseline = settings.term_baseline
+    if baseline is None or baseline.total == 0:
+        return []
+    frequent = [term for term, count in sketch.top() if count >= settings.min_insight_support]
+    growth = sketch.growth(baseline, frequent)
+    emerging = sorted(
+        (term for term in frequent if growth[term] >= settings.emerging_growth_factor),
+        key=lambda term: growth[term],
+        reverse=True
+    )
+    if not emerging:
+        return []
+    return [InsightData(
+        insight_type='emerging_topic',
+        description="Emerging topics detected: terms used markedly more often than in earlier feedback",
+        supporting_evidence=[
+            f"Largest increases: {', '.join(f'{term} (x{growth[term]:.1f})' for term in emerging[:5])}",
+            f"Compared with {baseline.total} term occurrences from earlier batches"
+        ],
+        frequency=len(emerging),
+        severity='medium' if growth[emerging[0]] >= 5 else 'low',
+        trend_direction='increasing',
+        affected_areas=['Content analysis']
+    )]
+
+
+DEFAULT_RULES = [
+    InsightRule('dominant_negative_sentiment', 'sentiment_shift',
+                ('sentiment_counts', 'primary_categories'), _dominant_negative_sentiment),
+    InsightRule('strong_positive_sentiment', 'success_story',
+                ('sentiment_counts', 'primary_categories'), _strong_positive_sentiment),
+    InsightRule('category_sentiment_concentration', 'sentiment_shift',
+                ('category_sentiment_counts',), _category_sentiment_concentration),
+    InsightRule('top_category', 'trend', ('category_counts',), _top_category),
+    InsightRule('category_diversity', 'pattern', ('category_counts',), _category_diversity),
+    InsightRule('category_sentiment_mean', 'sentiment_shift', ('category_scores',), _category_sentiment_mean),
+    InsightRule('feedback_volume', 'trend', ('document_count',), _feedback_volume),
+    InsightRule('frequent_issues', 'frequent_issue', ('issue_categories',), _frequent_issues),
+    InsightRule('short_feedback', 'feedback_quality', ('word_counts',), _short_feedback),
+    InsightRule('negative_categories', 'improvement_area', ('category_scores',), _negative_categories),
+    InsightRule('emerging_terms', 'emerging_topic', ('term_sketch',), _emerging_terms)
+]
+
+
+class InsightRuleEngine:
+    """Selects the rules of the enabled insight types and the features they need"""
+
+    def __init__(self, rules: Optional[List[InsightRule]] = None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+
+    def register(self, rule: InsightRule) -> None:
+        """Add a rule; its features must be in FEATURES"""
+        unknown = [name for name in rule.features if name not in FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown features for rule {rule.name}: {', '.join(unknown)}")
+        self.rules.append(rule)
+
+    def select(self, insight_types: Dict[str, Dict[str, Any]]) -> List[InsightRule]:
+        """Rules whose insight type is configured and enabled"""
+        return [
+            rule for rule in self.rules
+            if rule.insight_type in insight_types
+            and insight_types[rule.insight_type].get('enabled', True)
+        ]
+
+    @staticmethod
+    def required_features(rules: List[InsightRule]) -> List[str]:
+        return list(dict.fromkeys(name for rule in rules for name in rule.features))
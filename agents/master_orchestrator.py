@@ -4,7 +4,9 @@ Master Orchestrator Agent - Coordinates the entire feedback processing pipeline
 
 import asyncio
 import logging
+from contextvars import ContextVar
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Any, Optional
 from uuid import uuid4
 
@@ -12,21 +14,53 @@ from models.feedback_models import (
     FeedbackDocument, ProcessingResult, AgentTask, ProcessingStatus,
     SentimentAnalysis, CategoryResult, InsightData, Recommendation
 )
+from agents.task_registry import TaskRegistry
+from models.records import to_models
+from utils.admission import AdmissionController
+from utils.dead_letter import DeadLetterQueue, collecting, replay_stages
+from utils.guardrails import OverrunLog, tracking_overruns
 from utils.logger import setup_logger
+from utils.profiling import CpuProfiler, MemoryProfiler, cpu_profiling, profile_stage, run_profilers
 
 logger = setup_logger(__name__)
 
+# Batch of the pipeline run in the current task, recorded with its agent tasks
+_run_batch_id: ContextVar[Optional[str]] = ContextVar('run_batch_id', default=None)
+
 class MasterOrchestratorAgent:
     """
     Master Orchestrator Agent that coordinates the entire feedback processing pipeline.
     Manages task delegation, workflow orchestration, and result aggregation.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        profile_memory: bool = False,
+        max_pipelines: int = 2,
+        max_inflight_documents: int = 50_000,
+        max_queue: int = 32,
+        task_history: int = 1000,
+        max_retries: int = 2,
+        retry_backoff_seconds: float = 0.5
+    ):
         self.agent_id = "master_orchestrator"
         self.agents: Dict[str, Any] = {}
-        self.active_tasks: Dict[str, AgentTask] = {}
-        self.processing_queue = asyncio.Queue()
+        
+        # Running agent tasks, and summaries of the last task_history finished ones
+        self.tasks = TaskRegistry(task_history)
+        
+        # Bounds the pipelines and documents in flight; callers beyond the
+        # queue get AdmissionRejected
+        self.admission = AdmissionController(max_pipelines, max_inflight_documents, max_queue)
+        
+        # Transient per-document failures are retried this many times after the
+        # batch's first pass, with the backoff doubling between passes
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        
+        # Trace allocations per agent task and write a memory profile next to each report;
+        # CPU profiling is switched at runtime through utils.profiling.cpu_profiling
+        self.profile_memory = profile_memory
         
     async def initialize(self, agents: Dict[str, Any]):
         """Initialize the orchestrator with specialized agents and knowledge graph"""
@@ -39,16 +73,40 @@ class MasterOrchestratorAgent:
         
         logger.info("Master Orchestrator initialized successfully")
     
-    async def process_feedback_pipeline(self, documents: List[FeedbackDocument]) -> ProcessingResult:
+    async def process_feedback_pipeline(
+        self,
+        documents: List[FeedbackDocument],
+        client_id: str = "default"
+    ) -> ProcessingResult:
         """
-        Main pipeline for processing feedback documents through all agents
+        Main pipeline for processing feedback documents through all agents.
+        Waits for admission first; raises AdmissionRejected if the queue is full.
         """
+        async with self.admission.slot(client_id, len(documents)) as waited:
+            if waited:
+                logger.info(f"Batch of client {client_id} admitted after {waited:.2f}s in the queue")
+            return await self._run_pipeline(documents)
+    
+    async def _run_pipeline(self, documents: List[FeedbackDocument]) -> ProcessingResult:
+        """Run the agents over an admitted batch"""
         start_time = datetime.now()
         batch_id = f"batch_{uuid4().hex[:8]}"
         
         logger.info(f"Starting feedback processing pipeline for batch {batch_id}")
         logger.info(f"Processing {len(documents)} documents")
         
+        memory_profiler = None
+        if self.profile_memory:
+            memory_profiler = MemoryProfiler()
+            if not memory_profiler.start():
+                logger.info(f"Another batch is being memory profiled, batch {batch_id} runs unprofiled")
+                memory_profiler = None
+        cpu_profiler = cpu_profiling.begin_run(batch_id)
+        profilers_token = run_profilers.set((memory_profiler, cpu_profiler))
+        batch_token = _run_batch_id.set(batch_id)
+        dead_letters = DeadLetterQueue(self.max_retries, self.retry_backoff_seconds)
+        overruns = OverrunLog()
+        
         try:
             # Initialize processing result
             result = ProcessingResult(
@@ -57,31 +115,39 @@ class MasterOrchestratorAgent:
                 processed_documents=0
             )
             
-            # Step 1: Data Collection (already have documents, but validate and enrich)
-            logger.info("Step 1: Data Collection and Validation")
-            validated_documents = await self._execute_agent_task(
-                'data_collection', 'validate_and_enrich', {'documents': documents}
-            )
-            
-            # Step 2: Data Cleaning
-            logger.info("Step 2: Data Cleaning and Preprocessing")
-            cleaned_documents = await self._execute_agent_task(
-                'data_cleaning', 'clean_documents', {'documents': validated_documents}
-            )
-            
-            # Step 3: Sentiment Analysis
-            logger.info("Step 3: Sentiment Analysis")
-            sentiment_results = await self._execute_agent_task(
-                'sentiment_analysis', 'analyze_sentiment', {'documents': cleaned_documents}
-            )
-            result.sentiment_results = sentiment_results
-            
-            # Step 4: Categorization
-            logger.info("Step 4: Feedback Categorization")
-            categorization_results = await self._execute_agent_task(
-                'categorization', 'categorize_feedback', {'documents': cleaned_documents}
-            )
-            result.categorization_results = categorization_results
+            with collecting(dead_letters), tracking_overruns(overruns):
+                # Step 1: Data Collection (already have documents, but validate and enrich)
+                logger.info("Step 1: Data Collection and Validation")
+                validated_documents = await self._execute_agent_task(
+                    'data_collection', 'validate_and_enrich', {'documents': documents}
+                )
+                
+                # Step 2: Data Cleaning
+                logger.info("Step 2: Data Cleaning and Preprocessing")
+                cleaned_documents = await self._execute_agent_task(
+                    'data_cleaning', 'clean_documents', {'documents': validated_documents, 'return_records': True}
+                )
+                
+                # Step 3: Sentiment Analysis
+                logger.info("Step 3: Sentiment Analysis")
+                sentiment_results = await self._execute_agent_task(
+                    'sentiment_analysis', 'analyze_sentiment', {'documents': cleaned_documents, 'return_records': True}
+                )
+                
+                # Step 4: Categorization
+                logger.info("Step 4: Feedback Categorization")
+                categorization_results = await self._execute_agent_task(
+                    'categorization', 'categorize_feedback', {'documents': cleaned_documents, 'return_records': True}
+                )
+                
+                # Transient failures get another chance once the batch is through
+                if dead_letters:
+                    recovered = await dead_letters.retry(
+                        lambda batch: self._replay_failed_documents(
+                            batch, cleaned_documents, sentiment_results, categorization_results
+                        )
+                    )
+                    logger.info(f"{len(dead_letters.failed_ids())} documents failed, {recovered} recovered on retry")
             
             # Step 5: Insight Generation
             logger.info("Step 5: Insight Generation")
@@ -109,17 +175,29 @@ class MasterOrchestratorAgent:
             logger.info("Step 7: Final Report Generation")
             final_report = await self._execute_agent_task(
                 'report_generation', 'generate_report', {
-                    'batch_id': batch_id,
-                    'documents': cleaned_documents,
+                    'task_id': batch_id,
+                    'cleaned_documents': cleaned_documents,
                     'sentiment_results': sentiment_results,
                     'categorization_results': categorization_results,
                     'insights': insights,
                     'recommendations': recommendations
-                }
+                },
+                unpack_input=True
             )
             
-            # Calculate summary statistics
-            result.processed_documents = len(documents)
+            # Per-document results leave the pipeline as the public models
+            result.sentiment_results = to_models(sentiment_results)
+            result.categorization_results = to_models(categorization_results)
+            
+            # Calculate summary statistics; a document is processed once it
+            # has both a sentiment and a category
+            processed_ids = (
+                {r.document_id for r in sentiment_results} & {r.document_id for r in categorization_results}
+            )
+            result.processed_documents = len(processed_ids)
+            result.failed_documents = len(dead_letters.failed_ids() - processed_ids)
+            result.dead_letter_path = self._write_dead_letters(dead_letters, batch_id)
+            result.budget_overruns = overruns.to_dicts()
             result.sentiment_distribution = self._calculate_sentiment_distribution(sentiment_results)
             result.category_distribution = self._calculate_category_distribution(categorization_results)
             result.processing_time_seconds = (datetime.now() - start_time).total_seconds()
@@ -135,47 +213,109 @@ class MasterOrchestratorAgent:
         except Exception as e:
             logger.error(f"Pipeline processing failed for batch {batch_id}: {str(e)}")
             raise
+        
+        finally:
+            run_profilers.reset(profilers_token)
+            _run_batch_id.reset(batch_token)
+            if memory_profiler is not None:
+                self._write_memory_profile(memory_profiler, batch_id)
+                memory_profiler.stop()
+            if cpu_profiler is not None:
+                self._write_cpu_profile(cpu_profiler, batch_id)
     
-    async def _execute_agent_task(self, agent_name: str, task_type: str, input_data: Dict[str, Any]) -> Any:
-        """Execute a task on a specific agent"""
+    async def _execute_agent_task(
+        self,
+        agent_name: str,
+        task_type: str,
+        input_data: Dict[str, Any],
+        unpack_input: bool = False
+    ) -> Any:
+        """Execute a task on a specific agent, passing input_data as keyword arguments if unpack_input"""
         if agent_name not in self.agents:
             raise ValueError(f"Agent {agent_name} not found")
         
-        task_id = f"{agent_name}_{uuid4().hex[:8]}"
-        task = AgentTask(
-            task_id=task_id,
-            agent_name=agent_name,
-            task_type=task_type,
-            input_data=input_data,
-            status=ProcessingStatus.PROCESSING,
-            started_at=datetime.now()
-        )
-        
-        self.active_tasks[task_id] = task
+        task = self.tasks.start(agent_name, task_type, input_data, _run_batch_id.get())
         
         try:
             agent = self.agents[agent_name]
             
             # Execute the task based on task type
             if hasattr(agent, task_type):
-                result = await getattr(agent, task_type)(input_data)
+                with profile_stage(f"{agent_name}.{task_type}", *run_profilers.get()):
+                    if unpack_input:
+                        result = await getattr(agent, task_type)(**input_data)
+                    else:
+                        result = await getattr(agent, task_type)(input_data)
             else:
                 raise ValueError(f"Task type {task_type} not supported by agent {agent_name}")
             
-            task.status = ProcessingStatus.COMPLETED
-            task.completed_at = datetime.now()
-            task.result = result
-            
-            logger.debug(f"Task {task_id} completed successfully")
-            return result
-            
-        except Exception as e:
-            task.status = ProcessingStatus.FAILED
-            task.error_message = str(e)
-            task.completed_at = datetime.now()
-            
-            logger.error(f"Task {task_id} failed: {str(e)}")
+        except BaseException as e:
+            # Cancelled tasks leave the active set as well
+            summary = self.tasks.finish(task, error=e)
+            logger.error(f"Task {task.task_id} failed after {summary.duration_seconds:.2f}s: {str(e)}")
             raise
+        
+        self.tasks.finish(task, result)
+        logger.debug(f"Task {task.task_id} completed successfully")
+        return result
+    
+    async def _replay_failed_documents(
+        self,
+        batch: Dict[str, List[Any]],
+        cleaned_documents: List[Any],
+        sentiment_results: List[Any],
+        categorization_results: List[Any]
+    ) -> None:
+        """Run retried documents through the stages from the one they failed in, adding to the batch's results"""
+        def stage(agent_name: str, task_type: str, **options: Any):
+            return lambda documents: self._execute_agent_task(
+                agent_name, task_type, {'documents': documents, **options}
+            )
+        
+        cleaned, results = await replay_stages(
+            batch,
+            stage('data_collection', 'validate_and_enrich'),
+            stage('data_cleaning', 'clean_documents', return_records=True),
+            {
+                'sentiment_analysis': stage('sentiment_analysis', 'analyze_sentiment', return_records=True),
+                'categorization': stage('categorization', 'categorize_feedback', return_records=True)
+            }
+        )
+        cleaned_documents.extend(cleaned)
+        sentiment_results.extend(results['sentiment_analysis'])
+        categorization_results.extend(results['categorization'])
+    
+    def _write_dead_letters(self, dead_letters: DeadLetterQueue, batch_id: str) -> Optional[str]:
+        """Write the documents that failed for good next to the batch's report"""
+        try:
+            path = dead_letters.write(self._report_dir() / f"{batch_id}_dead_letter.jsonl")
+            if path:
+                logger.warning(f"{len(dead_letters)} failed documents written to {path}")
+            return path
+        except Exception as e:
+            logger.error(f"Error writing dead letters: {str(e)}")
+            return None
+    
+    def _report_dir(self) -> Path:
+        """Directory the report agent writes to"""
+        report_agent = self.agents.get('report_generation')
+        return report_agent.output_dir if report_agent is not None else Path("./reports")
+    
+    def _write_memory_profile(self, profiler: MemoryProfiler, batch_id: str) -> None:
+        """Write the memory profile of a batch next to its report"""
+        try:
+            path = profiler.write(self._report_dir() / f"{batch_id}_memory_profile.json")
+            logger.info(f"Memory profile written: {path}")
+        except Exception as e:
+            logger.error(f"Error writing memory profile: {str(e)}")
+    
+    def _write_cpu_profile(self, profiler: CpuProfiler, batch_id: str) -> None:
+        """Write the CPU profile of a batch under the report directory"""
+        try:
+            files = cpu_profiling.end_run(profiler, self._report_dir() / "profiles" / batch_id)
+            logger.info(f"CPU profile written: {files['summary']}")
+        except Exception as e:
+            logger.error(f"Error writing CPU profile: {str(e)}")
     
     def _calculate_sentiment_distribution(self, sentiment_results: List[SentimentAnalysis]) -> Dict[str, int]:
         """Calculate distribution of sentiments"""
@@ -252,7 +392,9 @@ class MasterOrchestratorAgent:
         """Get status of all agents"""
         status = {
             'orchestrator_id': self.agent_id,
-            'active_tasks': len(self.active_tasks),
+            'active_tasks': len(self.tasks.active),
+            'task_history': self.tasks.stats(),
+            'admission': self.admission.status(),
             'agents': {}
         }
         
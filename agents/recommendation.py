@@ -11,6 +11,7 @@ from collections import defaultdict, Counter
 from models.feedback_models import (
     InsightData, Recommendation, FeedbackCategory, SentimentType
 )
+from utils.execution import agent_execution
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -213,28 +214,31 @@ class RecommendationAgent:
         logger.info(f"Generating recommendations from {len(insights)} insights")
         
         try:
-            recommendations = []
+            recommendations = await agent_execution.run(self.recommend, insights)
             
-            # Process each insight and generate recommendations
-            for insight in insights:
-                try:
-                    insight_recommendations = await self._generate_insight_recommendations(insight)
-                    recommendations.extend(insight_recommendations)
-                except Exception as e:
-                    logger.error(f"Error generating recommendations for insight: {str(e)}")
-                    continue
-            
-            # Filter and prioritize recommendations
-            filtered_recommendations = self._filter_recommendations(recommendations)
-            
-            logger.info(f"Generated {len(filtered_recommendations)} recommendations")
-            return filtered_recommendations
+            logger.info(f"Generated {len(recommendations)} recommendations")
+            return recommendations
             
         except Exception as e:
             logger.error(f"Error in generate_recommendations: {str(e)}")
             return []
     
-    async def _generate_insight_recommendations(
+    def recommend(self, insights: List[InsightData]) -> List[Recommendation]:
+        """Filtered recommendations for insights; the synchronous core of generate_recommendations"""
+        recommendations = []
+        
+        # Process each insight and generate recommendations
+        for insight in insights:
+            try:
+                recommendations.extend(self._generate_insight_recommendations(insight))
+            except Exception as e:
+                logger.error(f"Error generating recommendations for insight: {str(e)}")
+                continue
+        
+        # Filter and prioritize recommendations
+        return self._filter_recommendations(recommendations)
+    
+    def _generate_insight_recommendations(
         self, 
         insight: InsightData
     ) -> List[Recommendation]:
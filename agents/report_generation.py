@@ -14,7 +14,9 @@ from models.feedback_models import (
     CleanedDocument, SentimentAnalysis, CategoryResult, 
     InsightData, Recommendation, ProcessingStatus, ProcessingResult
 )
+from utils.execution import agent_execution
 from utils.logger import setup_logger
+from utils.profiling import profile_stage, run_profilers
 
 logger = setup_logger(__name__)
 
@@ -83,26 +85,32 @@ class ReportGenerationAgent:
         
         try:
             logger.info(f"Generating report for task {task_id}")
+            # The steps are stages of the run's memory profile, if it has one
+            memory_profiler = run_profilers.get()[0]
             
             # Prepare report data
-            report_data = await self._prepare_report_data(
-                cleaned_documents=cleaned_documents,
-                sentiment_results=sentiment_results,
-                categorization_results=categorization_results,
-                insights=insights,
-                recommendations=recommendations,
-                task_id=task_id
-            )
+            with profile_stage("prepare_report_data", memory_profiler):
+                report_data = await agent_execution.run(
+                    self._prepare_report_data,
+                    cleaned_documents=cleaned_documents,
+                    sentiment_results=sentiment_results,
+                    categorization_results=categorization_results,
+                    insights=insights,
+                    recommendations=recommendations,
+                    task_id=task_id
+                )
             
             # Generate the requested report formats
             generated_files = {}
             
             if output_format in ['html', 'all']:
-                html_report = await self._generate_html_report(report_data, task_id)
+                with profile_stage("html_report", memory_profiler):
+                    html_report = await agent_execution.run(self._generate_html_report, report_data, task_id)
                 generated_files['html'] = html_report
             
             if output_format in ['json', 'all']:
-                json_report = await self._generate_json_report(report_data, task_id)
+                with profile_stage("json_report", memory_profiler):
+                    json_report = await agent_execution.run(self._generate_json_report, report_data, task_id)
                 generated_files['json'] = json_report
             
             # Calculate processing time
@@ -129,7 +137,7 @@ class ReportGenerationAgent:
                 "message": error_msg
             }
     
-    async def _prepare_report_data(
+    def _prepare_report_data(
         self,
         cleaned_documents: List[CleanedDocument],
         sentiment_results: List[SentimentAnalysis],
@@ -299,7 +307,7 @@ class ReportGenerationAgent:
             "avg_primary_category_probability": avg_primary_prob
         }
     
-    async def _generate_html_report(
+    def _generate_html_report(
         self, 
         report_data: Dict[str, Any],
         task_id: str
@@ -552,7 +560,7 @@ class ReportGenerationAgent:
             
         return "\n".join(html_parts)
     
-    async def _generate_json_report(
+    def _generate_json_report(
         self, 
         report_data: Dict[str, Any],
         task_id: str
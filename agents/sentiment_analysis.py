@@ -5,22 +5,79 @@ Sentiment Analysis Agent - Performs advanced sentiment analysis on feedback docu
 import asyncio
 import logging
 import re
+import time
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 from collections import Counter
 
+from agents.sentiment_backends import (
+    BackendScore, LexiconSentimentBackend, SentimentBackend, TransformerSentimentBackend
+)
 from models.feedback_models import CleanedDocument, SentimentAnalysis, SentimentType
+from models.records import SentimentRecord
+from utils.dead_letter import record_failure
+from utils.execution import agent_execution
+from utils.guardrails import LengthGuardrails
 from utils.logger import setup_logger
+from utils.proximity import ProximityMatcher
+from utils.sentence_cache import SentenceScoreCache
+from utils.text_profile import TextProfile, vocabulary
 
 logger = setup_logger(__name__)
 
+# Scoring backends, see agents.sentiment_backends
+SENTIMENT_BACKENDS = ('lexicon', 'transformer')
+
 class SentimentAnalysisAgent:
     """
     Sentiment Analysis Agent responsible for analyzing emotional tone and sentiment
     in specialist feedback using advanced NLP techniques.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        backend: str = "lexicon",
+        model_dir: Optional[str] = None,
+        model_threads: Optional[int] = None,
+        token_budget: int = 8192,
+        cascade: bool = False,
+        escalation_confidence: float = 0.05,
+        neutral_margin: float = 0.1,
+        sentence_level: bool = False,
+        sentence_cache_size: int = 100_000,
+        segment_chars: int = 0,
+        time_budget_seconds: float = 0.0,
+        pattern_window: int = 0
+    ):
+        """
+        Args:
+            backend: 'lexicon' scores with the heuristics below, 'transformer'
+                with the model in model_dir, falling back to the heuristics
+                if it cannot be loaded or fails on a batch
+            model_dir: Local model directory for the transformer backend
+            model_threads: Intra-op threads for model inference
+            token_budget: Padded tokens per model inference batch
+            cascade: Score with the lexicon alone and escalate to the backend
+                only documents whose lexicon result is uncertain
+            escalation_confidence: Lexicon confidence below which a document
+                is escalated
+            neutral_margin: Lexicon scores within this distance of the
+                neutral band are escalated
+            sentence_level: Assemble context scores from per-sentence scores
+                cached across documents and batches, and report each
+                sentence's contribution
+            sentence_cache_size: Sentences kept in that cache
+            segment_chars: Score the heuristics of longer documents in
+                windows of this many characters; 0 scores documents whole
+            time_budget_seconds: Time after which no further window of a
+                document is scored (see utils.guardrails); 0 sets no budget
+            pattern_window: Most tokens a linguistic pattern match may span;
+                0 allows the whole sentence
+        """
+        if backend not in SENTIMENT_BACKENDS:
+            raise ValueError(f"backend must be one of {', '.join(SENTIMENT_BACKENDS)}")
+        if backend == 'transformer' and not model_dir:
+            raise ValueError("The transformer backend needs a model_dir")
         self.agent_id = "sentiment_analysis_agent"
         
         # Sentiment lexicons
@@ -62,64 +119,283 @@ class SentimentAnalysisAgent:
         
         self.negators = {'not', 'no', 'never', 'none', 'nothing', 'neither', 'nor'}
         
+        # Linguistic patterns: keyword groups that occur in this order within
+        # a sentence (see utils.proximity)
+        self.positive_patterns = [
+            r'\b(?:recommend|suggest|advise)\b.*\b(?:highly|strongly)\b',
+            r'\b(?:excellent|outstanding|exceptional)\b.*\b(?:work|job|performance)\b',
+            r'\b(?:very|extremely)\b.*\b(?:pleased|satisfied|impressed)\b',
+            r'\b(?:significant|substantial)\b.*\b(?:improvement|progress|enhancement)\b',
+            r'\b(?:well|effectively|efficiently)\b.*\b(?:implemented|executed|managed)\b'
+        ]
+        
+        self.negative_patterns = [
+            r'\b(?:major|serious|significant)\b.*\b(?:issue|problem|concern)\b',
+            r'\b(?:failed|failure)\b.*\b(?:to|in)\b',
+            r'\b(?:lack|lacking|absence)\b.*\b(?:of|in)\b',
+            r'\b(?:disappointed|frustrated|concerned)\b.*\b(?:with|about)\b',
+            r'\b(?:needs|requires)\b.*\b(?:immediate|urgent)\b.*\b(?:attention|action)\b'
+        ]
+        
+        # Neutral/informational patterns only add to the pattern count
+        self.neutral_patterns = [
+            r'\b(?:according|based)\b.*\b(?:to|on)\b',
+            r'\b(?:data|statistics|metrics)\b.*\b(?:show|indicate|suggest)\b',
+            r'\b(?:process|procedure|method)\b.*\b(?:involves|includes|requires)\b'
+        ]
+        
+        self.pattern_matcher = ProximityMatcher(
+            self.positive_patterns + self.negative_patterns + self.neutral_patterns, pattern_window
+        )
+        self.pattern_weights = (
+            [0.8] * len(self.positive_patterns)
+            + [-0.8] * len(self.negative_patterns)
+            + [0.0] * len(self.neutral_patterns)
+        )
+        
+        # Lexicons as token ids, for scoring straight from a document's text profile
+        self.positive_ids = vocabulary.ids_for(self.positive_words)
+        self.negative_ids = vocabulary.ids_for(self.negative_words)
+        self.neutral_ids = vocabulary.ids_for(self.neutral_words)
+        self.negator_ids = vocabulary.ids_for(self.negators)
+        self.intensifier_ids = {
+            vocabulary.intern(word): factor for word, factor in self.intensifiers.items()
+        }
+        
+        # The heuristics are always available; backend is replaced by the
+        # model once load_backend() succeeds
+        self.backend_name = backend
+        self.lexicon_backend = LexiconSentimentBackend(self)
+        self.backend: SentimentBackend = self.lexicon_backend
+        self.model_backend: Optional[TransformerSentimentBackend] = (
+            TransformerSentimentBackend(model_dir, token_budget=token_budget, threads=model_threads)
+            if backend == 'transformer' else None
+        )
+        
+        # Scores within +-neutral_band are neutral
+        self.neutral_band = 0.1
+        
+        # Cascade: cheap lexicon scoring first, the backend only when uncertain
+        self.cascade = cascade
+        self.escalation_confidence = escalation_confidence
+        self.neutral_margin = neutral_margin
+        self.cascade_stats = {'documents': 0, 'escalated': 0, 'lexicon_seconds': 0.0, 'escalated_seconds': 0.0}
+        
+        # Sentence-level scoring, sharing sentence scores across documents
+        self.sentence_level = sentence_level
+        self.sentence_cache = SentenceScoreCache(sentence_cache_size)
+        
+        # Windowed scoring of oversized documents
+        self.guardrails = LengthGuardrails(segment_chars, time_budget_seconds)
+        
     async def initialize(self):
         """Initialize the sentiment analysis agent"""
         logger.info(f"Initializing {self.agent_id}")
-        # In a real implementation, you might load pre-trained models here
+        self.load_backend()
+    
+    def load_backend(self) -> None:
+        """Load the configured model backend once; the heuristics stay in use if it cannot be loaded"""
+        if self.model_backend is None or self.backend is self.model_backend:
+            return
+        try:
+            self.model_backend.load()
+            self.backend = self.model_backend
+            logger.info(f"Loaded sentiment model {self.model_backend.model_dir}")
+        except Exception as e:
+            logger.error(f"Error loading sentiment model {self.model_backend.model_dir}, using the lexicon backend: {str(e)}")
         
     async def analyze_sentiment(self, input_data: Dict[str, Any]) -> List[SentimentAnalysis]:
         """
-        Analyze sentiment for a batch of cleaned documents
+        Analyze sentiment for a batch of cleaned documents.
+        Returns SentimentRecord objects instead of models when input_data
+        sets 'return_records' (used between pipeline stages).
         """
         documents = input_data.get('documents', [])
-        sentiment_results = []
+        return_records = input_data.get('return_records', False)
         
         logger.info(f"Analyzing sentiment for {len(documents)} documents")
         
-        for doc in documents:
+        # A model backend scores the batch at once; slicing would only shrink its batches
+        sentiment_results = await agent_execution.map_slices(
+            self.analyze_batch, documents, return_records, whole=self.backend is not self.lexicon_backend
+        )
+        
+        logger.info(f"Successfully analyzed sentiment for {len(sentiment_results)} documents")
+        return sentiment_results
+    
+    def analyze_batch(self, documents: List[CleanedDocument], return_records: bool = False) -> List[SentimentAnalysis]:
+        """Sentiment of a batch of cleaned documents; the synchronous core of analyze_sentiment"""
+        sentiment_results = []
+        
+        model_scores = self._cascade_scores(documents) if self.cascade else self._model_scores(documents)
+        
+        for index, doc in enumerate(documents):
             try:
-                sentiment_result = await self._analyze_single_document(doc)
-                sentiment_results.append(sentiment_result)
+                sentiment_result = self._analyze_single_document(
+                    doc, model_scores[index] if model_scores is not None else None
+                )
+                sentiment_results.append(sentiment_result if return_records else sentiment_result.to_model())
                 logger.debug(f"Sentiment analysis completed for document {doc.original_id}")
                 
             except Exception as e:
                 logger.error(f"Error analyzing sentiment for document {doc.original_id}: {str(e)}")
+                record_failure('sentiment_analysis', doc, e)
                 continue
         
-        logger.info(f"Successfully analyzed sentiment for {len(sentiment_results)} documents")
         return sentiment_results
     
-    async def _analyze_single_document(self, doc: CleanedDocument) -> SentimentAnalysis:
-        """Analyze sentiment for a single document"""
+    def _model_scores(self, documents: List[CleanedDocument]) -> Optional[List[BackendScore]]:
+        """Scores of a whole batch from the model backend, or None to score each document with the heuristics"""
+        if self.backend is self.lexicon_backend or not documents:
+            return None
+        try:
+            return self.backend.score_documents(documents)
+        except Exception as e:
+            logger.error(f"Error scoring batch with the {self.backend.name} backend, using the lexicon backend: {str(e)}")
+            return None
+    
+    def _cascade_scores(self, documents: List[CleanedDocument]) -> List[Optional[BackendScore]]:
+        """
+        Lexicon scores of the documents it is confident about, backend scores
+        of the rest. None leaves a document to be scored individually.
+        """
+        scores: List[Optional[BackendScore]] = [None] * len(documents)
+        escalated = []
         
-        content = doc.cleaned_content.lower()
+        start = time.perf_counter()
+        for index, doc in enumerate(documents):
+            try:
+                score, confidence = self._lexicon_based_analysis(doc.cleaned_content.lower(), doc.text_profile)
+            except Exception as e:
+                logger.error(f"Error in lexicon scoring of document {doc.original_id}: {str(e)}")
+                escalated.append(index)
+                continue
+            score = max(-1.0, min(1.0, score))
+            if self._is_uncertain(score, confidence):
+                escalated.append(index)
+            else:
+                scores[index] = BackendScore(score, confidence, {
+                    'lexicon_score': score,
+                    'lexicon_confidence': confidence,
+                    'cascade_tier': 1.0
+                })
+        lexicon_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        escalated_docs = [documents[index] for index in escalated]
+        escalated_scores = self._model_scores(escalated_docs)
+        for position, index in enumerate(escalated):
+            if escalated_scores is not None:
+                score = escalated_scores[position]
+            else:
+                try:
+                    score = self.lexicon_backend.score(documents[index])
+                except Exception:
+                    # Left to the per-document loop, which logs it
+                    continue
+            score.breakdown['cascade_tier'] = 2.0
+            scores[index] = score
+        escalated_seconds = time.perf_counter() - start
+        
+        stats = self.cascade_stats
+        stats['documents'] += len(documents)
+        stats['escalated'] += len(escalated)
+        stats['lexicon_seconds'] += lexicon_seconds
+        stats['escalated_seconds'] += escalated_seconds
+        logger.debug(
+            f"Cascade escalated {len(escalated)} of {len(documents)} documents to the {self.backend.name} backend "
+            f"(lexicon {lexicon_seconds:.3f}s, escalated {escalated_seconds:.3f}s)"
+        )
+        return scores
+    
+    def _is_uncertain(self, score: float, confidence: float) -> bool:
+        """Lexicon results that are weakly supported or close to the neutral band"""
+        return confidence < self.escalation_confidence or abs(score) <= self.neutral_band + self.neutral_margin
+    
+    def cascade_metrics(self) -> Dict[str, Any]:
+        """Escalation rate and per-tier latency of the cascade so far"""
+        stats = self.cascade_stats
+        documents, escalated = stats['documents'], stats['escalated']
+        return {
+            'documents': documents,
+            'escalated': escalated,
+            'escalated_to': self.backend.name,
+            'escalation_rate': escalated / documents if documents else 0.0,
+            'lexicon_ms_per_doc': stats['lexicon_seconds'] / documents * 1000 if documents else 0.0,
+            'escalated_ms_per_doc': stats['escalated_seconds'] / escalated * 1000 if escalated else 0.0
+        }
+    
+    def _analyze_single_document(
+        self,
+        doc: CleanedDocument,
+        backend_score: Optional[BackendScore] = None
+    ) -> SentimentRecord:
+        """Analyze sentiment for a single document, given its batch's model score if there is one"""
+        
+        if backend_score is None:
+            backend_score = self.lexicon_backend.score(doc)
+        overall_score = backend_score.score
+        overall_confidence = backend_score.confidence
+        
+        # Determine sentiment type
+        sentiment_type = self._score_to_sentiment_type(overall_score)
         
-        # Step 1: Lexicon-based sentiment scoring
-        lexicon_score, lexicon_confidence = self._lexicon_based_analysis(content)
+        # Extract key phrases and emotional indicators
+        key_phrases = self._extract_key_phrases(doc.cleaned_content)
+        emotional_indicators = self._extract_emotional_indicators(doc.cleaned_content)
         
-        # Step 2: Pattern-based sentiment analysis
-        pattern_score, pattern_confidence = self._pattern_based_analysis(content)
+        return SentimentRecord(
+            document_id=doc.original_id,
+            overall_sentiment=sentiment_type,
+            sentiment_score=round(overall_score, 3),
+            confidence=round(overall_confidence, 3),
+            sentiment_breakdown=backend_score.breakdown,
+            sentence_contributions=backend_score.sentence_contributions,
+            key_phrases=key_phrases,
+            emotional_indicators=emotional_indicators
+        )
+    
+    def _heuristic_score(self, doc: CleanedDocument) -> BackendScore:
+        """Combine the lexicon, pattern and context scores of a document"""
         
-        # Step 3: Context-aware sentiment analysis
-        context_score, context_confidence = self._context_aware_analysis(content)
+        content = doc.cleaned_content.lower()
+        if self.guardrails.segments(content):
+            sentiment_breakdown, sentence_contributions = self._segmented_scores(doc, content)
+        else:
+            sentiment_breakdown, sentence_contributions = self._component_scores(content, doc.text_profile)
         
-        # Step 4: Combine scores with weighted average
+        # Combine scores with weighted average
         weights = [0.4, 0.3, 0.3]  # lexicon, pattern, context
-        confidences = [lexicon_confidence, pattern_confidence, context_confidence]
-        scores = [lexicon_score, pattern_score, context_score]
+        confidences = [sentiment_breakdown[key] for key in ('lexicon_confidence', 'pattern_confidence', 'context_confidence')]
+        scores = [sentiment_breakdown[key] for key in ('lexicon_score', 'pattern_score', 'context_score')]
         
-        # Weighted average
-        overall_score = sum(w * s for w, s in zip(weights, scores))
+        # Weighted average; intensifiers can push the lexicon score past -1..1
+        overall_score = max(-1.0, min(1.0, sum(w * s for w, s in zip(weights, scores))))
         overall_confidence = sum(w * c for w, c in zip(weights, confidences))
         
-        # Step 5: Determine sentiment type
-        sentiment_type = self._score_to_sentiment_type(overall_score)
+        return BackendScore(overall_score, overall_confidence, sentiment_breakdown, sentence_contributions)
+    
+    def _component_scores(
+        self,
+        content: str,
+        profile: Optional[TextProfile] = None
+    ) -> Tuple[Dict[str, float], List[float]]:
+        """Lexicon, pattern and context scores and confidences of lowercased content, and its sentence contributions"""
         
-        # Step 6: Extract key phrases and emotional indicators
-        key_phrases = self._extract_key_phrases(doc.cleaned_content)
-        emotional_indicators = self._extract_emotional_indicators(doc.cleaned_content)
+        # Step 1: Lexicon-based sentiment scoring
+        lexicon_score, lexicon_confidence = self._lexicon_based_analysis(content, profile)
+        
+        # Step 2: Pattern-based sentiment analysis
+        pattern_score, pattern_confidence = self._pattern_based_analysis(content, profile)
+        
+        # Step 3: Context-aware sentiment analysis
+        sentence_contributions = []
+        if self.sentence_level:
+            context_score, context_confidence, sentence_contributions = self._sentence_level_analysis(content, profile)
+        else:
+            context_score, context_confidence = self._context_aware_analysis(content, profile)
         
-        # Step 7: Create sentiment breakdown
+        # Step 4: Create sentiment breakdown
         sentiment_breakdown = {
             'lexicon_score': lexicon_score,
             'pattern_score': pattern_score,
@@ -129,20 +405,34 @@ class SentimentAnalysisAgent:
             'context_confidence': context_confidence
         }
         
-        return SentimentAnalysis(
-            document_id=doc.original_id,
-            overall_sentiment=sentiment_type,
-            sentiment_score=round(overall_score, 3),
-            confidence=round(overall_confidence, 3),
-            sentiment_breakdown=sentiment_breakdown,
-            key_phrases=key_phrases,
-            emotional_indicators=emotional_indicators
-        )
+        return sentiment_breakdown, sentence_contributions
     
-    def _lexicon_based_analysis(self, content: str) -> Tuple[float, float]:
+    def _segmented_scores(self, doc: CleanedDocument, content: str) -> Tuple[Dict[str, float], List[float]]:
+        """
+        Component scores of an oversized document, scored window by window
+        and averaged weighted by window length. Windows skipped on the time
+        budget are left out.
+        """
+        window_results = [
+            (len(window), *self._component_scores(window, TextProfile.from_text(window)))
+            for window in self.guardrails.windows('sentiment_analysis', doc, content)
+        ]
+        scored_chars = sum(length for length, _, _ in window_results)
+        
+        sentiment_breakdown: Dict[str, float] = {}
+        sentence_contributions: List[float] = []
+        for length, breakdown, contributions in window_results:
+            weight = length / scored_chars
+            for key, value in breakdown.items():
+                sentiment_breakdown[key] = sentiment_breakdown.get(key, 0.0) + weight * value
+            sentence_contributions.extend(contribution * weight for contribution in contributions)
+        
+        return sentiment_breakdown, sentence_contributions
+    
+    def _lexicon_based_analysis(self, content: str, profile: Optional[TextProfile] = None) -> Tuple[float, float]:
         """Perform lexicon-based sentiment analysis"""
         
-        words = re.findall(r'\b\w+\b', content)
+        words = (profile or TextProfile.from_text(content)).token_ids
         if not words:
             return 0.0, 0.0
         
@@ -157,26 +447,26 @@ class SentimentAnalysisAgent:
             
             # Check for negation
             negated = False
-            if i > 0 and words[i-1] in self.negators:
+            if i > 0 and words[i-1] in self.negator_ids:
                 negated = True
             
             # Check for intensifiers
             intensity = 1.0
-            if i > 0 and words[i-1] in self.intensifiers:
-                intensity = self.intensifiers[words[i-1]]
+            if i > 0 and words[i-1] in self.intensifier_ids:
+                intensity = self.intensifier_ids[words[i-1]]
             
             # Score the word
-            if word in self.positive_words:
+            if word in self.positive_ids:
                 score = intensity * (1 if not negated else -1)
                 positive_count += max(0, score)
                 negative_count += max(0, -score)
                 total_sentiment_words += 1
-            elif word in self.negative_words:
+            elif word in self.negative_ids:
                 score = intensity * (-1 if not negated else 1)
                 positive_count += max(0, score)
                 negative_count += max(0, -score)
                 total_sentiment_words += 1
-            elif word in self.neutral_words:
+            elif word in self.neutral_ids:
                 neutral_count += 1
                 total_sentiment_words += 1
             
@@ -193,49 +483,15 @@ class SentimentAnalysisAgent:
         
         return sentiment_score, confidence
     
-    def _pattern_based_analysis(self, content: str) -> Tuple[float, float]:
-        """Analyze sentiment based on linguistic patterns"""
+    def _pattern_based_analysis(self, content: str, profile: Optional[TextProfile] = None) -> Tuple[float, float]:
+        """Analyze sentiment based on linguistic patterns, counted per sentence"""
         
         score = 0.0
         pattern_count = 0
         
-        # Positive patterns
-        positive_patterns = [
-            r'\b(?:recommend|suggest|advise)\b.*\b(?:highly|strongly)\b',
-            r'\b(?:excellent|outstanding|exceptional)\b.*\b(?:work|job|performance)\b',
-            r'\b(?:very|extremely)\b.*\b(?:pleased|satisfied|impressed)\b',
-            r'\b(?:significant|substantial)\b.*\b(?:improvement|progress|enhancement)\b',
-            r'\b(?:well|effectively|efficiently)\b.*\b(?:implemented|executed|managed)\b'
-        ]
-        
-        for pattern in positive_patterns:
-            matches = len(re.findall(pattern, content, re.IGNORECASE))
-            score += matches * 0.8
-            pattern_count += matches
-        
-        # Negative patterns
-        negative_patterns = [
-            r'\b(?:major|serious|significant)\b.*\b(?:issue|problem|concern)\b',
-            r'\b(?:failed|failure)\b.*\b(?:to|in)\b',
-            r'\b(?:lack|lacking|absence)\b.*\b(?:of|in)\b',
-            r'\b(?:disappointed|frustrated|concerned)\b.*\b(?:with|about)\b',
-            r'\b(?:needs|requires)\b.*\b(?:immediate|urgent)\b.*\b(?:attention|action)\b'
-        ]
-        
-        for pattern in negative_patterns:
-            matches = len(re.findall(pattern, content, re.IGNORECASE))
-            score -= matches * 0.8
-            pattern_count += matches
-        
-        # Neutral/informational patterns
-        neutral_patterns = [
-            r'\b(?:according|based)\b.*\b(?:to|on)\b',
-            r'\b(?:data|statistics|metrics)\b.*\b(?:show|indicate|suggest)\b',
-            r'\b(?:process|procedure|method)\b.*\b(?:involves|includes|requires)\b'
-        ]
-        
-        for pattern in neutral_patterns:
-            matches = len(re.findall(pattern, content, re.IGNORECASE))
+        counts = self.pattern_matcher.counts(profile or TextProfile.from_text(content))
+        for matches, weight in zip(counts, self.pattern_weights):
+            score += matches * weight
             pattern_count += matches
         
         # Normalize score
@@ -247,49 +503,17 @@ class SentimentAnalysisAgent:
         
         return max(-1.0, min(1.0, score)), confidence
     
-    def _context_aware_analysis(self, content: str) -> Tuple[float, float]:
+    def _context_aware_analysis(self, content: str, profile: Optional[TextProfile] = None) -> Tuple[float, float]:
         """Perform context-aware sentiment analysis"""
         
-        sentences = re.split(r'[.!?]+', content)
+        sentences = (profile or TextProfile.from_text(content)).sentence_texts(content)
         sentence_scores = []
         
         for sentence in sentences:
             sentence = sentence.strip()
             if len(sentence) < 5:
                 continue
-            
-            # Analyze sentence structure and context
-            sentence_score = 0.0
-            
-            # Question vs statement analysis
-            if sentence.endswith('?'):
-                sentence_score -= 0.1  # Questions often indicate uncertainty/problems
-            
-            # Conditional statements
-            if re.search(r'\b(?:if|unless|provided|assuming)\b', sentence):
-                sentence_score -= 0.2  # Conditional statements indicate uncertainty
-            
-            # Comparative statements
-            if re.search(r'\b(?:better|worse|more|less|compared|versus)\b', sentence):
-                # Determine if comparison is positive or negative
-                if re.search(r'\b(?:better|more|improved|enhanced)\b', sentence):
-                    sentence_score += 0.3
-                elif re.search(r'\b(?:worse|less|declined|degraded)\b', sentence):
-                    sentence_score -= 0.3
-            
-            # Temporal context
-            if re.search(r'\b(?:previously|before|used to)\b', sentence):
-                sentence_score -= 0.1  # Past issues
-            elif re.search(r'\b(?:now|currently|recently)\b', sentence):
-                sentence_score += 0.1  # Current improvements
-            
-            # Certainty indicators
-            if re.search(r'\b(?:clearly|obviously|definitely|certainly)\b', sentence):
-                sentence_score += 0.2  # High certainty
-            elif re.search(r'\b(?:maybe|perhaps|possibly|might)\b', sentence):
-                sentence_score -= 0.1  # Low certainty
-            
-            sentence_scores.append(sentence_score)
+            sentence_scores.append(self._sentence_context_score(sentence))
         
         if not sentence_scores:
             return 0.0, 0.0
@@ -300,14 +524,80 @@ class SentimentAnalysisAgent:
         
         return max(-1.0, min(1.0, context_score)), confidence
     
+    def _sentence_level_analysis(
+        self,
+        content: str,
+        profile: Optional[TextProfile] = None
+    ) -> Tuple[float, float, List[float]]:
+        """
+        Context-aware analysis assembled from cached sentence scores. Also
+        returns each sentence's contribution to the (unclamped) context
+        score, 0.0 for sentences too short to score.
+        """
+        
+        cache = self.sentence_cache
+        sentence_scores: List[Optional[float]] = []
+        for sentence in (profile or TextProfile.from_text(content)).sentence_texts(content):
+            # The same string _context_aware_analysis scores, so cached scores match it
+            sentence = sentence.strip()
+            if len(sentence) < 5:
+                sentence_scores.append(None)
+            else:
+                sentence_scores.append(cache.score(sentence, self._sentence_context_score))
+        
+        scored = [score for score in sentence_scores if score is not None]
+        if not scored:
+            return 0.0, 0.0, [0.0] * len(sentence_scores)
+        
+        contributions = [score / len(scored) if score is not None else 0.0 for score in sentence_scores]
+        context_score = sum(scored) / len(scored)
+        confidence = min(len(scored) / 5, 1.0)  # Max confidence at 5 sentences
+        
+        return max(-1.0, min(1.0, context_score)), confidence, contributions
+    
+    def _sentence_context_score(self, sentence: str) -> float:
+        """Score one stripped, lowercased sentence from its structure and context"""
+        
+        sentence_score = 0.0
+        
+        # Question vs statement analysis
+        if sentence.endswith('?'):
+            sentence_score -= 0.1  # Questions often indicate uncertainty/problems
+        
+        # Conditional statements
+        if re.search(r'\b(?:if|unless|provided|assuming)\b', sentence):
+            sentence_score -= 0.2  # Conditional statements indicate uncertainty
+        
+        # Comparative statements
+        if re.search(r'\b(?:better|worse|more|less|compared|versus)\b', sentence):
+            # Determine if comparison is positive or negative
+            if re.search(r'\b(?:better|more|improved|enhanced)\b', sentence):
+                sentence_score += 0.3
+            elif re.search(r'\b(?:worse|less|declined|degraded)\b', sentence):
+                sentence_score -= 0.3
+        
+        # Temporal context
+        if re.search(r'\b(?:previously|before|used to)\b', sentence):
+            sentence_score -= 0.1  # Past issues
+        elif re.search(r'\b(?:now|currently|recently)\b', sentence):
+            sentence_score += 0.1  # Current improvements
+        
+        # Certainty indicators
+        if re.search(r'\b(?:clearly|obviously|definitely|certainly)\b', sentence):
+            sentence_score += 0.2  # High certainty
+        elif re.search(r'\b(?:maybe|perhaps|possibly|might)\b', sentence):
+            sentence_score -= 0.1  # Low certainty
+        
+        return sentence_score
+    
     def _score_to_sentiment_type(self, score: float) -> SentimentType:
         """Convert numerical score to sentiment type"""
         
-        if score > 0.1:
+        if score > self.neutral_band:
             return SentimentType.POSITIVE
-        elif score < -0.1:
+        elif score < -self.neutral_band:
             return SentimentType.NEGATIVE
-        elif abs(score) <= 0.1:
+        elif abs(score) <= self.neutral_band:
             return SentimentType.NEUTRAL
         else:
             return SentimentType.MIXED
@@ -363,6 +653,10 @@ class SentimentAnalysisAgent:
         return {
             'agent_id': self.agent_id,
             'status': 'active',
+            'backend': self.backend.describe(),
+            'cascade': self.cascade_metrics() if self.cascade else None,
+            'sentence_cache': self.sentence_cache.stats() if self.sentence_level else None,
+            'guardrails': self.guardrails.status(),
             'lexicon_stats': {
                 'positive_words': len(self.positive_words),
                 'negative_words': len(self.negative_words),
@@ -0,0 +1,217 @@
+"""
+Sentiment scoring backends for SentimentAnalysisAgent.
+
+The lexicon backend is the agent's own heuristic (lexicon, pattern and
+context scores) and needs nothing beyond the standard library. The
+transformer backend runs a sequence classification model from a local
+directory on CPU; torch and transformers are imported only when it is
+loaded. Long documents are split into windows of the model's maximum
+length, and windows are grouped into length-sorted batches whose padded
+size stays within a token budget, so short feedback is not padded to the
+length of the longest report in the batch.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from agents.sentiment_analysis import SentimentAnalysisAgent
+    from models.feedback_models import CleanedDocument
+
+
+@dataclass(slots=True)
+class BackendScore:
+    """
+    Sentiment of one document: score in -1..1, confidence in 0..1, and
+    optionally the contribution of each sentence
+    """
+    score: float
+    confidence: float
+    breakdown: Dict[str, float] = field(default_factory=dict)
+    sentence_contributions: List[float] = field(default_factory=list)
+
+
+class SentimentBackend(ABC):
+    """Scores batches of cleaned documents; subclasses implement score_documents"""
+
+    name = "base"
+
+    def load(self) -> None:
+        """Load models or other resources; called once before scoring"""
+
+    @abstractmethod
+    def score_documents(self, documents: Sequence['CleanedDocument']) -> List[BackendScore]:
+        """Score of each document, in order"""
+
+    def describe(self) -> Dict[str, Any]:
+        return {'name': self.name}
+
+
+class LexiconSentimentBackend(SentimentBackend):
+    """The agent's lexicon, pattern and context heuristics"""
+
+    name = "lexicon"
+
+    def __init__(self, agent: 'SentimentAnalysisAgent'):
+        self.agent = agent
+
+    def score(self, doc: 'CleanedDocument') -> BackendScore:
+        return self.agent._heuristic_score(doc)
+
+    def score_documents(self, documents: Sequence['CleanedDocument']) -> List[BackendScore]:
+        return [self.score(doc) for doc in documents]
+
+
+def split_tokens(token_ids: Sequence[int], window: int, max_chunks: int) -> List[Sequence[int]]:
+    """Consecutive windows of at most window tokens, truncated after max_chunks windows"""
+    if len(token_ids) <= window:
+        return [token_ids]
+    return [token_ids[start:start + window] for start in range(0, len(token_ids), window)][:max_chunks]
+
+
+def plan_batches(lengths: Sequence[int], token_budget: int, max_batch_size: int = 64) -> List[List[int]]:
+    """
+    Group sequence indices by ascending length so that each batch, padded to
+    its longest sequence, holds at most token_budget tokens. A sequence
+    longer than the budget gets a batch of its own.
+    """
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sorted ascending, so the new sequence sets the padded length
+        if batch and ((len(batch) + 1) * lengths[index] > token_budget or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def label_signs(id2label: Dict[int, str]) -> np.ndarray:
+    """Polarity of each model label: -1 negative, 0 neutral, 1 positive"""
+    names = [id2label[index].lower() for index in sorted(id2label)]
+    signs = []
+    for name in names:
+        if 'neg' in name:
+            signs.append(-1.0)
+        elif 'pos' in name:
+            signs.append(1.0)
+        elif 'neu' in name:
+            signs.append(0.0)
+        else:
+            break
+    else:
+        return np.array(signs)
+    # Generic LABEL_n names: assume the usual negative..positive order
+    if len(names) == 2:
+        return np.array([-1.0, 1.0])
+    if len(names) == 3:
+        return np.array([-1.0, 0.0, 1.0])
+    raise ValueError(f"Cannot map model labels {names} to sentiment polarity")
+
+
+class TransformerSentimentBackend(SentimentBackend):
+    """Sequence classification model from a local directory, run on CPU"""
+
+    name = "transformer"
+
+    def __init__(
+        self,
+        model_dir: str,
+        token_budget: int = 8192,
+        max_length: int = 512,
+        max_chunks: int = 8,
+        threads: Optional[int] = None
+    ):
+        """
+        Args:
+            model_dir: Directory with the model and tokenizer files
+            token_budget: Padded tokens per inference batch
+            max_length: Tokens per window, including special tokens
+            max_chunks: Windows scored per document; the rest is truncated
+            threads: Intra-op threads for torch; None keeps its default
+        """
+        self.model_dir = model_dir
+        self.token_budget = token_budget
+        self.max_length = max_length
+        self.max_chunks = max_chunks
+        self.threads = threads
+        self.torch = None
+        self.tokenizer = None
+        self.model = None
+        self.signs: Optional[np.ndarray] = None
+
+    def load(self) -> None:
+        try:
+            import torch
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        except ImportError as e:
+            raise RuntimeError("The transformer sentiment backend needs torch and transformers installed") from e
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir, local_files_only=True)
+        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_dir, local_files_only=True)
+        self.model.eval()
+        self.signs = label_signs(self.model.config.id2label)
+        model_max_length = getattr(self.tokenizer, 'model_max_length', self.max_length) or self.max_length
+        self.max_length = min(self.max_length, model_max_length)
+
+    def score_documents(self, documents: Sequence['CleanedDocument']) -> List[BackendScore]:
+        return self.score_texts([doc.cleaned_content for doc in documents])
+
+    def score_texts(self, texts: Sequence[str]) -> List[BackendScore]:
+        if self.model is None:
+            raise RuntimeError("Transformer sentiment backend is not loaded")
+        tokenizer = self.tokenizer
+        window = self.max_length - tokenizer.num_special_tokens_to_add(pair=False)
+
+        # Windows of every document, remembering which document they belong to
+        owners: List[int] = []
+        windows: List[List[int]] = []
+        for index, text in enumerate(texts):
+            token_ids = tokenizer.encode(text, add_special_tokens=False, verbose=False)
+            for chunk in split_tokens(token_ids, window, self.max_chunks):
+                owners.append(index)
+                windows.append(tokenizer.build_inputs_with_special_tokens(list(chunk)))
+
+        probabilities = np.zeros((len(windows), len(self.signs)))
+        for batch in plan_batches([len(ids) for ids in windows], self.token_budget):
+            encoded = tokenizer.pad({'input_ids': [windows[i] for i in batch]}, return_tensors='pt')
+            with self.torch.inference_mode():
+                logits = self.model(**encoded).logits
+            probabilities[batch] = self.torch.softmax(logits.float(), dim=-1).numpy()
+
+        # Document probabilities: windows weighted by their length
+        weights = np.array([len(ids) for ids in windows], dtype=float)
+        owners_array = np.array(owners, dtype=np.intp)
+        totals = np.zeros((len(texts), probabilities.shape[1]))
+        np.add.at(totals, owners_array, probabilities * weights[:, None])
+        totals /= np.bincount(owners_array, weights=weights, minlength=len(texts))[:, None]
+        chunk_counts = np.bincount(owners_array, minlength=len(texts))
+
+        scores = totals @ self.signs
+        confidences = totals.max(axis=1)
+        return [
+            BackendScore(
+                score=float(score),
+                confidence=float(confidence),
+                breakdown={'model_score': float(score), 'model_confidence': float(confidence), 'model_windows': int(windows_used)}
+            )
+            for score, confidence, windows_used in zip(scores, confidences, chunk_counts)
+        ]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'model_dir': self.model_dir,
+            'loaded': self.model is not None,
+            'token_budget': self.token_budget,
+            'max_length': self.max_length,
+            'threads': self.threads
+        }
@@ -0,0 +1,134 @@
+"""
+Lifecycle of the orchestrator's agent tasks.
+
+A running task is an AgentTask whose input_data describes its payload (list
+sizes and scalar options) rather than holding it, so the registry never
+keeps a batch's documents or stage results alive. A finished task leaves
+the active set as a compact TaskSummary in a ring buffer of the most recent
+tasks, which is what the task history endpoints query.
+"""
+
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from uuid import uuid4
+
+from models.feedback_models import AgentTask, ProcessingStatus
+
+
+def describe_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Sizes of the collections and values of the scalars in a task's input"""
+    described = {}
+    for key, value in data.items():
+        if isinstance(value, (list, tuple, dict, set)):
+            described[key] = len(value)
+        elif value is None or isinstance(value, (str, int, float, bool)):
+            described[key] = value
+        else:
+            described[key] = type(value).__name__
+    return described
+
+
+@dataclass(slots=True)
+class TaskSummary:
+    """What is kept of a finished task"""
+    task_id: str
+    agent_name: str
+    task_type: str
+    batch_id: Optional[str]
+    status: str
+    started_at: datetime
+    completed_at: datetime
+    duration_seconds: float
+    input: Dict[str, Any]
+    output_count: Optional[int] = None
+    error_message: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = asdict(self)
+        summary['started_at'] = self.started_at.isoformat()
+        summary['completed_at'] = self.completed_at.isoformat()
+        return summary
+
+
+class TaskRegistry:
+    """Running agent tasks and a bounded history of finished ones"""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.active: Dict[str, AgentTask] = {}
+        self.history: Deque[TaskSummary] = deque(maxlen=capacity)
+        self.finished = 0
+        self.status_counts: Counter = Counter()
+
+    def start(self, agent_name: str, task_type: str, input_data: Dict[str, Any], batch_id: Optional[str] = None) -> AgentTask:
+        """Register a running task"""
+        task = AgentTask(
+            task_id=f"{agent_name}_{uuid4().hex[:8]}",
+            agent_name=agent_name,
+            task_type=task_type,
+            input_data=describe_payload(input_data),
+            batch_id=batch_id,
+            status=ProcessingStatus.PROCESSING,
+            started_at=datetime.now()
+        )
+        self.active[task.task_id] = task
+        return task
+
+    def finish(self, task: AgentTask, result: Any = None, error: Optional[BaseException] = None) -> TaskSummary:
+        """Move a task from the active set to the history"""
+        self.active.pop(task.task_id, None)
+        task.completed_at = datetime.now()
+        task.status = ProcessingStatus.FAILED if error is not None else ProcessingStatus.COMPLETED
+        if error is not None:
+            task.error_message = str(error) or type(error).__name__
+
+        summary = TaskSummary(
+            task_id=task.task_id,
+            agent_name=task.agent_name,
+            task_type=task.task_type,
+            batch_id=task.batch_id,
+            status=task.status.value,
+            started_at=task.started_at,
+            completed_at=task.completed_at,
+            duration_seconds=(task.completed_at - task.started_at).total_seconds(),
+            input=task.input_data,
+            output_count=len(result) if isinstance(result, (list, tuple)) else None,
+            error_message=task.error_message
+        )
+        self.history.append(summary)
+        self.finished += 1
+        self.status_counts[summary.status] += 1
+        return summary
+
+    def query(
+        self,
+        agent_name: Optional[str] = None,
+        status: Optional[str] = None,
+        batch_id: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Most recent finished tasks matching every given filter, newest first"""
+        matches = []
+        for summary in reversed(self.history):
+            if agent_name is not None and summary.agent_name != agent_name:
+                continue
+            if status is not None and summary.status != status:
+                continue
+            if batch_id is not None and summary.batch_id != batch_id:
+                continue
+            matches.append(summary.to_dict())
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'active': len(self.active),
+            'history_size': len(self.history),
+            'capacity': self.capacity,
+            'finished': self.finished,
+            'evicted': self.finished - len(self.history),
+            'by_status': dict(self.status_counts)
+        }
@@ -15,14 +15,50 @@ sys.path.append(str(Path(__file__).parent))
 
 from workflow.workflow_manager import WorkflowManager
 from utils.logger import setup_logger
+from utils.profiling import cpu_profiling
 
 logger = setup_logger(__name__)
 
 class FeedbackProcessingApp:
     """Main application class for the Feedback Processing System"""
     
-    def __init__(self):
-        self.workflow_manager = WorkflowManager()
+    def __init__(
+        self,
+        workers: int = 0,
+        profile_memory: bool = False,
+        chunk_size: int = 0,
+        checkpoint_dir: str = "./checkpoints",
+        term_history: Optional[str] = None,
+        category_scoring: str = "patterns",
+        category_model: Optional[str] = None,
+        category_model_weight: float = 0.5,
+        sentiment_backend: str = "lexicon",
+        sentiment_model: Optional[str] = None,
+        sentiment_cascade: bool = False,
+        sentiment_sentence_level: bool = False,
+        segment_chars: int = 0,
+        time_budget: float = 0.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5
+    ):
+        self.workflow_manager = WorkflowManager(
+            parallel_workers=workers,
+            profile_memory=profile_memory,
+            chunk_size=chunk_size,
+            checkpoint_dir=checkpoint_dir,
+            term_history_path=term_history,
+            category_scoring=category_scoring,
+            category_model_path=category_model,
+            category_model_weight=category_model_weight,
+            sentiment_backend=sentiment_backend,
+            sentiment_model_dir=sentiment_model,
+            sentiment_cascade=sentiment_cascade,
+            sentiment_sentence_level=sentiment_sentence_level,
+            segment_chars=segment_chars,
+            document_time_budget=time_budget,
+            max_retries=max_retries,
+            retry_backoff_seconds=retry_backoff
+        )
         self.initialized = False
     
     async def initialize(self):
@@ -42,9 +78,10 @@ class FeedbackProcessingApp:
         self, 
         file_path: str, 
         output_dir: Optional[str] = None,
-        task_id: Optional[str] = None
+        task_id: Optional[str] = None,
+        resume: bool = False
     ) -> Dict[str, Any]:
-        """Process feedback from a file"""
+        """Process feedback from a file, optionally resuming the checkpointed run task_id"""
         if not self.initialized:
             return {"status": "error", "message": "Application not initialized"}
         
@@ -61,7 +98,7 @@ class FeedbackProcessingApp:
             logger.info(f"Processing {len(input_data) if isinstance(input_data, list) else 1} feedback items from {file_path}")
             
             # Process the feedback
-            result = await self.workflow_manager.process_feedback(input_data, task_id)
+            result = await self.workflow_manager.process_feedback(input_data, task_id, resume=resume)
             
             # Save results if output directory is provided
             if output_dir:
@@ -150,6 +187,110 @@ async def main():
         help="Task ID for tracking (default: auto-generated)",
         default=None
     )
+    parser.add_argument(
+        "-w", "--workers",
+        help="Worker processes for cleaning, sentiment analysis and categorization (default: 0, in-process)",
+        type=int,
+        default=0
+    )
+    parser.add_argument(
+        "--chunk-size",
+        help="Process input in chunks of this many items, checkpointing each chunk (default: 0, no chunking)",
+        type=int,
+        default=0
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        help="Directory for chunk checkpoints (default: ./checkpoints)",
+        default="./checkpoints"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="TASK_ID",
+        help="Resume a failed chunked run, skipping the chunks it completed",
+        default=None
+    )
+    parser.add_argument(
+        "--category-scoring",
+        help="Score categories per document with regexes, or per batch with the keyword matrix (default: patterns)",
+        choices=["patterns", "matrix"],
+        default="patterns"
+    )
+    parser.add_argument(
+        "--category-model",
+        help="Trained category model artifact (see train_category_model.py) blended with the pattern scores",
+        default=None
+    )
+    parser.add_argument(
+        "--category-model-weight",
+        help="Share of the category model in the blended scores; 1.0 uses the model alone (default: 0.5)",
+        type=float,
+        default=0.5
+    )
+    parser.add_argument(
+        "--sentiment-backend",
+        help="Score sentiment with the lexicon heuristics or a local transformer model (default: lexicon)",
+        choices=["lexicon", "transformer"],
+        default="lexicon"
+    )
+    parser.add_argument(
+        "--sentiment-model",
+        help="Local model directory for the transformer sentiment backend",
+        default=None
+    )
+    parser.add_argument(
+        "--sentiment-cascade",
+        help="Score sentiment with the lexicon first and run the backend only on uncertain documents",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--sentence-level-sentiment",
+        help="Score sentiment context per sentence, caching recurring sentences, and report sentence contributions",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--segment-chars",
+        help="Score documents longer than this in windows of this many characters (default: 0, whole documents)",
+        type=int,
+        default=0
+    )
+    parser.add_argument(
+        "--time-budget",
+        metavar="SECONDS",
+        help="Stop scoring a segmented document's windows after this long per stage (default: 0, no budget)",
+        type=float,
+        default=0.0
+    )
+    parser.add_argument(
+        "--max-retries",
+        help="Retries of a document after a transient failure (default: DOCUMENT_MAX_RETRIES or 2)",
+        type=int,
+        default=int(os.getenv("DOCUMENT_MAX_RETRIES", "2"))
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        metavar="SECONDS",
+        help="Wait before the first retry pass, doubled on every pass "
+             "(default: DOCUMENT_RETRY_BACKOFF_SECONDS or 0.5)",
+        type=float,
+        default=float(os.getenv("DOCUMENT_RETRY_BACKOFF_SECONDS", "0.5"))
+    )
+    parser.add_argument(
+        "--term-history",
+        help="File keeping term frequencies across runs; emerging topics are measured against it",
+        default=None
+    )
+    parser.add_argument(
+        "--profile-memory",
+        help="Trace allocations per pipeline stage and write a memory profile next to each report",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--profile-cpu",
+        help="Profile CPU time per pipeline stage and write pstats and collapsed stacks under <reports>/profiles",
+        choices=["cprofile", "sampling", "both"],
+        default=None
+    )
     parser.add_argument(
         "--debug", 
         help="Enable debug logging",
@@ -163,7 +304,31 @@ async def main():
     setup_logger("feedback_processor", log_level=log_level)
     
     # Initialize the application
-    app = FeedbackProcessingApp()
+    if args.profile_cpu:
+        cpu_profiling.enable(args.profile_cpu)
+    
+    app = FeedbackProcessingApp(
+        workers=args.workers,
+        profile_memory=args.profile_memory,
+        chunk_size=args.chunk_size,
+        checkpoint_dir=args.checkpoint_dir,
+        term_history=args.term_history,
+        category_scoring=args.category_scoring,
+        category_model=args.category_model,
+        category_model_weight=args.category_model_weight,
+        sentiment_backend=args.sentiment_backend,
+        sentiment_model=args.sentiment_model,
+        sentiment_cascade=args.sentiment_cascade,
+        sentiment_sentence_level=args.sentence_level_sentiment,
+        segment_chars=args.segment_chars,
+        time_budget=args.time_budget,
+        max_retries=args.max_retries,
+        retry_backoff=args.retry_backoff
+    )
+    
+    # A resumed run keeps the task ID of the run it continues
+    resume = args.resume is not None
+    base_task_id = args.resume if resume else args.task_id
     if not await app.initialize():
         print("Failed to initialize the application", file=sys.stderr)
         return 1
@@ -176,7 +341,8 @@ async def main():
             result = await app.process_feedback_file(
                 str(input_path),
                 args.output,
-                args.task_id
+                base_task_id,
+                resume=resume
             )
             
             if result.get("status") == "success":
@@ -186,6 +352,17 @@ async def main():
                 print(f"Insights generated: {result.get('report', {}).get('summary', {}).get('total_insights', 0)}")
                 print(f"Recommendations generated: {result.get('report', {}).get('summary', {}).get('total_recommendations', 0)}")
                 print(f"Results saved to: {args.output}")
+                if result.get("dead_letter"):
+                    failed = result.get('processing_stats', {}).get('failed_documents', 0)
+                    print(f"Failed documents: {failed} (see {result['dead_letter']})")
+                if result.get("budget_overruns"):
+                    print(f"Documents cut short on the time budget: {result['processing_stats']['budget_overruns']}")
+                if result['processing_stats'].get("overflowed_tokens"):
+                    print(f"Tokens past the vocabulary capacity: {result['processing_stats']['overflowed_tokens']}")
+                if result.get("memory_profile"):
+                    print(f"Memory profile: {result['memory_profile']}")
+                if result.get("cpu_profile"):
+                    print(f"CPU profile: {result['cpu_profile']['summary']}")
                 return 0
             else:
                 print(f"\nError: {result.get('message', 'Unknown error')}", file=sys.stderr)
@@ -208,12 +385,13 @@ async def main():
             for i, file_path in enumerate(files, 1):
                 print(f"Processing file {i}/{len(files)}: {file_path.name}")
                 
-                task_id = f"{args.task_id}_{i}" if args.task_id else None
+                task_id = f"{base_task_id}_{i}" if base_task_id else None
                 
                 result = await app.process_feedback_file(
                     str(file_path),
                     args.output,
-                    task_id
+                    task_id,
+                    resume=resume
                 )
                 
                 if result.get("status") == "success":
@@ -0,0 +1,138 @@
+"""
+Benchmark for the Aho-Corasick keyword matcher against the per-pattern regex
+scans it replaced in the data cleaning agent. Source type detection in the
+data collection agent stays with plain substring scans, which measured faster.
+"""
+
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.data_cleaning import DataCleaningAgent
+from models.feedback_models import FeedbackDocument
+
+SAMPLE_FILE = Path(__file__).parent.parent / "sample_data" / "sample.jsonl"
+
+LEGACY_DOMAIN_PATTERNS = [
+    r'\b(?:process|procedure|workflow|methodology)\b',
+    r'\b(?:quality|standard|compliance|audit)\b',
+    r'\b(?:technical|system|software|hardware)\b',
+    r'\b(?:performance|efficiency|optimization)\b',
+    r'\b(?:recommendation|suggestion|improvement)\b',
+    r'\b(?:issue|problem|concern|challenge)\b',
+    r'\b(?:resource|allocation|budget|cost)\b',
+    r'\b(?:training|skill|competency|knowledge)\b',
+    r'\b(?:communication|collaboration|coordination)\b',
+    r'\b(?:policy|guideline|framework|structure)\b'
+]
+
+
+def legacy_extract_domain_terms(content: str) -> List[str]:
+    """Ten separate regex scans, as previously done per document"""
+    domain_terms = []
+    content_lower = content.lower()
+    for pattern in LEGACY_DOMAIN_PATTERNS:
+        domain_terms.extend(re.findall(pattern, content_lower, re.IGNORECASE))
+    return list(set(domain_terms))
+
+
+def legacy_extract_entities(agent: DataCleaningAgent, content: str) -> List[str]:
+    """Three structural regex scans plus the domain term scans"""
+    entities = []
+    entities.extend(re.findall(r'\b[A-Z][a-z]+\b', content))
+    entities.extend(re.findall(r'\b[a-zA-Z]+[0-9]+[a-zA-Z]*\b|\b[A-Z]{2,}\b', content))
+    entities.extend(re.findall(r'"([^"]*)"', content))
+    entities.extend(legacy_extract_domain_terms(content))
+    return list(set([e for e in entities if len(e) > 2 and e.lower() not in agent.stop_words]))
+
+
+def build_documents(num_documents: int, min_chars: int, seed: int = 42) -> List[FeedbackDocument]:
+    """Concatenate sample feedback into documents of at least min_chars characters"""
+    rng = random.Random(seed)
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        sentences = [json.loads(line)['content'] for line in f if line.strip()]
+
+    documents = []
+    for i in range(num_documents):
+        parts = []
+        length = 0
+        while length < min_chars:
+            sentence = rng.choice(sentences)
+            parts.append(sentence)
+            length += len(sentence) + 1
+        documents.append(FeedbackDocument(
+            filename=f"feedback_{i}.txt",
+            content=' '.join(parts)
+        ))
+    return documents
+
+
+def time_call(func: Callable, items: List, repeat: int) -> float:
+    """Return the best total seconds over repeat runs of func over items"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(num_documents: int = 50, min_chars: int = 10_000, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Compare legacy and matcher-based implementations on large documents"""
+    cleaning_agent = DataCleaningAgent()
+    documents = build_documents(num_documents, min_chars)
+    contents = [doc.content for doc in documents]
+
+    # Results must be identical before timings mean anything
+    for doc in documents:
+        assert set(legacy_extract_domain_terms(doc.content)) == set(cleaning_agent._extract_domain_terms(doc.content))
+
+    cases = {
+        'extract_domain_terms': (
+            legacy_extract_domain_terms,
+            cleaning_agent._extract_domain_terms,
+            contents
+        ),
+        'extract_entities': (
+            lambda content: legacy_extract_entities(cleaning_agent, content),
+            cleaning_agent._extract_entities,
+            contents
+        )
+    }
+
+    results = {}
+    for name, (legacy_func, matcher_func, items) in cases.items():
+        legacy_seconds = time_call(legacy_func, items, repeat)
+        matcher_seconds = time_call(matcher_func, items, repeat)
+        results[name] = {
+            'legacy_ms_per_doc': legacy_seconds / len(items) * 1000,
+            'matcher_ms_per_doc': matcher_seconds / len(items) * 1000,
+            'speedup': legacy_seconds / matcher_seconds if matcher_seconds else float('inf')
+        }
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the keyword matcher against legacy regex scans")
+    parser.add_argument("-n", "--num-documents", type=int, default=50, help="Number of documents (default: 50)")
+    parser.add_argument("-c", "--min-chars", type=int, default=10_000, help="Minimum characters per document (default: 10000)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timing repetitions (default: 3)")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.num_documents, args.min_chars, args.repeat)
+
+    print(f"Keyword matcher benchmark ({args.num_documents} documents, >= {args.min_chars} chars each)")
+    for name, timings in results.items():
+        print(f"- {name}: legacy {timings['legacy_ms_per_doc']:.3f} ms/doc, "
+              f"matcher {timings['matcher_ms_per_doc']:.3f} ms/doc, "
+              f"speedup {timings['speedup']:.2f}x")
@@ -0,0 +1,112 @@
+"""
+Benchmark for the slotted result records against the pydantic models they
+replace between pipeline stages: per-document construction time, retained
+memory, and the cost of converting back to models at the boundary.
+"""
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.categorization import CategorizationAgent
+from agents.data_cleaning import DataCleaningAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from benchmarks.bench_keyword_matcher import build_documents
+from models.feedback_models import CleanedDocument, SentimentAnalysis, CategoryResult
+from models.records import CleanedRecord, SentimentRecord, CategoryRecord
+
+
+def field_values(record: Any) -> Dict[str, Any]:
+    """Constructor arguments of a record, shared by both representations"""
+    return {name: getattr(record, name) for name in record.__dataclass_fields__}
+
+
+def time_per_item(func: Callable[[Dict[str, Any]], Any], items: List[Dict[str, Any]], repeat: int) -> float:
+    """Best microseconds per item over repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1_000_000
+
+
+def retained_bytes_per_item(func: Callable[[Dict[str, Any]], Any], items: List[Dict[str, Any]]) -> float:
+    """Bytes still allocated per item after building and keeping all objects"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [func(item) for item in items]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del objects
+    return retained / len(items)
+
+
+async def build_records(num_documents: int, min_chars: int):
+    """Run the per-document stages once to collect realistic field values"""
+    documents = build_documents(num_documents, min_chars)
+    cleaned = await DataCleaningAgent().clean_documents({'documents': documents, 'return_records': True})
+    sentiments = await SentimentAnalysisAgent().analyze_sentiment({'documents': cleaned, 'return_records': True})
+    categories = await CategorizationAgent().categorize_feedback({'documents': cleaned, 'return_records': True})
+    return cleaned, sentiments, categories
+
+
+def run_benchmark(num_documents: int = 2000, min_chars: int = 200, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Compare model and record construction for each per-document stage output"""
+    cleaned, sentiments, categories = asyncio.run(build_records(num_documents, min_chars))
+
+    cases = {
+        'cleaned_document': (CleanedDocument, CleanedRecord, cleaned),
+        'sentiment_analysis': (SentimentAnalysis, SentimentRecord, sentiments),
+        'category_result': (CategoryResult, CategoryRecord, categories)
+    }
+
+    results = {}
+    for name, (model_cls, record_cls, records) in cases.items():
+        items = [field_values(record) for record in records]
+        model_items = [{k: v for k, v in item.items() if k != 'text_profile'} for item in items]
+
+        def build_model(item, model_cls=model_cls):
+            return model_cls(**item)
+
+        def build_record(item, record_cls=record_cls):
+            return record_cls(**item)
+
+        results[name] = {
+            'model_us_per_doc': time_per_item(build_model, model_items, repeat),
+            'record_us_per_doc': time_per_item(build_record, items, repeat),
+            'to_model_us_per_doc': time_per_item(lambda record: record.to_model(), records, repeat),
+            'model_bytes_per_doc': retained_bytes_per_item(build_model, model_items),
+            'record_bytes_per_doc': retained_bytes_per_item(build_record, items)
+        }
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(description="Benchmark slotted records against pydantic models")
+    parser.add_argument("-n", "--num-documents", type=int, default=2000, help="Number of documents (default: 2000)")
+    parser.add_argument("-c", "--min-chars", type=int, default=200, help="Minimum characters per document (default: 200)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timing repetitions (default: 3)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = run_benchmark(args.num_documents, args.min_chars, args.repeat)
+
+    print(f"Record benchmark ({args.num_documents} documents, >= {args.min_chars} chars each)")
+    for name, stats in results.items():
+        print(f"- {name}: model {stats['model_us_per_doc']:.2f} us/doc, "
+              f"record {stats['record_us_per_doc']:.2f} us/doc, "
+              f"boundary to_model {stats['to_model_us_per_doc']:.2f} us/doc; "
+              f"retained model {stats['model_bytes_per_doc']:.0f} B/doc, "
+              f"record {stats['record_bytes_per_doc']:.0f} B/doc")
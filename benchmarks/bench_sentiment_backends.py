@@ -0,0 +1,110 @@
+"""
+Benchmark for the sentiment backends: throughput of the lexicon heuristics
+against a local transformer model and the lexicon-first cascade in front of
+it, and how often their sentiment labels agree with each other and with the
+labels of the synthetic corpus.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.data_cleaning import DataCleaningAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from benchmarks.corpus import generate_corpus
+from models.feedback_models import FeedbackDocument
+
+
+async def build_cleaned(num_documents: int, text_length: str, seed: int = 42):
+    """Cleaned records of a synthetic corpus and the corpus' sentiment labels"""
+    corpus = generate_corpus(num_documents, text_length, seed)
+    documents = [FeedbackDocument(**item) for item in corpus]
+    cleaned = await DataCleaningAgent().clean_documents({'documents': documents, 'return_records': True})
+    labels = {item['id']: item['metadata'].get('sentiment') for item in corpus}
+    return cleaned, labels
+
+
+def time_scoring(score_documents: Callable[[List[Any]], List[Any]], documents: List[Any], repeat: int) -> float:
+    """Best seconds over repeat runs of scoring the whole batch"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        score_documents(documents)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(
+    num_documents: int = 500,
+    text_length: str = 'short',
+    model_dir: Optional[str] = None,
+    threads: Optional[int] = None,
+    repeat: int = 3
+) -> Dict[str, Dict[str, Any]]:
+    documents, labels = asyncio.run(build_cleaned(num_documents, text_length))
+
+    agent = SentimentAnalysisAgent()
+    cascade_agent = SentimentAnalysisAgent(cascade=True)
+    scorers: Dict[str, Callable[[List[Any]], List[Any]]] = {'lexicon': agent.lexicon_backend.score_documents}
+    if model_dir:
+        cascade_agent = SentimentAnalysisAgent('transformer', model_dir, model_threads=threads, cascade=True)
+        cascade_agent.load_backend()
+        if cascade_agent.backend is cascade_agent.model_backend:
+            scorers['transformer'] = cascade_agent.backend.score_documents
+        else:
+            print(f"Skipping the transformer backend: {model_dir} could not be loaded (see log)")
+    scorers['cascade'] = cascade_agent._cascade_scores
+
+    results = {}
+    predictions = {}
+    for name, score_documents in scorers.items():
+        seconds = time_scoring(score_documents, documents, repeat)
+        scores = score_documents(documents)
+        predictions[name] = [agent._score_to_sentiment_type(score.score).value for score in scores]
+        matching = sum(
+            prediction == labels[doc.original_id] for doc, prediction in zip(documents, predictions[name])
+        )
+        results[name] = {
+            'ms_per_doc': seconds / len(documents) * 1000,
+            'docs_per_second': len(documents) / seconds if seconds else float('inf'),
+            'label_agreement': matching / len(documents)
+        }
+    for name in ('transformer', 'cascade'):
+        if name in predictions:
+            agreeing = sum(a == b for a, b in zip(predictions['lexicon'], predictions[name]))
+            results[name]['lexicon_agreement'] = agreeing / len(documents)
+    cascade = cascade_agent.cascade_metrics()
+    results['cascade']['escalation_rate'] = cascade['escalation_rate']
+    results['cascade']['escalated_to'] = cascade['escalated_to']
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the lexicon and transformer sentiment backends")
+    parser.add_argument("-n", "--num-documents", type=int, default=500, help="Number of documents (default: 500)")
+    parser.add_argument("-l", "--text-length", choices=["short", "long"], default="short",
+                        help="Text length profile of the corpus (default: short)")
+    parser.add_argument("-m", "--model-dir", default=None,
+                        help="Local sentiment model directory; without it only the lexicon backend runs")
+    parser.add_argument("-t", "--threads", type=int, default=None, help="Intra-op threads for the model")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timing repetitions (default: 3)")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.num_documents, args.text_length, args.model_dir, args.threads, args.repeat)
+
+    print(f"Sentiment backend benchmark ({args.num_documents} {args.text_length} documents)")
+    for name, timings in results.items():
+        line = (f"- {name}: {timings['ms_per_doc']:.3f} ms/doc, {timings['docs_per_second']:.0f} docs/s, "
+                f"corpus label agreement {timings['label_agreement']:.1%}")
+        if 'lexicon_agreement' in timings:
+            line += f", agreement with lexicon {timings['lexicon_agreement']:.1%}"
+        if 'escalation_rate' in timings:
+            line += f", {timings['escalation_rate']:.1%} escalated to {timings['escalated_to']}"
+        print(line)
@@ -0,0 +1,40 @@
+"""
+Scaled synthetic feedback corpus for the benchmark suite, built with the
+deterministic generator of sample_data/generate_corpus.py.
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+
+# Sentences per document for each text length profile
+TEXT_LENGTHS = {
+    'short': (1, 3),
+    'long': (20, 40)
+}
+
+
+def generate_corpus(num_documents: int, text_length: str = 'short', seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Generate num_documents feedback items in the FeedbackDocument dict format.
+
+    Benchmarks time every document through every stage, so the corpus has no
+    duplicates or malformed records.
+    """
+    if text_length not in TEXT_LENGTHS:
+        raise ValueError(f"Unknown text length '{text_length}', expected one of {sorted(TEXT_LENGTHS)}")
+
+    min_sentences, max_sentences = TEXT_LENGTHS[text_length]
+    config = CorpusConfig(
+        num_documents=num_documents,
+        seed=seed,
+        length_distribution='uniform',
+        min_sentences=min_sentences,
+        max_sentences=max_sentences
+    )
+    return list(iter_corpus(config))
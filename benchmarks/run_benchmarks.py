@@ -0,0 +1,275 @@
+"""
+Benchmark suite for the Feedback Processing System.
+
+Times every agent method and the full WorkflowManager.process_feedback on a
+synthetic corpus at several sizes and text lengths, writes the results as
+JSON and compares them against a stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --save-baseline
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --threshold 0.15
+"""
+
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.categorization import CategorizationAgent
+from agents.data_cleaning import DataCleaningAgent
+from agents.data_collection import DataCollectionAgent
+from agents.insight_generation import InsightGenerationAgent
+from agents.recommendation import RecommendationAgent
+from agents.report_generation import ReportGenerationAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from benchmarks.corpus import generate_corpus
+from models.feedback_models import FeedbackDocument
+from workflow.workflow_manager import WorkflowManager
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_BASELINE = RESULTS_DIR / "baseline.json"
+
+
+async def time_stage(
+    run: Callable[..., Awaitable[Any]],
+    repeat: int,
+    prepare: Callable[[], Tuple[Any, ...]] = tuple
+) -> Tuple[Dict[str, float], Any]:
+    """
+    Await run(*prepare()) repeat times, returning its timings and the last
+    output. prepare builds fresh inputs for stages that consume them and is
+    not timed.
+    """
+    durations = []
+    output = None
+    for _ in range(repeat):
+        arguments = prepare()
+        start = time.perf_counter()
+        output = await run(*arguments)
+        durations.append(time.perf_counter() - start)
+    return {
+        'best_seconds': min(durations),
+        'mean_seconds': sum(durations) / len(durations)
+    }, output
+
+
+async def benchmark_corpus(corpus: List[Dict[str, Any]], repeat: int, report_dir: Path) -> Dict[str, Dict[str, float]]:
+    """Time each agent stage in pipeline order, then the full workflow"""
+    collection = DataCollectionAgent()
+    cleaning = DataCleaningAgent()
+    sentiment = SentimentAnalysisAgent()
+    categorization = CategorizationAgent()
+    insight = InsightGenerationAgent()
+    recommendation = RecommendationAgent()
+    report = ReportGenerationAgent(output_dir=str(report_dir))
+
+    results = {}
+
+    # Enrichment mutates documents, so every run gets freshly built ones
+    results['validate_and_enrich'], validated = await time_stage(
+        lambda docs: collection.validate_and_enrich({'documents': docs}),
+        repeat,
+        prepare=lambda: ([FeedbackDocument(**item) for item in corpus],)
+    )
+    results['clean_documents'], cleaned = await time_stage(
+        lambda: cleaning.clean_documents({'documents': validated, 'return_records': True}),
+        repeat
+    )
+    results['analyze_sentiment'], sentiments = await time_stage(
+        lambda: sentiment.analyze_sentiment({'documents': cleaned, 'return_records': True}),
+        repeat
+    )
+    results['categorize_feedback'], categories = await time_stage(
+        lambda: categorization.categorize_feedback({'documents': cleaned, 'return_records': True}),
+        repeat
+    )
+    results['generate_insights'], insights = await time_stage(
+        lambda: insight.generate_insights({
+            'documents': cleaned,
+            'sentiment_results': sentiments,
+            'categorization_results': categories
+        }),
+        repeat
+    )
+    results['generate_recommendations'], recommendations = await time_stage(
+        lambda: recommendation.generate_recommendations({'insights': insights}),
+        repeat
+    )
+    results['generate_report'], _ = await time_stage(
+        lambda: report.generate_report(
+            cleaned_documents=cleaned,
+            sentiment_results=sentiments,
+            categorization_results=categories,
+            insights=insights,
+            recommendations=recommendations,
+            task_id="benchmark",
+            output_format="all"
+        ),
+        repeat
+    )
+
+    manager = WorkflowManager()
+    manager.report_generation_agent = report
+    await manager.initialize()
+    results['process_feedback'], _ = await time_stage(
+        lambda items: manager.process_feedback(items, task_id="benchmark"),
+        repeat,
+        prepare=lambda: ([dict(item) for item in corpus],)
+    )
+    await manager.shutdown()
+
+    for timings in results.values():
+        timings['docs_per_second'] = len(corpus) / timings['best_seconds'] if timings['best_seconds'] else 0.0
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Current commit, if the suite runs inside the repository"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes: List[int], lengths: List[str], repeat: int, seed: int) -> Dict[str, Any]:
+    """Benchmark every size and text length combination"""
+    results = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'sizes': sizes,
+            'lengths': lengths,
+            'repeat': repeat,
+            'seed': seed
+        },
+        'benchmarks': {}
+    }
+
+    with tempfile.TemporaryDirectory() as report_dir:
+        for text_length in lengths:
+            for size in sizes:
+                name = f"{text_length}-{size}"
+                print(f"Running {name}...", flush=True)
+                corpus = generate_corpus(size, text_length, seed)
+                results['benchmarks'][name] = asyncio.run(benchmark_corpus(corpus, repeat, Path(report_dir)))
+    return results
+
+
+def compare_to_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Compare best timings with the baseline. A stage regresses when it is
+    more than threshold (a fraction) slower than in the baseline.
+    """
+    comparisons = []
+    for name, stages in results['benchmarks'].items():
+        baseline_stages = baseline.get('benchmarks', {}).get(name, {})
+        for stage, timings in stages.items():
+            if stage not in baseline_stages:
+                continue
+            before = baseline_stages[stage]['best_seconds']
+            after = timings['best_seconds']
+            ratio = after / before if before else float('inf')
+            comparisons.append({
+                'benchmark': name,
+                'stage': stage,
+                'baseline_seconds': before,
+                'current_seconds': after,
+                'ratio': ratio,
+                'regression': ratio > 1 + threshold
+            })
+    return comparisons
+
+
+def print_results(results: Dict[str, Any], comparisons: List[Dict[str, Any]]) -> None:
+    ratios = {(c['benchmark'], c['stage']): c for c in comparisons}
+    for name, stages in results['benchmarks'].items():
+        print(f"\n{name}")
+        for stage, timings in stages.items():
+            line = f"  {stage:<26} {timings['best_seconds']:>10.4f} s  {timings['docs_per_second']:>12.1f} docs/s"
+            comparison = ratios.get((name, stage))
+            if comparison:
+                flag = "  REGRESSION" if comparison['regression'] else ""
+                line += f"  x{comparison['ratio']:.2f} vs baseline{flag}"
+            print(line)
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark every agent and the end-to-end pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Corpus sizes in documents (default: 1000 10000 100000)")
+    parser.add_argument("--lengths", nargs="+", default=["short", "long"], choices=["short", "long"],
+                        help="Text length profiles (default: short long)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timing repetitions (default: 3)")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed (default: 42)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE),
+                        help=f"Baseline JSON to compare against (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed slowdown before a stage counts as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    # Per-document log lines would dominate the timings
+    logging.disable(logging.INFO)
+
+    results = run_suite(args.sizes, args.lengths, args.repeat, args.seed)
+
+    baseline_path = Path(args.baseline)
+    comparisons = []
+    if baseline_path.exists() and not args.save_baseline:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            comparisons = compare_to_baseline(results, json.load(f), args.threshold)
+        results['comparison'] = {
+            'baseline': str(baseline_path),
+            'threshold': args.threshold,
+            'stages': comparisons
+        }
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    print_results(results, comparisons)
+    print(f"\nResults saved to: {output_path}")
+    if args.save_baseline:
+        print(f"Baseline saved to: {baseline_path}")
+
+    regressions = [c for c in comparisons if c['regression']]
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,11 +4,12 @@ Multi-Agent AI System for Processing and Analyzing Specialist Feedback
 """
 
 import asyncio
+import hmac
 import logging
 from pathlib import Path
 from typing import Dict, List, Optional
 import uvicorn
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, JSONResponse
@@ -25,7 +26,12 @@ from agents.insight_generation import InsightGenerationAgent
 from agents.recommendation import RecommendationAgent
 from agents.report_generation import ReportGenerationAgent
 from models.feedback_models import FeedbackDocument, ProcessingResult
+from pydantic import BaseModel
+from utils.admission import AdmissionRejected
+from utils.execution import agent_execution
 from utils.logger import setup_logger
+from utils.profiling import CpuProfiler, cpu_profiling
+from utils.text_profile import vocabulary
 
 # Load environment variables
 load_dotenv()
@@ -37,20 +43,51 @@ class SpecialistFeedbackSystem:
     """Main application class for the Specialist Feedback Management System"""
     
     def __init__(self):
-        self.master_orchestrator = MasterOrchestratorAgent()
+        self.master_orchestrator = MasterOrchestratorAgent(
+            profile_memory=os.getenv("PROFILE_MEMORY", "false").lower() in ("1", "true", "yes"),
+            max_pipelines=int(os.getenv("MAX_CONCURRENT_PIPELINES", "2")),
+            max_inflight_documents=int(os.getenv("MAX_INFLIGHT_DOCUMENTS", "50000")),
+            max_queue=int(os.getenv("MAX_QUEUED_PIPELINES", "32")),
+            task_history=int(os.getenv("TASK_HISTORY_SIZE", "1000")),
+            max_retries=int(os.getenv("DOCUMENT_MAX_RETRIES", "2")),
+            retry_backoff_seconds=float(os.getenv("DOCUMENT_RETRY_BACKOFF_SECONDS", "0.5"))
+        )
         self.processing_status = {}
         
     async def initialize(self):
         """Initialize the system components"""
         logger.info("Initializing Specialist Feedback Management System...")
         
+        # Agent work runs off the event loop so requests are served during a batch
+        agent_execution.configure(
+            offload=os.getenv("AGENT_OFFLOAD", "true").lower() in ("1", "true", "yes"),
+            yield_every=int(os.getenv("AGENT_YIELD_EVERY", "256"))
+        )
+        
+        # Oversized documents can be scored in windows, within a time budget per
+        # document; off by default, as in the CLI and WorkflowManager
+        segment_chars = int(os.getenv("SEGMENT_CHARS", "0"))
+        time_budget = float(os.getenv("DOCUMENT_TIME_BUDGET_SECONDS", "0"))
+        
         # Initialize master orchestrator with all agents
         agents = {
             'data_collection': DataCollectionAgent(),
             'data_cleaning': DataCleaningAgent(),
-            'sentiment_analysis': SentimentAnalysisAgent(),
-            'categorization': CategorizationAgent(),
-            'insight_generation': InsightGenerationAgent(),
+            'sentiment_analysis': SentimentAnalysisAgent(
+                backend=os.getenv("SENTIMENT_BACKEND", "lexicon"),
+                model_dir=os.getenv("SENTIMENT_MODEL_DIR") or None,
+                cascade=os.getenv("SENTIMENT_CASCADE", "false").lower() in ("1", "true", "yes"),
+                sentence_level=os.getenv("SENTIMENT_SENTENCE_LEVEL", "false").lower() in ("1", "true", "yes"),
+                segment_chars=segment_chars,
+                time_budget_seconds=time_budget
+            ),
+            'categorization': CategorizationAgent(
+                model_path=os.getenv("CATEGORIZATION_MODEL_PATH") or None,
+                model_weight=float(os.getenv("CATEGORIZATION_MODEL_WEIGHT", "0.5")),
+                segment_chars=segment_chars,
+                time_budget_seconds=time_budget
+            ),
+            'insight_generation': InsightGenerationAgent(term_history_path=os.getenv("TERM_HISTORY_PATH") or None),
             'recommendation': RecommendationAgent(),
             'report_generation': ReportGenerationAgent()
         }
@@ -58,8 +95,8 @@ class SpecialistFeedbackSystem:
         await self.master_orchestrator.initialize(agents)
         logger.info("System initialization completed successfully")
     
-    async def process_feedback_batch(self, documents: List[FeedbackDocument]) -> str:
-        """Process a batch of feedback documents"""
+    async def process_feedback_batch(self, documents: List[FeedbackDocument], client_id: str = "default") -> str:
+        """Process a batch of feedback documents once the orchestrator admits it"""
         batch_id = f"batch_{len(self.processing_status) + 1}"
         self.processing_status[batch_id] = {
             'status': 'processing',
@@ -72,7 +109,7 @@ class SpecialistFeedbackSystem:
             logger.info(f"Starting processing of batch {batch_id} with {len(documents)} documents")
             
             # Process through master orchestrator
-            results = await self.master_orchestrator.process_feedback_pipeline(documents)
+            results = await self.master_orchestrator.process_feedback_pipeline(documents, client_id)
             
             self.processing_status[batch_id].update({
                 'status': 'completed',
@@ -83,6 +120,14 @@ class SpecialistFeedbackSystem:
             logger.info(f"Batch {batch_id} processing completed successfully")
             return batch_id
             
+        except AdmissionRejected as e:
+            logger.warning(f"Batch {batch_id} of client {client_id} rejected: {str(e)}")
+            self.processing_status[batch_id].update({
+                'status': 'rejected',
+                'error': str(e)
+            })
+            raise
+            
         except Exception as e:
             logger.error(f"Error processing batch {batch_id}: {str(e)}")
             self.processing_status[batch_id].update({
@@ -146,9 +191,12 @@ async def root():
             <ul>
                 <li><a href="/docs">API Documentation (Swagger)</a></li>
                 <li><a href="/health">System Health Check</a></li>
+                <li><a href="/metrics/admission">Pipeline Queue Metrics</a></li>
                 <li>POST /upload - Upload feedback documents</li>
                 <li>GET /status/{batch_id} - Check processing status</li>
                 <li>GET /results/{batch_id} - Get processing results</li>
+                <li>GET/POST /admin/profiling - CPU profiling of pipeline batches</li>
+                <li>GET /admin/tasks - Running and recent agent tasks</li>
             </ul>
             
             <h2>Web Interface</h2>
@@ -164,15 +212,31 @@ async def health_check():
         "status": "healthy",
         "system": "Specialist Feedback Management System",
         "version": "1.0.0",
-        "agents_active": len(feedback_system.master_orchestrator.agents) if hasattr(feedback_system.master_orchestrator, 'agents') else 0
+        "agents_active": len(feedback_system.master_orchestrator.agents) if hasattr(feedback_system.master_orchestrator, 'agents') else 0,
+        "agent_execution": agent_execution.status(),
+        "vocabulary": vocabulary.stats(),
+        "admission": feedback_system.master_orchestrator.admission.status()
     }
 
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """Pipeline queue depth, in-flight documents and queue wait times"""
+    return feedback_system.master_orchestrator.admission.status()
+
+def client_key(request: Request, client_id: Optional[str]) -> str:
+    """Client a batch is queued under: X-Client-Id, else the caller's address"""
+    if client_id:
+        return client_id
+    return request.client.host if request.client else "default"
+
 @app.post("/upload")
 async def upload_feedback(
+    request: Request,
     background_tasks: BackgroundTasks,
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    x_client_id: Optional[str] = Header(None)
 ):
-    """Upload and process feedback documents"""
+    """Upload and process feedback documents; 429 with Retry-After when the pipelines are saturated"""
     try:
         documents = []
         for file in files:
@@ -185,7 +249,7 @@ async def upload_feedback(
             documents.append(doc)
         
         # Start processing in background
-        batch_id = await feedback_system.process_feedback_batch(documents)
+        batch_id = await feedback_system.process_feedback_batch(documents, client_key(request, x_client_id))
         
         return {
             "message": "Files uploaded successfully",
@@ -194,6 +258,8 @@ async def upload_feedback(
             "status": "processing"
         }
         
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -215,6 +281,57 @@ async def get_results(batch_id: str):
     else:
         raise HTTPException(status_code=404, detail="Batch not found or processing failed")
 
+class CpuProfilingSettings(BaseModel):
+    """Runtime CPU profiling switch"""
+    enabled: bool = True
+    mode: str = "both"  # cprofile, sampling or both
+    interval_ms: float = 5.0
+    runs: Optional[int] = None  # profile this many batches, then switch off
+
+def require_admin(token: Optional[str]) -> None:
+    """Admin endpoints require X-Admin-Token to match ADMIN_TOKEN, and are closed while it is unset"""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if token is None or not hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profiling")
+async def get_profiling(x_admin_token: Optional[str] = Header(None)):
+    """CPU profiling state and the files of the last profiled batch"""
+    require_admin(x_admin_token)
+    return cpu_profiling.status()
+
+@app.post("/admin/profiling")
+async def set_profiling(settings: CpuProfilingSettings, x_admin_token: Optional[str] = Header(None)):
+    """Switch CPU profiling of pipeline batches on or off without restarting"""
+    require_admin(x_admin_token)
+    if not settings.enabled:
+        cpu_profiling.disable()
+    elif settings.mode not in CpuProfiler.MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(CpuProfiler.MODES)}")
+    else:
+        cpu_profiling.enable(settings.mode, settings.interval_ms / 1000, settings.runs)
+    logger.info(f"CPU profiling {'enabled' if cpu_profiling.enabled else 'disabled'}")
+    return cpu_profiling.status()
+
+@app.get("/admin/tasks")
+async def get_tasks(
+    agent: Optional[str] = None,
+    status: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    limit: int = 100,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Running agent tasks and the summaries of recently finished ones, newest first"""
+    require_admin(x_admin_token)
+    tasks = feedback_system.master_orchestrator.tasks
+    return {
+        'stats': tasks.stats(),
+        'active': [task.model_dump(mode='json') for task in tasks.active.values()],
+        'history': tasks.query(agent, status, batch_id, limit)
+    }
+
 if __name__ == "__main__":
     # Run FastAPI server
     uvicorn.run(
@@ -4,9 +4,11 @@ Data models for the Specialist Feedback Management System
 
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from enum import Enum
 
+from utils.text_profile import TextProfile
+
 class FeedbackSource(str, Enum):
     """Types of feedback sources"""
     EXPERT_REPORT = "expert_report"
@@ -64,6 +66,20 @@ class CleanedDocument(BaseModel):
     word_count: int = 0
     quality_score: float = 0.0
     preprocessing_notes: List[str] = Field(default_factory=list)
+    
+    # Tokenization shared by downstream agents; not part of the serialized model
+    _text_profile: Optional[TextProfile] = PrivateAttr(default=None)
+    
+    @property
+    def text_profile(self) -> TextProfile:
+        """Token profile of cleaned_content, computed on first access if not attached"""
+        if self._text_profile is None:
+            self._text_profile = TextProfile.from_text(self.cleaned_content)
+        return self._text_profile
+    
+    def attach_text_profile(self, profile: TextProfile) -> None:
+        """Attach a profile already computed for cleaned_content"""
+        self._text_profile = profile
 
 class SentimentAnalysis(BaseModel):
     """Model for sentiment analysis results"""
@@ -74,6 +90,8 @@ class SentimentAnalysis(BaseModel):
     sentiment_breakdown: Dict[str, float] = Field(default_factory=dict)
     key_phrases: List[str] = Field(default_factory=list)
     emotional_indicators: List[str] = Field(default_factory=list)
+    # Contribution of each sentence to the context score (sentence-level scoring only)
+    sentence_contributions: List[float] = Field(default_factory=list)
 
 class CategoryResult(BaseModel):
     """Model for categorization results"""
@@ -114,6 +132,8 @@ class ProcessingResult(BaseModel):
     total_documents: int
     processed_documents: int
     failed_documents: int = 0
+    dead_letter_path: Optional[str] = None  # JSONL of the failed documents
+    budget_overruns: List[Dict[str, Any]] = Field(default_factory=list)  # Documents cut short on the time budget
     
     # Processing results
     sentiment_results: List[SentimentAnalysis] = Field(default_factory=list)
@@ -139,6 +159,7 @@ class AgentTask(BaseModel):
     agent_name: str
     task_type: str
     input_data: Dict[str, Any]
+    batch_id: Optional[str] = None
     status: ProcessingStatus = ProcessingStatus.PENDING
     created_at: datetime = Field(default_factory=datetime.now)
     started_at: Optional[datetime] = None
@@ -0,0 +1,139 @@
+"""
+Lightweight result records for the per-document pipeline stages.
+
+The pydantic models in feedback_models validate every field on construction,
+which dominates the cost of building tens of thousands of stage results per
+batch. Agents pass these slotted dataclasses between stages instead; they
+carry the same field names and already-normalized values, and are converted
+to the public models only at the API and report boundaries.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from models.feedback_models import (
+    CleanedDocument, SentimentAnalysis, CategoryResult,
+    SentimentType, FeedbackCategory
+)
+from utils.text_profile import TextProfile
+
+
+@dataclass(slots=True)
+class CleanedRecord:
+    """Internal counterpart of CleanedDocument"""
+    original_id: str
+    cleaned_content: str
+    extracted_entities: List[str] = field(default_factory=list)
+    language: str = "en"
+    word_count: int = 0
+    quality_score: float = 0.0
+    preprocessing_notes: List[str] = field(default_factory=list)
+    text_profile: Optional[TextProfile] = None
+
+    def __post_init__(self):
+        if self.text_profile is None:
+            self.text_profile = TextProfile.from_text(self.cleaned_content)
+
+    def to_model(self) -> CleanedDocument:
+        """Validate into the public model, keeping the text profile"""
+        doc = CleanedDocument(
+            original_id=self.original_id,
+            cleaned_content=self.cleaned_content,
+            extracted_entities=self.extracted_entities,
+            language=self.language,
+            word_count=self.word_count,
+            quality_score=self.quality_score,
+            preprocessing_notes=self.preprocessing_notes
+        )
+        doc.attach_text_profile(self.text_profile)
+        return doc
+
+    @classmethod
+    def from_model(cls, doc: CleanedDocument) -> 'CleanedRecord':
+        return cls(
+            original_id=doc.original_id,
+            cleaned_content=doc.cleaned_content,
+            extracted_entities=doc.extracted_entities,
+            language=doc.language,
+            word_count=doc.word_count,
+            quality_score=doc.quality_score,
+            preprocessing_notes=doc.preprocessing_notes,
+            text_profile=doc.text_profile
+        )
+
+
+@dataclass(slots=True)
+class SentimentRecord:
+    """Internal counterpart of SentimentAnalysis"""
+    document_id: str
+    overall_sentiment: SentimentType
+    sentiment_score: float
+    confidence: float
+    sentiment_breakdown: Dict[str, float] = field(default_factory=dict)
+    key_phrases: List[str] = field(default_factory=list)
+    emotional_indicators: List[str] = field(default_factory=list)
+    sentence_contributions: List[float] = field(default_factory=list)
+
+    def to_model(self) -> SentimentAnalysis:
+        """Validate into the public model"""
+        return SentimentAnalysis(
+            document_id=self.document_id,
+            overall_sentiment=self.overall_sentiment,
+            sentiment_score=self.sentiment_score,
+            confidence=self.confidence,
+            sentiment_breakdown=self.sentiment_breakdown,
+            key_phrases=self.key_phrases,
+            emotional_indicators=self.emotional_indicators,
+            sentence_contributions=self.sentence_contributions
+        )
+
+    @classmethod
+    def from_model(cls, result: SentimentAnalysis) -> 'SentimentRecord':
+        return cls(
+            document_id=result.document_id,
+            overall_sentiment=result.overall_sentiment,
+            sentiment_score=result.sentiment_score,
+            confidence=result.confidence,
+            sentiment_breakdown=result.sentiment_breakdown,
+            key_phrases=result.key_phrases,
+            emotional_indicators=result.emotional_indicators,
+            sentence_contributions=result.sentence_contributions
+        )
+
+
+@dataclass(slots=True)
+class CategoryRecord:
+    """Internal counterpart of CategoryResult; confidence keys are category values"""
+    document_id: str
+    primary_category: FeedbackCategory
+    secondary_categories: List[FeedbackCategory] = field(default_factory=list)
+    category_confidence: Dict[str, float] = field(default_factory=dict)
+    keywords: List[str] = field(default_factory=list)
+    topics: List[str] = field(default_factory=list)
+
+    def to_model(self) -> CategoryResult:
+        """Validate into the public model"""
+        return CategoryResult(
+            document_id=self.document_id,
+            primary_category=self.primary_category,
+            secondary_categories=self.secondary_categories,
+            category_confidence=self.category_confidence,
+            keywords=self.keywords,
+            topics=self.topics
+        )
+
+    @classmethod
+    def from_model(cls, result: CategoryResult) -> 'CategoryRecord':
+        return cls(
+            document_id=result.document_id,
+            primary_category=result.primary_category,
+            secondary_categories=result.secondary_categories,
+            category_confidence=result.category_confidence,
+            keywords=result.keywords,
+            topics=result.topics
+        )
+
+
+def to_models(items: Iterable[Any]) -> List[Any]:
+    """Convert records to their public models, passing models through unchanged"""
+    return [item.to_model() if hasattr(item, 'to_model') else item for item in items]
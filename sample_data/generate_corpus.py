@@ -0,0 +1,485 @@
+"""
+Generate large deterministic synthetic feedback corpora for load testing.
+
+Documents are streamed to JSONL (optionally split into shards), so memory
+use stays flat for millions of documents. Every document is derived from
+(seed, index) alone: the same settings always produce the same corpus, any
+shard can be generated on its own, and duplicates are rebuilt from the
+index of their original instead of being kept in memory.
+
+Content is assembled from category topics and sentiment templates chosen to
+reach every heuristic of the agents: lexicon words with negators and
+intensifiers, the sentiment and topic patterns, emotional indicators, quoted
+phrases, acronyms and project ids, URLs, emails, encoding artefacts,
+repeated sentences, source keywords in filenames and content, non-English
+text, and records that fail validation.
+"""
+
+import json
+import math
+import random
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sample_data.generate_feedback import (
+    FEEDBACK_SOURCES, IMPROVEMENT_SUGGESTIONS, POSITIVE_OUTCOMES, PROCEDURAL_INEFFICIENCIES,
+    PROJECTS, SPECIALISTS, SYSTEMS, TECHNICAL_ISSUES
+)
+
+# Topics per category, worded to hit that category's patterns
+CATEGORY_TOPICS = {
+    "technical_issues": [
+        "login error", "database migration", "response time", "memory leak", "security vulnerability",
+        "version upgrade", "API timeout", "payment bug", "search latency", "build failure"
+    ],
+    "procedural_inefficiencies": [
+        "approval workflow", "release procedure", "handover process", "ticket triage steps",
+        "manual data entry", "review protocol", "redundant sign-off", "change request process"
+    ],
+    "resource_allocation": [
+        "staffing plan", "project budget", "team capacity", "funding allocation",
+        "personnel workload", "hardware budget", "on-call rotation", "cost forecast"
+    ],
+    "communication": [
+        "status announcement", "release notes", "documentation", "user guide",
+        "incident notification", "feedback channel", "FAQ page", "meeting summary"
+    ],
+    "training_needs": [
+        "onboarding program", "new hire orientation", "security training", "certification course",
+        "mentoring workshop", "skill assessment", "knowledge base", "coaching sessions"
+    ],
+    "system_improvements": [
+        "reporting platform", "dashboard interface", "integration API", "configuration options",
+        "mobile application", "search feature", "notification tool", "user-friendly editor"
+    ],
+    "policy_recommendations": [
+        "data retention policy", "access guideline", "compliance standard", "governance framework",
+        "security regulation", "risk policy", "vendor requirement", "audit mandate"
+    ],
+    "other": [
+        "office layout", "team offsite", "parking arrangement", "coffee machine", "holiday calendar"
+    ]
+}
+
+# Existing sample sentences, used as the opening sentence where they fit the category
+CATEGORY_SAMPLES = {
+    "technical_issues": TECHNICAL_ISSUES,
+    "procedural_inefficiencies": PROCEDURAL_INEFFICIENCIES,
+    "system_improvements": IMPROVEMENT_SUGGESTIONS,
+    "policy_recommendations": IMPROVEMENT_SUGGESTIONS
+}
+
+# Sentence templates per sentiment; {topic}, {system}, {project}, {person} and {percent} are filled in
+SENTIMENT_TEMPLATES = {
+    "positive": [
+        "The {topic} is excellent and the team did outstanding work.",
+        "We are very pleased with the new {topic}.",
+        "I would highly recommend the {topic} to other teams.",
+        "There has been significant improvement in the {topic} since {project}.",
+        "The {topic} was well implemented and effectively managed.",
+        "The {topic} is extremely helpful and improved our throughput by {percent}%.",
+        "{person} was impressed by the {topic} and is confident about the next release.",
+        "Great job on the {topic}, the {system} now feels efficient and reliable.",
+        "The team was delighted that the {topic} is not problematic anymore."
+    ],
+    "negative": [
+        "There is a major issue with the {topic}.",
+        "The {topic} failed to meet the agreed targets in {project}.",
+        "We are frustrated with the {topic} and the lack of progress.",
+        "The {topic} needs immediate attention and urgent action.",
+        "The {topic} is extremely poor and causes serious problems in the {system}.",
+        "The {topic} is not good enough and never works as documented.",
+        "{person} is concerned about the {topic} and worried about the deadline.",
+        "Users reported a critical error in the {topic} after the update.",
+        "The {topic} is inefficient and the results are quite disappointing."
+    ],
+    "neutral": [
+        "According to the report, the {topic} involves several steps.",
+        "The data show that the {topic} is used by {percent}% of the team.",
+        "The {topic} includes the standard configuration for the {system}.",
+        "Based on the last review, the {topic} is a routine part of {project}.",
+        "The process for the {topic} requires sign-off from {person}.",
+        "We should focus on the {topic} during the next planning cycle.",
+        "The {topic} was discussed in the weekly meeting.",
+        "Metrics indicate a moderate change in the {topic}."
+    ]
+}
+
+# Sentences that trigger the topic extraction patterns
+TOPIC_TEMPLATES = [
+    "We need to implement a new {topic}.",
+    "Please improve the {topic}, and keep the current scope.",
+    "The main problem with the {topic} is still open.",
+    "Teams should concentrate on the {topic} this quarter.",
+    "Our {topic} lacks clear ownership."
+]
+
+# Sentences in other languages, detected as non-English
+FOREIGN_SENTENCES = [
+    "El sistema funciona despacio y los usuarios esperan demasiado tiempo.",
+    "Die Anwendung reagiert langsam und die Dokumentation ist veraltet.",
+    "Le processus de validation prend beaucoup trop de temps pour chaque demande.",
+    "Il sistema di monitoraggio segnala troppi falsi allarmi ogni giorno."
+]
+
+# Word substitutions used to derive near-duplicates
+NEAR_DUPLICATE_SUBSTITUTIONS = [
+    ("major", "serious"), ("very", "extremely"), ("pleased", "satisfied"), ("team", "group"),
+    ("issue", "problem"), ("improve", "enhance"), ("report", "review"), ("new", "updated")
+]
+
+# Kinds of malformed records; the pipeline rejects, repairs or skips each of them
+MALFORMED_KINDS = [
+    "missing_content", "empty_content", "too_short", "symbols_only",
+    "empty_filename", "invalid_timestamp", "non_string_content", "bare_string"
+]
+
+SOURCE_FILENAMES = {
+    "expert_report": "expert_review_{date}_{project}.txt",
+    "internal_assessment": "internal_assessment_{department}_{date}.txt",
+    "peer_review": "peer_feedback_{system}_{date}.txt",
+    "technical_review": "technical_review_{date}.txt",
+    "process_evaluation": "process_evaluation_{date}.txt",
+    "quality_audit": "quality_audit_{project}_{date}.txt",
+    "other": "feedback_{category}_{date}.txt"
+}
+
+# Content phrases that identify a source when the filename does not
+SOURCE_PHRASES = {
+    "expert_report": "In my expert opinion, this deserves attention.",
+    "technical_review": "This technical issue affects the whole system.",
+    "process_evaluation": "The workflow was reviewed end to end.",
+    "quality_audit": "The quality audit checked compliance with the standard."
+}
+
+LENGTH_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+@dataclass
+class CorpusConfig:
+    """Settings of a synthetic corpus; every rate is a probability per document"""
+    num_documents: int = 1000
+    seed: int = 42
+    length_distribution: str = "lognormal"
+    mean_sentences: float = 4.0
+    min_sentences: int = 1
+    max_sentences: int = 60
+    duplicate_rate: float = 0.0
+    near_duplicate_rate: float = 0.0
+    category_mix: Dict[str, float] = field(default_factory=lambda: {category: 1.0 for category in CATEGORY_TOPICS})
+    sentiment_mix: Dict[str, float] = field(
+        default_factory=lambda: {"positive": 0.35, "negative": 0.35, "neutral": 0.2, "mixed": 0.1}
+    )
+    start_date: datetime = datetime(2024, 1, 1)
+    timestamp_spread_days: float = 60.0
+    malformed_rate: float = 0.0
+    non_english_rate: float = 0.01
+    noise_rate: float = 0.2
+
+    def __post_init__(self):
+        if self.length_distribution not in LENGTH_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown length distribution '{self.length_distribution}', expected one of {LENGTH_DISTRIBUTIONS}"
+            )
+        if not 1 <= self.min_sentences <= self.max_sentences:
+            raise ValueError("Sentence bounds must satisfy 1 <= min_sentences <= max_sentences")
+        for name, mix in (("category_mix", self.category_mix), ("sentiment_mix", self.sentiment_mix)):
+            if not mix or any(weight < 0 for weight in mix.values()) or sum(mix.values()) <= 0:
+                raise ValueError(f"{name} needs at least one positive weight and no negative weights")
+        unknown = set(self.category_mix) - set(CATEGORY_TOPICS)
+        unknown |= set(self.sentiment_mix) - {"positive", "negative", "neutral", "mixed"}
+        if unknown:
+            raise ValueError(f"Unknown mix keys: {sorted(unknown)}")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse 'name=weight,name=weight' into a weight mapping"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def _document_rng(seed: int, index: int) -> random.Random:
+    """Independent generator per document, so any index can be produced on its own"""
+    return random.Random(f"{seed}:{index}")
+
+
+def _weighted_choice(rng: random.Random, mix: Dict[str, float]) -> str:
+    names = list(mix)
+    return rng.choices(names, weights=[mix[name] for name in names])[0]
+
+
+def _sentence_count(rng: random.Random, config: CorpusConfig) -> int:
+    if config.length_distribution == "fixed":
+        count = round(config.mean_sentences)
+    elif config.length_distribution == "uniform":
+        count = rng.randint(config.min_sentences, config.max_sentences)
+    else:
+        # Median at mean_sentences with a long tail of large documents
+        count = round(rng.lognormvariate(math.log(max(config.mean_sentences, 1.0)), 0.75))
+    return max(config.min_sentences, min(config.max_sentences, count))
+
+
+def _fill(template: str, rng: random.Random, topic: str) -> str:
+    return template.format(
+        topic=topic,
+        system=rng.choice(SYSTEMS),
+        project=rng.choice(PROJECTS),
+        person=rng.choice(SPECIALISTS)["name"],
+        percent=rng.randint(5, 95)
+    )
+
+
+def _add_noise(rng: random.Random, sentences: List[str]) -> None:
+    """Insert one artefact the cleaning agent has to deal with"""
+    position = rng.randrange(len(sentences) + 1)
+    kind = rng.randrange(6)
+    if kind == 0:
+        sentences.insert(position, f"Details at https://wiki.example.com/pages/{rng.randint(1000, 9999)}.")
+    elif kind == 1:
+        sentences.insert(position, f"Contact ops{rng.randint(1, 99)}@example.com for access.")
+    elif kind == 2:
+        sentences.insert(position, "The teamâ€™s â€œquick fixâ€ did not last.")
+    elif kind == 3:
+        sentences.insert(position, f"Users call it the \"{rng.choice(['grey screen', 'long wait', 'double login'])}\" problem.")
+    elif kind == 4 and sentences:
+        # Repeated sentence, removed again by duplicate removal
+        sentences.insert(position, rng.choice(sentences))
+    else:
+        sentences.insert(position, "Status: ### ~~~ *** (see ticket) — “pending” …")
+
+
+def _build_content(rng: random.Random, config: CorpusConfig, category: str, sentiment: str) -> str:
+    topics = CATEGORY_TOPICS[category]
+    sentences = []
+
+    samples = POSITIVE_OUTCOMES if sentiment == "positive" else CATEGORY_SAMPLES.get(category)
+    if samples and rng.random() < 0.3:
+        sentences.append(rng.choice(samples))
+
+    for _ in range(_sentence_count(rng, config) - len(sentences)):
+        roll = rng.random()
+        if roll < 0.15:
+            template = rng.choice(TOPIC_TEMPLATES)
+        elif sentiment == "mixed":
+            template = rng.choice(SENTIMENT_TEMPLATES[rng.choice(("positive", "negative"))])
+        elif roll < 0.3:
+            template = rng.choice(SENTIMENT_TEMPLATES["neutral"])
+        else:
+            template = rng.choice(SENTIMENT_TEMPLATES[sentiment])
+        sentences.append(_fill(template, rng, rng.choice(topics)))
+
+    if rng.random() < config.noise_rate:
+        _add_noise(rng, sentences)
+
+    # Sentences are joined into paragraphs to exercise whitespace handling
+    paragraphs = []
+    while sentences:
+        size = rng.randint(1, 6)
+        paragraphs.append(" ".join(sentences[:size]))
+        sentences = sentences[size:]
+    return "\n\n".join(paragraphs)
+
+
+def _make_near_duplicate(rng: random.Random, content: str) -> str:
+    """Small edits that keep the document recognisably the same"""
+    for old, new in rng.sample(NEAR_DUPLICATE_SUBSTITUTIONS, 3):
+        content = content.replace(old, new, 1)
+    if rng.random() < 0.5:
+        content += f" Update {rng.randint(1, 9)}: no further changes."
+    return content
+
+
+def _make_malformed(rng: random.Random, record: Dict[str, Any]) -> Any:
+    kind = rng.choice(MALFORMED_KINDS)
+    if kind == "missing_content":
+        del record["content"]
+    elif kind == "empty_content":
+        record["content"] = "   "
+    elif kind == "too_short":
+        record["content"] = "Bad."
+    elif kind == "symbols_only":
+        record["content"] = "#### !!! ???? ---- **** //// ~~~~ ++++ 1"
+    elif kind == "empty_filename":
+        record["filename"] = " "
+    elif kind == "invalid_timestamp":
+        record["timestamp"] = "not-a-date"
+    elif kind == "non_string_content":
+        record["content"] = {"text": record["content"]}
+    else:
+        return record["content"]
+    record["metadata"]["malformed"] = kind
+    return record
+
+
+def _base_record(config: CorpusConfig, index: int) -> Dict[str, Any]:
+    """The well-formed document at index, before duplication and corruption"""
+    rng = _document_rng(config.seed, index)
+    category = _weighted_choice(rng, config.category_mix)
+    sentiment = _weighted_choice(rng, config.sentiment_mix)
+    source = rng.choice(FEEDBACK_SOURCES)
+    specialist = rng.choice(SPECIALISTS)
+    project = rng.choice(PROJECTS)
+    timestamp = config.start_date + timedelta(seconds=rng.uniform(0, config.timestamp_spread_days * 86400))
+
+    content = _build_content(rng, config, category, sentiment)
+    if source in SOURCE_PHRASES and rng.random() < 0.5:
+        content += " " + SOURCE_PHRASES[source]
+    if rng.random() < config.non_english_rate:
+        content = " ".join(rng.sample(FOREIGN_SENTENCES, 2))
+
+    filename = SOURCE_FILENAMES[source].format(
+        date=timestamp.strftime("%Y%m%d"),
+        project=project,
+        department=specialist["department"].lower(),
+        system=rng.choice(SYSTEMS).lower().replace(" ", "_"),
+        category=category
+    )
+    # Source left for the collection agent to detect from filename and content
+    if rng.random() < 0.3:
+        filename = f"notes_{index}.txt"
+
+    return {
+        "id": f"fb{index:08d}",
+        "filename": filename,
+        "content": content,
+        "content_type": "text/plain",
+        "source": source,
+        "timestamp": timestamp.isoformat(),
+        "metadata": {
+            "specialist": specialist["name"],
+            "role": specialist["role"],
+            "department": specialist["department"],
+            "category": category,
+            "sentiment": sentiment,
+            "priority": rng.choice(["low", "medium", "high", "critical"]),
+            "project_id": project
+        }
+    }
+
+
+def generate_document(config: CorpusConfig, index: int) -> Any:
+    """
+    Generate the document at index. Usually a FeedbackDocument dict; malformed
+    records may lack fields, carry wrong types or be a bare string.
+    """
+    record = _base_record(config, index)
+    rng = _document_rng(config.seed, -1 - index)
+
+    roll = rng.random()
+    if index > 0 and roll < config.duplicate_rate + config.near_duplicate_rate:
+        original = _base_record(config, rng.randrange(index))
+        record["content"] = original["content"]
+        record["metadata"]["duplicate_of"] = original["id"]
+        if roll >= config.duplicate_rate:
+            record["content"] = _make_near_duplicate(rng, record["content"])
+            record["metadata"]["near_duplicate"] = True
+
+    if rng.random() < config.malformed_rate:
+        return _make_malformed(rng, record)
+    return record
+
+
+def iter_corpus(config: CorpusConfig, start: int = 0, stop: Optional[int] = None) -> Iterator[Any]:
+    """Stream documents [start, stop) of the corpus"""
+    stop = config.num_documents if stop is None else min(stop, config.num_documents)
+    for index in range(start, stop):
+        yield generate_document(config, index)
+
+
+def write_corpus(
+    config: CorpusConfig,
+    output: str,
+    shard_size: Optional[int] = None,
+    shard: Optional[int] = None
+) -> List[Path]:
+    """
+    Write the corpus as JSONL. With shard_size, output is a directory of
+    part-NNNNN.jsonl files of shard_size documents each; shard limits the
+    run to one of them, so shards can be generated in parallel.
+    """
+    output_path = Path(output)
+    if not shard_size:
+        ranges = [(output_path, 0, config.num_documents)]
+    else:
+        output_path.mkdir(parents=True, exist_ok=True)
+        shard_count = max(math.ceil(config.num_documents / shard_size), 1)
+        numbers = range(shard_count) if shard is None else [shard]
+        ranges = [
+            (output_path / f"part-{number:05d}.jsonl", number * shard_size, (number + 1) * shard_size)
+            for number in numbers
+        ]
+
+    written = []
+    for path, start, stop in ranges:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for document in iter_corpus(config, start, stop):
+                f.write(json.dumps(document, ensure_ascii=False) + "\n")
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a large deterministic synthetic feedback corpus")
+    parser.add_argument("-n", "--num-documents", type=int, default=1000, help="Number of documents (default: 1000)")
+    parser.add_argument("-o", "--output", default="sample_data/corpus.jsonl",
+                        help="Output file, or directory when sharding (default: sample_data/corpus.jsonl)")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed (default: 42)")
+    parser.add_argument("--shard-size", type=int, default=None, help="Documents per shard file")
+    parser.add_argument("--shard", type=int, default=None, help="Only write this shard number")
+    parser.add_argument("--length-distribution", choices=LENGTH_DISTRIBUTIONS, default="lognormal",
+                        help="Sentences per document distribution (default: lognormal)")
+    parser.add_argument("--mean-sentences", type=float, default=4.0,
+                        help="Sentences per document for fixed, median for lognormal (default: 4)")
+    parser.add_argument("--min-sentences", type=int, default=1, help="Lower sentence bound (default: 1)")
+    parser.add_argument("--max-sentences", type=int, default=60, help="Upper sentence bound (default: 60)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="Share of exact duplicates (default: 0)")
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.0,
+                        help="Share of lightly edited duplicates (default: 0)")
+    parser.add_argument("--category-mix", type=parse_mix, default=None,
+                        help="Category weights, e.g. technical_issues=3,communication=1 (default: uniform)")
+    parser.add_argument("--sentiment-mix", type=parse_mix, default=None,
+                        help="Sentiment weights, e.g. positive=1,negative=2,neutral=1,mixed=0.5")
+    parser.add_argument("--start-date", type=datetime.fromisoformat, default=datetime(2024, 1, 1),
+                        help="Earliest timestamp (default: 2024-01-01)")
+    parser.add_argument("--spread-days", type=float, default=60.0,
+                        help="Timestamps fall within this many days of the start date (default: 60)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of malformed records (default: 0)")
+    parser.add_argument("--non-english-rate", type=float, default=0.01,
+                        help="Share of non-English documents (default: 0.01)")
+
+    args = parser.parse_args()
+    options = {
+        "num_documents": args.num_documents,
+        "seed": args.seed,
+        "length_distribution": args.length_distribution,
+        "mean_sentences": args.mean_sentences,
+        "min_sentences": args.min_sentences,
+        "max_sentences": args.max_sentences,
+        "duplicate_rate": args.duplicate_rate,
+        "near_duplicate_rate": args.near_duplicate_rate,
+        "start_date": args.start_date,
+        "timestamp_spread_days": args.spread_days,
+        "malformed_rate": args.malformed_rate,
+        "non_english_rate": args.non_english_rate
+    }
+    if args.category_mix:
+        options["category_mix"] = args.category_mix
+    if args.sentiment_mix:
+        options["sentiment_mix"] = args.sentiment_mix
+
+    paths = write_corpus(CorpusConfig(**options), args.output, args.shard_size, args.shard)
+    print(f"Wrote corpus of {args.num_documents} documents (seed {args.seed}) to {len(paths)} file(s)")
+    for path in paths:
+        print(f"  {path}")
@@ -0,0 +1,70 @@
+"""
+Tests for pipeline admission control
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.admission import AdmissionController, AdmissionRejected
+
+
+@pytest.mark.asyncio
+async def test_clients_are_served_round_robin_and_overflow_is_rejected():
+    """A client with many queued batches does not delay another client's batch behind all of them"""
+    admission = AdmissionController(max_pipelines=1, max_inflight_documents=100, max_queue=4)
+    started = []
+    release = asyncio.Event()
+
+    async def run(client_id, name, documents=10):
+        async with admission.slot(client_id, documents):
+            started.append(name)
+            await release.wait()
+
+    first = asyncio.create_task(run('a', 'a0'))
+    await asyncio.sleep(0)
+    queued = [asyncio.create_task(run('a', f'a{i}')) for i in range(1, 4)]
+    await asyncio.sleep(0)
+    queued.append(asyncio.create_task(run('b', 'b1')))
+    await asyncio.sleep(0)
+
+    status = admission.status()
+    assert status['running'] == 1 and status['queue_depth'] == 4
+    assert status['queue_depth_by_client'] == {'a': 3, 'b': 1}
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire('c', 10)
+    assert rejected.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(first, *queued)
+    assert started == ['a0', 'a1', 'b1', 'a2', 'a3']
+
+    status = admission.status()
+    assert status['running'] == 0 and status['inflight_documents'] == 0 and status['queue_depth'] == 0
+    assert status['admitted'] == 5 and status['rejected'] == 1 and status['queued'] == 4
+
+
+@pytest.mark.asyncio
+async def test_inflight_documents_are_bounded():
+    admission = AdmissionController(max_pipelines=4, max_inflight_documents=100, max_queue=4)
+    await admission.acquire('a', 60)
+    waiting = asyncio.create_task(admission.acquire('b', 60))
+    await asyncio.sleep(0)
+    assert not waiting.done() and admission.inflight_documents == 60
+
+    admission.release(60)
+    await waiting
+    assert admission.inflight_documents == 60
+
+    # A batch above the limit runs alone
+    oversized = asyncio.create_task(admission.acquire('c', 500))
+    await asyncio.sleep(0)
+    assert not oversized.done()
+    admission.release(60)
+    await oversized
+    assert admission.running == 1 and admission.inflight_documents == 500
+    assert admission.status()['mean_wait_seconds'] >= 0
@@ -0,0 +1,95 @@
+"""
+Tests for the agent execution contract
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.data_cleaning import DataCleaningAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from models.feedback_models import FeedbackDocument
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+from utils.execution import AgentExecution, agent_execution
+
+
+async def run_with_ticker(coroutine):
+    """Result of coroutine and how often a concurrent task got to run meanwhile"""
+    ticks = 0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    try:
+        result = await coroutine
+    finally:
+        done.set()
+        await task
+    return result, ticks
+
+
+@pytest.mark.asyncio
+async def test_loop_stays_responsive_with_identical_results():
+    """Inline or offloaded, batches yield to the loop and produce the same results as the sync cores"""
+    documents = [FeedbackDocument(**item) for item in iter_corpus(CorpusConfig(num_documents=300, seed=11))]
+    cleaning = DataCleaningAgent()
+    sentiment = SentimentAnalysisAgent()
+
+    expected_cleaned = cleaning.clean_batch(documents, return_records=True)
+    expected = sentiment.analyze_batch(expected_cleaned, return_records=True)
+
+    settings = (agent_execution.offload, agent_execution.yield_every)
+    try:
+        for offload in (False, True):
+            agent_execution.configure(offload=offload, yield_every=50)
+            cleaned, cleaning_ticks = await run_with_ticker(
+                cleaning.clean_documents({'documents': documents, 'return_records': True})
+            )
+            results, sentiment_ticks = await run_with_ticker(
+                sentiment.analyze_sentiment({'documents': cleaned, 'return_records': True})
+            )
+            assert cleaning_ticks >= 6 and sentiment_ticks >= 6
+            assert [doc.cleaned_content for doc in cleaned] == [doc.cleaned_content for doc in expected_cleaned]
+            assert [(r.document_id, r.sentiment_score, r.sentiment_breakdown) for r in results] == \
+                [(r.document_id, r.sentiment_score, r.sentiment_breakdown) for r in expected]
+        assert agent_execution.offloaded_calls > 0
+    finally:
+        agent_execution.configure(offload=settings[0], yield_every=settings[1])
+        agent_execution.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_single_worker_and_whole_batches():
+    """Offloaded work runs on one thread, and whole batches are handed over in one call"""
+    execution = AgentExecution(offload=True, yield_every=2)
+    threads = set()
+
+    def record_thread():
+        threads.add(threading.get_ident())
+
+    try:
+        await asyncio.gather(*(execution.run(record_thread) for _ in range(8)))
+    finally:
+        execution.shutdown()
+    assert len(threads) == 1 and threading.get_ident() not in threads
+    execution.configure(offload=False)
+
+    calls = []
+
+    def double(items):
+        calls.append(len(items))
+        return [item * 2 for item in items]
+
+    assert await execution.map_slices(double, [1, 2, 3, 4, 5]) == [2, 4, 6, 8, 10]
+    assert await execution.map_slices(double, [1, 2, 3, 4, 5], whole=True) == [2, 4, 6, 8, 10]
+    assert calls == [2, 2, 1, 5]
@@ -0,0 +1,64 @@
+"""
+Tests for the trainable categorization model backend
+"""
+
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.category_model import CategoryModel
+from agents.categorization import CategorizationAgent
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+from train_category_model import build_training_set
+from workflow.workflow_manager import WorkflowManager
+
+
+@pytest.mark.asyncio
+async def test_train_save_load_and_blend(tmp_path):
+    """A saved model reloads with the same scores and is used by the agent in both modes"""
+    texts, labels, pseudo_labelled = await build_training_set(
+        list(iter_corpus(CorpusConfig(num_documents=400, seed=3))), labelled_only=True
+    )
+    assert pseudo_labelled == 0 and len(texts) == 400
+
+    path = tmp_path / "category_model.joblib"
+    model = CategoryModel.train(texts, labels)
+    model.save(str(path))
+    loaded = CategoryModel.load(str(path))
+    assert np.array_equal(loaded.predict_scores(texts[:50], batch_size=16), model.predict_scores(texts[:50]))
+
+    artifact = joblib.load(path)
+    artifact['version'] += 1
+    joblib.dump(artifact, path)
+    with pytest.raises(ValueError):
+        CategoryModel.load(str(path))
+
+    model.save(str(path))
+    items = list(iter_corpus(CorpusConfig(num_documents=100, seed=8)))
+    gold = {item['id']: item['metadata']['category'] for item in items}
+    manager = WorkflowManager()
+    collected = await manager._run_data_collection(items)
+    documents = (await manager._run_data_cleaning(collected['documents']))['cleaned_documents']
+
+    accuracy = {}
+    for name, agent in [
+        ('patterns', CategorizationAgent()),
+        ('blend', CategorizationAgent(model_path=str(path))),
+        ('model', CategorizationAgent('matrix', model_path=str(path), model_weight=1.0))
+    ]:
+        await agent.initialize()
+        results = await agent.categorize_feedback({'documents': documents, 'return_records': True})
+        assert len(results) == len(documents)
+        accuracy[name] = sum(r.primary_category.value == gold[r.document_id] for r in results) / len(results)
+    assert accuracy['model'] > accuracy['patterns']
+    assert accuracy['blend'] > accuracy['patterns']
+
+    # A missing artifact leaves the agent on the patterns
+    agent = CategorizationAgent(model_path=str(tmp_path / "missing.joblib"))
+    await agent.initialize()
+    assert agent.category_model is None
@@ -0,0 +1,84 @@
+"""
+Tests for chunked runs with checkpoint/resume
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.report_generation import ReportGenerationAgent
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+from workflow.workflow_manager import WorkflowManager
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_finished_chunks(tmp_path):
+    """A failed chunked run resumes from its checkpoint and matches an unchunked run"""
+    items = list(iter_corpus(CorpusConfig(num_documents=9, seed=3)))
+
+    plain = WorkflowManager()
+    plain.report_generation_agent = ReportGenerationAgent(str(tmp_path / "reports"))
+    await plain.initialize()
+    expected = await plain.process_feedback([dict(item) for item in items], task_id="plain")
+
+    chunked = WorkflowManager(chunk_size=2, checkpoint_dir=str(tmp_path))
+    chunked.report_generation_agent = ReportGenerationAgent(str(tmp_path / "reports"))
+    await chunked.initialize()
+    generate = chunked.recommendation_agent.generate_recommendations
+
+    async def fail(insights):
+        raise RuntimeError("interrupted")
+
+    chunked.recommendation_agent.generate_recommendations = fail
+    failed = await chunked.process_feedback([dict(item) for item in items], task_id="run")
+    assert failed['status'] == 'error'
+    assert (tmp_path / "run" / "manifest.json").exists()
+
+    chunked.recommendation_agent.generate_recommendations = generate
+    changed = [dict(item) for item in items]
+    changed[0]['content'] = changed[0]['content'] + " Follow-up: the dashboard is excellent."
+    resumed = await chunked.process_feedback(changed, task_id="run", resume=True)
+
+    chunks = resumed['processing_stats']['agent_stats']['chunks']
+    assert resumed['status'] == 'success'
+    assert chunks['total'] == (len(items) + 1) // 2
+    assert chunks['resumed'] == chunks['total'] - 1
+    assert resumed['processing_stats']['documents_processed'] == expected['processing_stats']['documents_processed']
+    assert not (tmp_path / "run").exists()
+
+
+@pytest.mark.asyncio
+async def test_failed_chunks_are_checkpointed_with_their_dead_letters(tmp_path):
+    """A chunk of malformed items is checkpointed empty, and a resumed run still reports its dead letters"""
+    items = [dict(item) for item in iter_corpus(CorpusConfig(num_documents=4, seed=5))]
+    items[2:2] = [
+        {'id': 'malformed', 'filename': 'malformed.txt', 'content': None},
+        {'id': 'too_short', 'filename': 'short.txt', 'content': 'ok'}
+    ]
+
+    chunked = WorkflowManager(chunk_size=2, checkpoint_dir=str(tmp_path))
+    chunked.report_generation_agent = ReportGenerationAgent(str(tmp_path / "reports"))
+    await chunked.initialize()
+    generate = chunked.recommendation_agent.generate_recommendations
+
+    async def fail(insights):
+        raise RuntimeError("interrupted")
+
+    chunked.recommendation_agent.generate_recommendations = fail
+    failed = await chunked.process_feedback([dict(item) for item in items], task_id="run")
+    assert failed['status'] == 'error' and 'interrupted' in failed['message']
+
+    chunked.recommendation_agent.generate_recommendations = generate
+    resumed = await chunked.process_feedback([dict(item) for item in items], task_id="run", resume=True)
+
+    stats = resumed['processing_stats']
+    assert resumed['status'] == 'success'
+    assert stats['agent_stats']['chunks']['resumed'] == 3
+    assert stats['documents_processed'] == 4
+    assert stats['failed_documents'] == 2
+    letters = Path(resumed['dead_letter']).read_text().splitlines()
+    assert sorted(json.loads(line)['document_id'] for line in letters) == ['malformed', 'too_short']
@@ -0,0 +1,125 @@
+"""
+Tests for per-document fault isolation
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.categorization import CategorizationAgent
+from agents.data_cleaning import DataCleaningAgent
+from agents.data_collection import DataCollectionAgent
+from agents.insight_generation import InsightGenerationAgent
+from agents.master_orchestrator import MasterOrchestratorAgent
+from agents.recommendation import RecommendationAgent
+from agents.report_generation import ReportGenerationAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from models.feedback_models import FeedbackDocument
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+from utils.dead_letter import DeadLetterQueue
+from workflow.workflow_manager import WorkflowManager
+
+
+@pytest.mark.asyncio
+async def test_failed_documents_are_retried_counted_and_dead_lettered(tmp_path):
+    documents = [FeedbackDocument(**item) for item in iter_corpus(CorpusConfig(num_documents=60, seed=8))]
+    documents.append(FeedbackDocument(id="too_short", filename="short.txt", content="ok"))
+    flaky_ids = {documents[3].id, documents[10].id}
+    broken_id = documents[20].id
+
+    sentiment = SentimentAnalysisAgent()
+    analyze = sentiment._analyze_single_document
+    calls = {}
+
+    def failing_analysis(doc, backend_score=None):
+        calls[doc.original_id] = calls.get(doc.original_id, 0) + 1
+        if doc.original_id in flaky_ids and calls[doc.original_id] == 1:
+            raise TimeoutError("model server timed out")
+        if doc.original_id == broken_id:
+            raise ValueError("malformed document")
+        return analyze(doc, backend_score)
+
+    sentiment._analyze_single_document = failing_analysis
+
+    orchestrator = MasterOrchestratorAgent(retry_backoff_seconds=0)
+    await orchestrator.initialize({
+        'data_collection': DataCollectionAgent(),
+        'data_cleaning': DataCleaningAgent(),
+        'sentiment_analysis': sentiment,
+        'categorization': CategorizationAgent(),
+        'insight_generation': InsightGenerationAgent(),
+        'recommendation': RecommendationAgent(),
+        'report_generation': ReportGenerationAgent(output_dir=str(tmp_path))
+    })
+    result = await orchestrator.process_feedback_pipeline(documents)
+
+    # The flaky documents recovered on retry; the broken and the rejected one did not
+    assert all(calls[doc_id] == 2 for doc_id in flaky_ids)
+    assert calls[broken_id] == 1
+    assert result.total_documents == 61
+    assert result.processed_documents == 59
+    assert result.failed_documents == 2
+    assert {r.document_id for r in result.sentiment_results} >= flaky_ids
+
+    letters = [json.loads(line) for line in Path(result.dead_letter_path).read_text().splitlines()]
+    assert sorted((letter['stage'], letter['document_id'], letter['transient']) for letter in letters) == [
+        ('data_collection', 'too_short', False),
+        ('sentiment_analysis', broken_id, False)
+    ]
+    broken = next(letter for letter in letters if letter['document_id'] == broken_id)
+    assert broken['error_type'] == 'ValueError' and broken['document']['original_id'] == broken_id
+
+
+@pytest.mark.asyncio
+async def test_document_failing_again_in_a_later_stage_is_not_recovered():
+    queue = DeadLetterQueue(max_retries=1, backoff_seconds=0)
+    flaky = FeedbackDocument(id="flaky", filename="flaky.txt", content="Retried and fine this time.")
+    broken = FeedbackDocument(id="broken", filename="broken.txt", content="Retried, then malformed downstream.")
+    for doc in (flaky, broken):
+        queue.record('data_cleaning', doc, TimeoutError("cleaning timed out"))
+
+    async def replay(batch):
+        assert [doc.id for doc in batch['data_cleaning']] == ["flaky", "broken"]
+        # Cleaning succeeds this time, sentiment analysis fails on one of them
+        queue.record('sentiment_analysis', broken, ValueError("malformed document"))
+
+    assert await queue.retry(replay) == 1
+    assert queue.failed_ids() == {"broken"}
+    assert list(queue.letters) == [('sentiment_analysis', "broken")]
+    assert queue.letters[('sentiment_analysis', "broken")].attempts == 2
+    assert queue.stats()['recovered'] == 1 and not queue.retrying
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('chunk_size', [0, 4])
+async def test_workflow_retries_transient_failures(tmp_path, chunk_size):
+    """A failure that goes away on the second try is recovered by CLI runs, chunked or not"""
+    items = [dict(item) for item in iter_corpus(CorpusConfig(num_documents=10, seed=4))]
+    flaky_id = items[5]['id']
+
+    manager = WorkflowManager(chunk_size=chunk_size, checkpoint_dir=str(tmp_path), retry_backoff_seconds=0)
+    manager.report_generation_agent = ReportGenerationAgent(str(tmp_path / "reports"))
+    await manager.initialize()
+    clean = manager.data_cleaning_agent._clean_single_document
+    calls = []
+
+    def failing_cleaning(doc):
+        calls.append(doc.id)
+        if doc.id == flaky_id and calls.count(doc.id) == 1:
+            raise ConnectionError("storage unavailable")
+        return clean(doc)
+
+    manager.data_cleaning_agent._clean_single_document = failing_cleaning
+    result = await manager.process_feedback(items, task_id="run")
+
+    stats = result['processing_stats']
+    assert result['status'] == 'success'
+    assert calls.count(flaky_id) == 2
+    assert 'dead_letter' not in result and stats['failed_documents'] == 0
+    assert stats['agent_stats']['dead_letters']['recovered'] == 1
+    assert stats['agent_stats']['sentiment_analysis']['documents_analyzed'] == 10
+    assert flaky_id in {r.document_id for r in manager.sentiment_results}
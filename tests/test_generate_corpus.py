@@ -0,0 +1,43 @@
+"""
+Tests for the synthetic corpus generator
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sample_data.generate_corpus import CorpusConfig, generate_document, iter_corpus, write_corpus
+
+
+def test_corpus_is_deterministic_and_shardable(tmp_path):
+    """Same settings give the same documents, and shards concatenate to the full corpus"""
+    config = CorpusConfig(num_documents=50, seed=7, duplicate_rate=0.1, near_duplicate_rate=0.1, malformed_rate=0.1)
+    assert list(iter_corpus(config)) == list(iter_corpus(config))
+    assert generate_document(config, 42) == list(iter_corpus(config))[42]
+
+    (single,) = write_corpus(config, str(tmp_path / "corpus.jsonl"))
+    shards = write_corpus(config, str(tmp_path / "shards"), shard_size=16)
+    assert [path.name for path in shards] == [f"part-{i:05d}.jsonl" for i in range(4)]
+    assert "".join(path.read_text(encoding="utf-8") for path in shards) == single.read_text(encoding="utf-8")
+
+
+def test_corpus_knobs():
+    """Duplicates copy earlier documents, malformed records are marked and mixes are respected"""
+    mixes = {"sentiment_mix": {"negative": 1.0}, "category_mix": {"training_needs": 1.0}}
+    config = CorpusConfig(num_documents=400, seed=1, duplicate_rate=0.2, malformed_rate=0.1, **mixes)
+    clean_config = CorpusConfig(num_documents=400, seed=1, **mixes)
+    documents = list(iter_corpus(config))
+    records = [doc for doc in documents if isinstance(doc, dict)]
+
+    duplicates = [doc for doc in records if "duplicate_of" in doc["metadata"] and "malformed" not in doc["metadata"]]
+    assert duplicates
+    for doc in duplicates:
+        original_id = doc["metadata"]["duplicate_of"]
+        assert original_id < doc["id"]
+        assert doc["content"] == generate_document(clean_config, int(original_id[2:]))["content"]
+
+    malformed = len(documents) - sum(1 for doc in records if "malformed" not in doc["metadata"])
+    assert 20 <= malformed <= 60
+    assert {doc["metadata"]["category"] for doc in records} == {"training_needs"}
+    assert {doc["metadata"]["sentiment"] for doc in records} == {"negative"}
@@ -0,0 +1,60 @@
+"""
+Tests for windowed scoring of oversized documents and the per-document time budget
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.categorization import CategorizationAgent
+from agents.data_cleaning import DataCleaningAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from models.feedback_models import FeedbackDocument
+from utils.guardrails import OverrunLog, split_windows, tracking_overruns
+
+SENTENCES = [
+    "The new dashboard is excellent and the team did outstanding work.",
+    "Users reported a serious issue with the export, which needs immediate attention and urgent action.",
+    "According to the report, the process involves several review steps."
+]
+
+
+def test_windows_cover_the_text_and_end_at_sentences():
+    text = ' '.join(SENTENCES * 50)
+    windows = split_windows(text, 1000)
+    assert ''.join(windows) == text
+    assert all(len(window) <= 1000 for window in windows)
+    assert all(window.endswith('. ') for window in windows[:-1])
+    assert split_windows('short', 1000) == ['short']
+
+
+@pytest.mark.asyncio
+async def test_oversized_documents_are_segmented_and_budget_overruns_recorded():
+    # Distinct sentences, since cleaning drops repeated ones
+    text = ' '.join(f"In review {i}, {sentence[0].lower()}{sentence[1:]}" for i in range(400) for sentence in SENTENCES)
+    documents = [FeedbackDocument(id='long', filename='long.txt', content=text)]
+    cleaned = await DataCleaningAgent().clean_documents({'documents': documents})
+
+    whole = (await SentimentAnalysisAgent().analyze_sentiment({'documents': cleaned}))[0]
+    segmented_agent = SentimentAnalysisAgent(segment_chars=4000)
+    segmented = (await segmented_agent.analyze_sentiment({'documents': cleaned}))[0]
+    # Every window repeats the same sentences, so the windows agree with the whole document
+    assert segmented.overall_sentiment == whole.overall_sentiment
+    assert segmented.sentiment_score == pytest.approx(whole.sentiment_score, abs=0.05)
+    assert segmented_agent.guardrails.segmented_documents == 1
+
+    with tracking_overruns(OverrunLog()) as overruns:
+        sentiment = await SentimentAnalysisAgent(segment_chars=4000, time_budget_seconds=1e-9).analyze_sentiment(
+            {'documents': cleaned}
+        )
+        categories = await CategorizationAgent(segment_chars=4000, time_budget_seconds=1e-9).categorize_feedback(
+            {'documents': cleaned}
+        )
+    # Cut short after the first window, but still scored
+    assert len(sentiment) == 1 and len(categories) == 1 and categories[0].topics
+    assert overruns.document_ids() == ['long']
+    assert sorted((o.stage, o.windows_scored) for o in overruns) == [('categorization', 1), ('sentiment_analysis', 1)]
+    assert all(o.windows > 1 for o in overruns)
@@ -0,0 +1,79 @@
+"""
+Tests for the insight rule engine
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.insight_generation import InsightGenerationAgent
+from agents.insight_rules import FEATURES, FeatureTable, InsightRule
+from models.feedback_models import InsightData
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+from utils.term_sketch import TermSketch
+from workflow.workflow_manager import WorkflowManager
+
+
+async def batch_results():
+    manager = WorkflowManager()
+    await manager.initialize()
+    stages = await manager._run_document_stages(list(iter_corpus(CorpusConfig(num_documents=60, seed=11))))
+    return {
+        'documents': stages['cleaned_documents'],
+        'sentiment_results': stages['sentiment_results'],
+        'categorization_results': stages['categorization_results']
+    }
+
+
+@pytest.mark.asyncio
+async def test_rules_evaluate_against_one_feature_table():
+    """Features come from a single table, and concurrent rules match evaluating them in turn"""
+    data = await batch_results()
+    agent = InsightGenerationAgent()
+    table = FeatureTable.from_results(
+        {doc.original_id: doc for doc in data['documents']},
+        {s.document_id: s for s in data['sentiment_results']},
+        {c.document_id: c for c in data['categorization_results']},
+        term_sketch=TermSketch()
+    )
+    features = table.features(FEATURES)
+    assert len(table.frame) == len(data['documents'])
+    assert sum(features['sentiment_counts'].values()) == len(data['sentiment_results'])
+    assert sum(features['category_counts'].values()) == len(data['categorization_results'])
+    assert features['category_scores']['count'].sum() == len(data['categorization_results'])
+
+    sequential = agent._filter_unique_insights([
+        insight for rule in agent.rule_engine.rules for insight in rule.evaluate(features, agent)
+    ])
+    insights = await agent.generate_insights(data)
+    await agent.shutdown()
+    assert insights
+    assert [i.model_dump() for i in insights] == [i.model_dump() for i in sequential]
+
+
+@pytest.mark.asyncio
+async def test_insight_types_config_selects_rules():
+    """Disabled insight types are skipped and registered rules run on the shared features"""
+    data = await batch_results()
+    agent = InsightGenerationAgent()
+    agent.insight_types['feedback_quality']['enabled'] = False
+    agent.insight_types['anomaly']['enabled'] = True
+    agent.rule_engine.register(InsightRule(
+        'large_batch', 'anomaly', ('document_count',),
+        lambda features, settings: [InsightData(
+            insight_type='anomaly',
+            description=f"Batch of {features['document_count']} documents",
+            frequency=features['document_count']
+        )]
+    ))
+    insights = await agent.generate_insights(data)
+    await agent.shutdown()
+
+    types = {insight.insight_type for insight in insights}
+    assert 'feedback_quality' not in types
+    assert any(insight.description == "Batch of 60 documents" for insight in insights)
+    with pytest.raises(ValueError):
+        agent.rule_engine.register(InsightRule('broken', 'anomaly', ('no_such_feature',), lambda f, s: []))
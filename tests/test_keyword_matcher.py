@@ -0,0 +1,29 @@
+"""
+Tests for the Aho-Corasick keyword matcher
+"""
+
+import re
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.keyword_matcher import KeywordMatcher
+
+
+def test_finds_overlapping_substrings():
+    """Classic Aho-Corasick example: every overlapping occurrence is reported"""
+    matcher = KeywordMatcher(['he', 'she', 'his', 'hers'], whole_words=False)
+    matches = [(m.start, m.keyword) for m in matcher.find_all('ushers')]
+    assert matches == [(1, 'she'), (2, 'he'), (2, 'hers')]
+
+
+def test_whole_words_match_regex_word_boundaries():
+    """Whole-word matching agrees with the \\b(?:...)\\b patterns it replaces"""
+    terms = ['process', 'system', 'technical issue', 'cost']
+    text = "Processing costs: the system's process, a technical issue; subsystem cost_center cost"
+    pattern = r'\b(?:' + '|'.join(re.escape(t) for t in terms) + r')\b'
+
+    matcher = KeywordMatcher(terms)
+    assert matcher.matched_keywords(text) == set(re.findall(pattern, text.lower()))
+    assert [m.keyword for m in matcher.find_all(text)] == ['system', 'process', 'technical issue', 'cost']
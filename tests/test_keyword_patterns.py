@@ -0,0 +1,51 @@
+"""
+Tests for batch category scoring with the keyword pattern matrix
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.categorization import CategorizationAgent
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+from utils.keyword_patterns import CategoryKeywordMatrix, expand_alternative
+from workflow.workflow_manager import WorkflowManager
+
+SAMPLE = Path(__file__).parent.parent / "sample_data" / "sample.jsonl"
+
+
+def test_expand_alternative():
+    assert expand_alternative("doesn\\'?t work") == ["doesn't work", "doesnt work"]
+    assert expand_alternative("time.?consuming") == ["timeconsuming", "time consuming"]
+    with pytest.raises(ValueError):
+        CategoryKeywordMatrix({'x': [(r'\b(?:slow|lag+)\b', 0.5)]})
+
+
+@pytest.mark.asyncio
+async def test_matrix_scores_match_patterns():
+    """Batch matrix scores equal _rule_based_categorization on the test corpus"""
+    items = [json.loads(line) for line in SAMPLE.read_text(encoding='utf-8').splitlines() if line.strip()]
+    items += list(iter_corpus(CorpusConfig(num_documents=300, seed=4, noise_rate=0.5)))
+    items.append({'content': "It doesn't work and doesnt work; the time-consuming, user friendly API takes too long. ROI!"})
+
+    manager = WorkflowManager()
+    await manager.initialize()
+    collected = await manager._run_data_collection(items)
+    documents = (await manager._run_data_cleaning(collected['documents']))['cleaned_documents']
+
+    patterns = CategorizationAgent()
+    matrix = CategorizationAgent(scoring_mode='matrix')
+    batch_scores = matrix._matrix_categorization(documents)
+    for doc, scores in zip(documents, batch_scores):
+        expected = patterns._rule_based_categorization(doc.cleaned_content.lower())
+        assert list(scores) == list(expected)
+        assert scores == pytest.approx(expected, abs=1e-12)
+
+    by_patterns = await patterns.categorize_feedback({'documents': documents, 'return_records': True})
+    by_matrix = await matrix.categorize_feedback({'documents': documents, 'return_records': True})
+    assert [r.primary_category for r in by_matrix] == [r.primary_category for r in by_patterns]
+    assert [r.category_confidence for r in by_matrix] == [r.category_confidence for r in by_patterns]
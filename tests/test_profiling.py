@@ -0,0 +1,95 @@
+"""
+Tests for the per-stage memory profiler
+"""
+
+import json
+import pstats
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.profiling import CpuProfilingControl, MemoryProfiler, profile_stage
+
+
+def test_memory_profiler_stages(tmp_path):
+    """Peaks are attributed to the stage that allocated, and nested peaks count for the parent"""
+    profiler = MemoryProfiler(top_n=3)
+    profiler.start()
+    try:
+        with profiler.stage("outer"):
+            kept = [bytes(1000) for _ in range(100)]
+            with profiler.stage("transient"):
+                buffer = bytearray(2_000_000)
+                del buffer
+    finally:
+        profiler.stop()
+    assert not tracemalloc.is_tracing()
+
+    stages = {stage['stage']: stage for stage in profiler.stages}
+    assert list(stages) == ["outer.transient", "outer"]
+    assert stages["outer.transient"]['peak_increase_bytes'] >= 2_000_000
+    assert stages["outer.transient"]['retained_bytes'] < 100_000
+    assert stages["outer"]['peak_bytes'] >= stages["outer.transient"]['peak_bytes']
+    assert stages["outer"]['retained_bytes'] >= 100_000
+    assert stages["outer"]['top_allocations'][0]['site'].startswith(__file__)
+    assert len(kept) == 100
+
+    path = profiler.write(tmp_path / "profile.json")
+    assert json.loads(Path(path).read_text())['peak_bytes'] >= 2_000_000
+
+    with profile_stage("disabled", None):
+        pass
+
+
+def test_memory_profiler_single_run():
+    """Only one profiler traces at a time; an overlapping run profiles nothing and leaves tracing alone"""
+    first, second = MemoryProfiler(), MemoryProfiler()
+    assert first.start()
+    try:
+        assert not second.start()
+        with second.stage("overlapping"):
+            pass
+        second.stop()
+        assert tracemalloc.is_tracing()
+        with first.stage("profiled"):
+            pass
+    finally:
+        first.stop()
+    assert not tracemalloc.is_tracing()
+    assert second.stages == [] and [stage['stage'] for stage in first.stages] == ["profiled"]
+
+    assert second.start()
+    second.stop()
+
+
+def test_cpu_profiling_control(tmp_path):
+    """An enabled control profiles the requested number of runs and writes pstats and collapsed stacks"""
+    control = CpuProfilingControl()
+    assert control.begin_run("off") is None
+
+    control.enable(mode="both", interval=0.001, runs=1)
+    profiler = control.begin_run("run1")
+    assert profiler is not None
+    assert control.begin_run("overlapping") is None
+
+    def busy():
+        return sum(i * i for i in range(200_000))
+
+    for _ in range(2):
+        with profile_stage("scoring", profiler):
+            busy()
+    files = control.end_run(profiler, tmp_path)
+
+    summary = json.loads(Path(files['summary']).read_text())
+    assert summary['stages']['scoring']['calls'] == 2
+    assert any('busy' in entry['function'] for entry in summary['stages']['scoring']['top_functions'])
+    assert pstats.Stats(files['scoring']).total_calls > 0
+    stacks = Path(files['collapsed']).read_text().splitlines()
+    assert stacks and all(line.startswith("scoring;") for line in stacks)
+
+    # The single requested run has been used up
+    assert not control.enabled
+    assert control.begin_run("run2") is None
+    assert control.status()['runs_profiled'] == 1
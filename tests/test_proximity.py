@@ -0,0 +1,68 @@
+"""
+Tests for the token proximity matcher of the sentiment patterns
+"""
+
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from utils.proximity import ProximityMatcher, parse_groups
+from utils.text_profile import TextProfile
+
+FILLER = ['the', 'team', 'report', 'export', 'was', 'and', 'it', 'we', "doesn't", 'to-do', 'on_call', 'tool', 'update']
+SEPARATORS = [' ', ' ', ' ', ', ', ' - ', '; ', ' "']
+
+
+def random_sentences(agent, count, seed):
+    """Sentences (no [.!?] inside) mixing the patterns' keywords with filler words"""
+    keywords = sorted({word for pattern in agent.pattern_matcher.patterns for group in parse_groups(pattern) for word in group})
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(count):
+        words = [rng.choice(keywords) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(rng.randint(1, 30))]
+        sentence = words[0]
+        for word in words[1:]:
+            sentence += rng.choice(SEPARATORS) + word
+        sentences.append(sentence + rng.choice(['', '.', '!', '?']))
+    return sentences
+
+
+def test_parse_groups():
+    assert parse_groups(r'\b(?:needs|requires)\b.*\b(?:urgent)\b') == [['needs', 'requires'], ['urgent']]
+    with pytest.raises(ValueError):
+        parse_groups(r'\b(?:needs|requires)\b\s+\b(?:urgent)\b')
+    with pytest.raises(ValueError):
+        parse_groups(r'\b(?:best practice)\b.*\b(?:urgent)\b')
+
+
+def test_matches_the_regexes_on_sentences():
+    agent = SentimentAnalysisAgent()
+    matcher = agent.pattern_matcher
+    for sentence in random_sentences(agent, 3000, seed=5):
+        expected = [len(re.findall(pattern, sentence, re.IGNORECASE)) for pattern in matcher.patterns]
+        assert matcher.counts(TextProfile.from_text(sentence)) == expected, sentence
+
+        # And so does the pattern score
+        score = sum(count * weight for count, weight in zip(expected, agent.pattern_weights))
+        total = sum(expected)
+        expected_score = (max(-1.0, min(1.0, score / total)), min(total / 10, 1.0)) if total else (0.0, 0.0)
+        assert agent._pattern_based_analysis(sentence) == pytest.approx(expected_score)
+
+
+def test_matches_are_counted_per_sentence_and_window():
+    matcher = ProximityMatcher([r'\b(?:needs|requires)\b.*\b(?:immediate|urgent)\b.*\b(?:attention|action)\b'])
+    text = "the portal needs urgent attention. it requires immediate action. attention needs urgent. needs. urgent attention"
+    # Order matters, and groups never pair up across sentences
+    assert matcher.counts(TextProfile.from_text(text)) == [2]
+
+    windowed = ProximityMatcher(matcher.patterns, window=4)
+    text = "it needs, after a long and careful review, urgent attention. it needs urgent attention"
+    assert windowed.counts(TextProfile.from_text(text)) == [1]
+    # A later start inside the window still matches
+    assert windowed.counts(TextProfile.from_text("needs to be done and needs urgent attention")) == [1]
@@ -0,0 +1,92 @@
+"""
+Tests for sentence-level sentiment scoring and its sentence score cache
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.data_cleaning import DataCleaningAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from models.feedback_models import FeedbackDocument
+from models.records import SentimentRecord
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+from utils.sentence_cache import SentenceScoreCache
+from workflow.transport import pack_records, unpack_records
+
+BOILERPLATE = (
+    "This report is confidential and intended only for the named recipients. "
+    "If you have questions about this assessment, contact the quality office. "
+)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SentenceScoreCache(capacity=2)
+    calls = []
+    score = lambda sentence: calls.append(sentence) or len(sentence)
+
+    cache.score("first", score)
+    cache.score("second", score)
+    cache.score("first", score)
+    cache.score("third", score)
+    assert cache.score("first", score) == 5
+    cache.score("second", score)
+    assert calls == ["first", "second", "third", "second"]
+    assert len(cache) == 2
+    assert cache.stats()['hits'] == 2
+
+
+@pytest.mark.asyncio
+async def test_sentence_level_scores_match_and_reuse_sentences():
+    """Cached sentence scores give the same results, with contributions summing to the context score"""
+    items = list(iter_corpus(CorpusConfig(num_documents=80, seed=9, mean_sentences=12)))
+    for item in items:
+        item['content'] = BOILERPLATE + item['content'] + ' ' + BOILERPLATE
+    documents = [FeedbackDocument(**item) for item in items]
+    cleaned = await DataCleaningAgent().clean_documents({'documents': documents, 'return_records': True})
+
+    expected = await SentimentAnalysisAgent().analyze_sentiment({'documents': cleaned, 'return_records': True})
+    agent = SentimentAnalysisAgent(sentence_level=True)
+    results = await agent.analyze_sentiment({'documents': cleaned, 'return_records': True})
+
+    for doc, result, reference in zip(cleaned, results, expected):
+        assert result.sentiment_score == reference.sentiment_score
+        assert result.sentiment_breakdown == reference.sentiment_breakdown
+        assert len(result.sentence_contributions) == doc.text_profile.sentence_count
+        context = result.sentiment_breakdown['context_score']
+        if -1.0 < context < 1.0:
+            assert sum(result.sentence_contributions) == pytest.approx(context)
+    # Every boilerplate sentence after the first document is a hit
+    assert agent.sentence_cache.hits >= 4 * (len(cleaned) - 1)
+
+    # Contributions survive the packed transfer used by the parallel workers
+    unpacked = unpack_records(pack_records(results, SentimentRecord), SentimentRecord)
+    assert [r.sentence_contributions for r in unpacked] == [r.sentence_contributions for r in results]
+
+
+def test_short_sentences_are_skipped_alike():
+    """Both paths skip sentences by their stripped length, whitespace runs included"""
+    agent = SentimentAnalysisAgent(sentence_level=True)
+    # "a   b" is 5 characters stripped, "c  d" 4
+    for content in ("the rollout went well. a   b. c  d. is it better now?", "a   b.  c  d"):
+        score, confidence, contributions = agent._sentence_level_analysis(content)
+        assert (score, confidence) == agent._context_aware_analysis(content)
+        assert len(contributions) == content.count('.') + content.count('?') + 1
+
+
+def test_cached_scores_match_on_irregular_whitespace_and_case():
+    """Sentences differing only in whitespace or case are cached apart and scored like the uncached path"""
+    agent = SentimentAnalysisAgent(sentence_level=True)
+    contents = [
+        "It works better now.  It used  to crash. Definitely faster.",
+        "It works better now. It used to crash. DEFINITELY   faster.",
+        "It works Better\tnow.\nIt used to crash.   definitely faster."
+    ]
+    for _ in range(2):
+        for content in contents:
+            score, confidence, _ = agent._sentence_level_analysis(content)
+            assert (score, confidence) == agent._context_aware_analysis(content)
+    assert agent.sentence_cache.hits > 0
@@ -0,0 +1,95 @@
+"""
+Tests for the sentiment backends
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.data_cleaning import DataCleaningAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from agents.sentiment_backends import SentimentBackend, label_signs, plan_batches, split_tokens
+from models.feedback_models import FeedbackDocument
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+
+
+def test_incomplete_backend_cannot_be_created():
+    class Unfinished(SentimentBackend):
+        name = "unfinished"
+
+    with pytest.raises(TypeError):
+        Unfinished()
+
+
+def test_batches_are_length_sorted_within_budget():
+    lengths = [5, 300, 12, 12, 40, 900, 7, 64, 128, 3]
+    batches = plan_batches(lengths, token_budget=256, max_batch_size=4)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    ordered = [lengths[i] for batch in batches for i in batch]
+    assert ordered == sorted(lengths)
+    for batch in batches:
+        assert len(batch) <= 4
+        padded = len(batch) * max(lengths[i] for i in batch)
+        assert padded <= 256 or len(batch) == 1
+
+
+def test_long_documents_are_split_and_truncated():
+    assert split_tokens(list(range(10)), 16, 4) == [list(range(10))]
+    assert split_tokens(list(range(40)), 16, 4) == [list(range(16)), list(range(16, 32)), list(range(32, 40))]
+    assert len(split_tokens(list(range(100)), 16, 4)) == 4
+    assert list(label_signs({0: 'negative', 1: 'neutral', 2: 'positive'})) == [-1.0, 0.0, 1.0]
+    assert list(label_signs({0: 'LABEL_0', 1: 'LABEL_1'})) == [-1.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_unloadable_model_falls_back_to_lexicon(tmp_path):
+    """A model that cannot be loaded leaves the agent on the lexicon heuristics with unchanged results"""
+    documents = [FeedbackDocument(**item) for item in iter_corpus(CorpusConfig(num_documents=40, seed=5))]
+    cleaned = await DataCleaningAgent().clean_documents({'documents': documents, 'return_records': True})
+
+    lexicon = SentimentAnalysisAgent()
+    transformer = SentimentAnalysisAgent('transformer', str(tmp_path / "no_model"))
+    await lexicon.initialize()
+    await transformer.initialize()
+    assert transformer.backend is transformer.lexicon_backend
+
+    expected = await lexicon.analyze_sentiment({'documents': cleaned, 'return_records': True})
+    results = await transformer.analyze_sentiment({'documents': cleaned, 'return_records': True})
+    assert [(r.overall_sentiment, r.sentiment_score, r.sentiment_breakdown) for r in results] == \
+        [(r.overall_sentiment, r.sentiment_score, r.sentiment_breakdown) for r in expected]
+
+    with pytest.raises(ValueError):
+        SentimentAnalysisAgent('transformer')
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_only_uncertain_documents():
+    """Confident lexicon results are kept; the rest match the full analysis exactly"""
+    documents = [FeedbackDocument(**item) for item in iter_corpus(CorpusConfig(num_documents=200, seed=6))]
+    cleaned = await DataCleaningAgent().clean_documents({'documents': documents, 'return_records': True})
+
+    full = await SentimentAnalysisAgent().analyze_sentiment({'documents': cleaned, 'return_records': True})
+    agent = SentimentAnalysisAgent(cascade=True)
+    await agent.initialize()
+    results = await agent.analyze_sentiment({'documents': cleaned, 'return_records': True})
+
+    assert len(results) == len(full) == len(cleaned)
+    escalated = 0
+    for doc, result, expected in zip(cleaned, results, full):
+        if result.sentiment_breakdown['cascade_tier'] == 2.0:
+            escalated += 1
+            assert result.sentiment_score == expected.sentiment_score
+            assert result.overall_sentiment == expected.overall_sentiment
+        else:
+            score, confidence = agent._lexicon_based_analysis(doc.cleaned_content.lower(), doc.text_profile)
+            assert not agent._is_uncertain(max(-1.0, min(1.0, score)), confidence)
+            assert abs(result.sentiment_score) > agent.neutral_band
+
+    metrics = agent.cascade_metrics()
+    assert metrics['documents'] == len(cleaned)
+    assert metrics['escalated'] == escalated
+    assert 0 < metrics['escalation_rate'] < 1
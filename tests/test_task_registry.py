@@ -0,0 +1,52 @@
+"""
+Tests for the orchestrator's task registry
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.data_cleaning import DataCleaningAgent
+from agents.master_orchestrator import MasterOrchestratorAgent
+from models.feedback_models import FeedbackDocument
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+
+
+class FailingAgent:
+    async def initialize(self):
+        pass
+
+    async def explode(self, input_data):
+        raise RuntimeError("boom")
+
+
+@pytest.mark.asyncio
+async def test_finished_tasks_keep_summaries_only():
+    """Payloads are not retained, and the history is bounded"""
+    orchestrator = MasterOrchestratorAgent(task_history=3)
+    await orchestrator.initialize({'data_cleaning': DataCleaningAgent(), 'failing': FailingAgent()})
+    documents = [FeedbackDocument(**item) for item in iter_corpus(CorpusConfig(num_documents=20, seed=3))]
+
+    for _ in range(4):
+        cleaned = await orchestrator._execute_agent_task(
+            'data_cleaning', 'clean_documents', {'documents': documents, 'return_records': True}
+        )
+    with pytest.raises(RuntimeError):
+        await orchestrator._execute_agent_task('failing', 'explode', {'documents': cleaned})
+
+    tasks = orchestrator.tasks
+    assert not tasks.active
+    assert tasks.stats() == {
+        'active': 0, 'history_size': 3, 'capacity': 3, 'finished': 5, 'evicted': 2,
+        'by_status': {'completed': 4, 'failed': 1}
+    }
+
+    latest = tasks.query(limit=10)
+    assert [task['agent_name'] for task in latest] == ['failing', 'data_cleaning', 'data_cleaning']
+    assert latest[0]['status'] == 'failed' and latest[0]['error_message'] == 'boom'
+    assert latest[1]['input'] == {'documents': 20, 'return_records': True}
+    assert latest[1]['output_count'] == len(cleaned)
+    assert tasks.query(status='failed', limit=10) == latest[:1]
@@ -0,0 +1,77 @@
+"""
+Tests for the term frequency sketch and emerging-topic detection
+"""
+
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.insight_generation import InsightGenerationAgent
+from sample_data.generate_corpus import CorpusConfig, iter_corpus
+from utils.term_sketch import TermSketch
+from workflow.workflow_manager import WorkflowManager
+
+
+def test_sketch_is_bounded_mergeable_and_persistent(tmp_path):
+    """Estimates never undercount, merged shards equal one sketch, and a saved sketch reloads"""
+    rng = random.Random(3)
+    words = [f"term{i:04d}" for i in range(5000)]
+    weights = [1 / (i + 1) for i in range(len(words))]
+    batches = [Counter(rng.choices(words, weights, k=5000)) for _ in range(6)]
+    truth = sum(batches, Counter())
+
+    whole, left, right = TermSketch(capacity=50), TermSketch(capacity=50), TermSketch(capacity=50)
+    for i, batch in enumerate(batches):
+        whole.update(batch)
+        (left if i % 2 else right).update(batch)
+    left.merge(right)
+
+    assert whole.total == sum(truth.values())
+    assert len(whole.heavy) <= 50
+    assert [term for term, _ in whole.top(5)] == [term for term, _ in truth.most_common(5)]
+    assert all(whole.estimate(term) >= count for term, count in truth.items())
+    assert (left.table == whole.table).all() and left.top(10) == whole.top(10)
+    with pytest.raises(ValueError):
+        whole.merge(TermSketch(width=128))
+
+    whole.save(str(tmp_path / "history.npz"))
+    loaded = TermSketch.load(str(tmp_path / "history.npz"))
+    assert loaded.total == whole.total and loaded.top(10) == whole.top(10)
+
+
+@pytest.mark.asyncio
+async def test_emerging_topics_are_increases_over_history(tmp_path):
+    """A topic only emerges once its share grows against earlier batches, and history persists"""
+    history = str(tmp_path / "history.npz")
+    manager = WorkflowManager()
+    await manager.initialize()
+
+    async def insights_for(agent, category, seed):
+        config = CorpusConfig(num_documents=150, seed=seed, category_mix={category: 1.0})
+        stages = await manager._run_document_stages(list(iter_corpus(config)))
+        return await agent.generate_insights({
+            'documents': stages['cleaned_documents'],
+            'sentiment_results': stages['sentiment_results'],
+            'categorization_results': stages['categorization_results']
+        })
+
+    agent = InsightGenerationAgent(term_history_path=history)
+    await agent.initialize()
+    first = await insights_for(agent, "technical_issues", 1)
+    assert not [i for i in first if i.insight_type == 'emerging_topic']
+    await agent.shutdown()
+
+    # A new agent picks up the persisted history
+    agent = InsightGenerationAgent(term_history_path=history)
+    await agent.initialize()
+    assert agent.term_baseline.total > 0
+    second = await insights_for(agent, "training_needs", 2)
+    await agent.shutdown()
+    emerging = [i for i in second if i.insight_type == 'emerging_topic']
+    assert len(emerging) == 1
+    assert "train" in emerging[0].supporting_evidence[0]
@@ -0,0 +1,95 @@
+"""
+Tests for the shared text profile and its compact batch encoding
+"""
+
+import pickle
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.categorization import CategorizationAgent
+from agents.insight_rules import FeatureTable
+from models.records import CleanedRecord
+from utils.term_sketch import TermSketch
+from utils.text_profile import TextProfile, TokenBatch, Vocabulary, vocabulary
+
+TEXTS = [
+    "The new workflow is NOT efficient! Approvals take 3 days... Why?",
+    "Great training session. The trainer was very helpful",
+    ""
+]
+
+
+def test_profile_matches_regex_tokenization():
+    """Tokens and sentences agree with the regexes the agents used before"""
+    for text in TEXTS:
+        profile = TextProfile.from_text(text)
+        lowered = text.lower()
+        assert profile.tokens == re.findall(r'\b\w+\b', lowered)
+        assert list(profile.sentence_texts(lowered)) == re.split(r'[.!?]+', lowered)
+        assert profile.word_count == len(text.split())
+
+
+def test_profile_and_batch_round_trips(tmp_path):
+    """Pickled and memory-mapped batches serve the same tokens and sentences"""
+    profiles = [TextProfile.from_text(text) for text in TEXTS]
+    restored = pickle.loads(pickle.dumps(profiles[0]))
+    assert restored.tokens == profiles[0].tokens
+
+    batch = TokenBatch.from_profiles(['a', 'b', 'c'], profiles)
+    for copy in (pickle.loads(pickle.dumps(batch)), TokenBatch.load(batch.save(tmp_path / 'batch.tpb'))):
+        assert copy.document_ids == ['a', 'b', 'c']
+        for original, loaded in zip(profiles, copy.profiles()):
+            assert loaded.tokens == original.tokens
+            assert loaded.sentence_spans == original.sentence_spans
+            assert [list(loaded.sentence_token_ids(i)) for i in range(loaded.sentence_count)] == \
+                [list(original.sentence_token_ids(i)) for i in range(original.sentence_count)]
+            assert loaded.word_count == original.word_count
+
+    # Only the tokens a batch uses are shipped, however large the vocabulary has grown
+    vocabulary.encode(f"unrelated{i}" for i in range(1000))
+    late = TokenBatch.from_profiles(['d'], [TextProfile.from_text("Freshly minted words, freshly")])
+    assert late.__reduce__()[1][1] == ['freshly', 'minted', 'words']
+    assert pickle.loads(pickle.dumps(late)).profile(0).tokens == ['freshly', 'minted', 'words', 'freshly']
+    assert len(late.save(tmp_path / 'late.tpb').read_bytes()) < 512
+
+
+def test_vocabulary_capacity_and_threads():
+    """Document tokens overflow past capacity while lexicon words still get ids, and threads agree on ids"""
+    table = Vocabulary(capacity=4)
+    assert table.encode(['a', 'b', 'c', 'a']) == [1, 2, 3, 1]
+    assert table.encode(['d', 'b']) == [Vocabulary.OVERFLOW_ID, 2]
+    assert table.overflowed_tokens == 1 and 'd' not in table
+    assert table.ids_for(['good']) == {4}
+    assert table.decode([0, 4]) == ['', 'good']
+
+    table = Vocabulary()
+    words = [f"word{i}" for i in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(table.encode, [words[i::3] + words for i in range(8)]))
+    assert len(table) == len(words) + 1
+    for ids in results:
+        assert table.decode(ids[-len(words):]) == words
+
+
+def test_overflowed_tokens_keep_their_terms(monkeypatch):
+    """Past capacity, tokens are counted, and keywords and terms are read from the text"""
+    monkeypatch.setattr(vocabulary, 'capacity', len(vocabulary))
+    overflowed = vocabulary.overflowed_tokens
+    text = "Zorblatt readings drifted again. The zorblatt calibration and the quuxometer fixed it."
+    record = CleanedRecord(original_id="doc", cleaned_content=text)
+    profile = record.text_profile
+
+    assert profile.overflowed and vocabulary.overflowed_tokens >= overflowed + 3
+    counts = profile.token_counts(text, 5)
+    assert counts['zorblatt'] == 2 and counts['quuxometer'] == 1 and '' not in counts
+
+    keywords = CategorizationAgent()._extract_keywords(text.lower(), profile)
+    assert keywords[0] == 'zorblatt' and 'quuxometer' in keywords and '' not in keywords
+
+    sketch = TermSketch()
+    FeatureTable.from_results({"doc": record}, {}, {}, term_sketch=sketch)
+    assert sketch.estimate('zorblatt') == 2 and sketch.estimate('') == 0
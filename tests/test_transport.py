@@ -0,0 +1,46 @@
+"""
+Tests for the shared memory transport used in parallel mode
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.feedback_models import FeedbackCategory, SentimentType
+from models.records import CleanedRecord, SentimentRecord, CategoryRecord
+from workflow.transport import SharedTextBatch, pack_records, unpack_records
+
+
+def test_shared_text_batch_round_trip():
+    """Workers attaching by name read back exactly the rows written, in slices"""
+    rows = [('fb1', 'a.txt', 'Plain text.'), ('', 'b.txt', 'Ünïcode — “quotes” ✓'), ('fb3', 'c.txt', '')]
+    with SharedTextBatch.create(rows, 3) as batch:
+        slices = batch.slices(2)
+        assert [(s.start, s.stop) for s in slices] == [(0, 2), (2, 3)]
+        with SharedTextBatch.attach(slices[0].block_name) as attached:
+            read = [row for s in slices for row in attached.rows(s.start, s.stop)]
+    assert read == rows
+
+
+def test_packed_records_round_trip():
+    """Column-packed records unpack to equal records, including text profiles"""
+    cleaned = [
+        CleanedRecord('fb1', 'The API fails. Again!', ['API'], 'en', 4, 0.8, ['note']),
+        CleanedRecord('fb2', '', [], 'unknown', 0, 0.0, [])
+    ]
+    sentiments = [
+        SentimentRecord('fb1', SentimentType.NEGATIVE, -0.4, 0.6, {'lexicon_score': -0.5}, ['fails'], []),
+        SentimentRecord('fb2', SentimentType.NEUTRAL, 0.0, 0.0)
+    ]
+    categories = [
+        CategoryRecord('fb1', FeedbackCategory.TECHNICAL_ISSUES, [FeedbackCategory.COMMUNICATION],
+                       {'technical_issues': 0.9, 'communication': 0.4}, ['api'], ['the api']),
+        CategoryRecord('fb2', FeedbackCategory.OTHER)
+    ]
+
+    restored = unpack_records(pack_records(cleaned, CleanedRecord), CleanedRecord)
+    assert [r.text_profile.tokens for r in restored] == [r.text_profile.tokens for r in cleaned]
+    assert [r.to_model().model_dump() for r in restored] == [r.to_model().model_dump() for r in cleaned]
+    assert unpack_records(pack_records(sentiments, SentimentRecord), SentimentRecord) == sentiments
+    assert unpack_records(pack_records(categories, CategoryRecord), CategoryRecord) == categories
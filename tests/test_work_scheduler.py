@@ -0,0 +1,37 @@
+"""
+Tests for character-based work units of the parallel document stages
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from workflow.parallel import WorkScheduler
+
+
+def test_units_cover_every_document_once_with_large_documents_first_and_alone():
+    lengths = [100] * 50 + [50_000] + [100] * 30 + [80_000] + [100] * 20
+    scheduler = WorkScheduler(lengths, isolate_chars=10_000, max_documents=8)
+    assert scheduler.isolated_documents == 2 and scheduler.largest_document == 80_000
+
+    units = []
+    while scheduler:
+        units.append(scheduler.next_unit(1_000))
+    assert scheduler.next_unit(1_000) is None and scheduler.remaining_chars == 0
+
+    # The largest documents come first, one per unit
+    assert units[0] == (81, 82, 80_000) and units[1] == (50, 51, 50_000)
+    # The rest stay within the character budget and the document limit
+    assert all(unit.chars <= 1_000 and unit.stop - unit.start <= 8 for unit in units[2:])
+
+    covered = sorted(index for unit in units for index in range(unit.start, unit.stop))
+    assert covered == list(range(len(lengths)))
+    assert sum(unit.chars for unit in units) == sum(lengths)
+
+
+def test_unit_holds_at_least_one_document():
+    scheduler = WorkScheduler([500, 500, 10], isolate_chars=10_000, max_documents=256)
+    assert scheduler.next_unit(100) == (0, 1, 500)
+    assert scheduler.next_unit(1_000) == (1, 3, 510)
+    assert not scheduler
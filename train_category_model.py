@@ -0,0 +1,119 @@
+"""
+Train the categorization model (agents/category_model.py) offline.
+
+Input is a JSON or JSONL feedback file in the format app.py reads. Items
+carrying a category value in the label field (of the item or its metadata)
+are used as labelled data; the others are labelled with the primary
+category the pattern rules give them, so a model can also be trained from
+the pipeline's own outputs.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent))
+
+from agents.category_model import CategoryModel
+from agents.categorization import CategorizationAgent
+from agents.data_cleaning import DataCleaningAgent
+from agents.data_collection import DataCollectionAgent
+from models.feedback_models import FeedbackCategory, FeedbackDocument
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CATEGORY_VALUES = {category.value for category in FeedbackCategory}
+
+
+def read_items(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            f.seek(0)
+            data = [json.loads(line) for line in f if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+async def build_training_set(
+    items: List[Dict[str, Any]],
+    label_field: str = "category",
+    labelled_only: bool = False
+) -> Tuple[List[str], List[str], int]:
+    """Cleaned texts and their labels, plus how many labels came from the patterns"""
+    documents, labels = [], {}
+    for index, item in enumerate(items):
+        doc_id = str(item.get('id') or f"train_{index}")
+        try:
+            documents.append(FeedbackDocument(
+                id=doc_id,
+                filename=item.get('filename', f"document_{index + 1}.txt"),
+                content=item['content']
+            ))
+        except Exception as e:
+            logger.error(f"Skipping training item {index}: {str(e)}")
+            continue
+        label = item.get(label_field, (item.get('metadata') or {}).get(label_field))
+        if label in CATEGORY_VALUES:
+            labels[doc_id] = label
+
+    documents = await DataCollectionAgent().validate_and_enrich({'documents': documents})
+    cleaned = await DataCleaningAgent().clean_documents({'documents': documents, 'return_records': True})
+
+    # Unlabelled documents get the primary category of the pattern rules
+    unlabelled = [doc for doc in cleaned if doc.original_id not in labels]
+    pseudo_labelled = 0
+    if unlabelled and not labelled_only:
+        categories = await CategorizationAgent('matrix').categorize_feedback(
+            {'documents': unlabelled, 'return_records': True}
+        )
+        for result in categories:
+            labels[result.document_id] = result.primary_category.value
+        pseudo_labelled = len(categories)
+
+    texts, targets = [], []
+    for doc in cleaned:
+        if doc.original_id in labels:
+            texts.append(doc.cleaned_content)
+            targets.append(labels[doc.original_id])
+    return texts, targets, pseudo_labelled
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Train the categorization model from labelled or pipeline-labelled feedback")
+    parser.add_argument("-i", "--input", required=True, help="Feedback file (JSON or JSONL)")
+    parser.add_argument("-o", "--output", default="./artifacts/category_model.joblib",
+                        help="Model artifact to write (default: ./artifacts/category_model.joblib)")
+    parser.add_argument("--label-field", default="category",
+                        help="Item field holding the category value (default: category)")
+    parser.add_argument("--labelled-only", action="store_true",
+                        help="Train on labelled items only instead of labelling the rest with the patterns")
+    parser.add_argument("--alpha", type=float, default=1e-5,
+                        help="L2 regularization strength of the classifier (default: 1e-5)")
+    args = parser.parse_args()
+
+    texts, labels, pseudo_labelled = await build_training_set(
+        read_items(args.input), args.label_field, args.labelled_only
+    )
+    if not texts:
+        print("No training documents", file=sys.stderr)
+        return 1
+
+    model = CategoryModel.train(texts, labels, alpha=args.alpha, source=args.input)
+    model.save(args.output)
+
+    print(f"Trained on {len(texts)} documents ({pseudo_labelled} labelled by the patterns)")
+    for label, count in Counter(labels).most_common():
+        print(f"  {label}: {count}")
+    print(f"Saved model to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
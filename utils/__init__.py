@@ -6,5 +6,28 @@ including logging, configuration, and helper functions.
 """
 
 from .logger import setup_logger, logger
+from .keyword_matcher import KeywordMatch, KeywordMatcher
+from .keyword_patterns import CategoryKeywordMatrix
+from .text_profile import TextProfile, TokenBatch, Vocabulary, vocabulary
+from .profiling import (
+    CpuProfiler, CpuProfilingControl, MemoryProfiler, cpu_profiling, profile_stage, run_profilers
+)
+from .term_sketch import TermSketch
+from .sentence_cache import SentenceScoreCache
+from .execution import AgentExecution, agent_execution
+from .admission import AdmissionController, AdmissionRejected
+from .dead_letter import DeadLetter, DeadLetterQueue, collecting, record_failure, replay_stages
+from .guardrails import BudgetOverrun, LengthGuardrails, OverrunLog, split_windows, tracking_overruns
+from .proximity import ProximityMatcher
 
-__all__ = ['setup_logger', 'logger']
+__all__ = [
+    'setup_logger', 'logger', 'KeywordMatch', 'KeywordMatcher', 'CategoryKeywordMatrix',
+    'TextProfile', 'TokenBatch', 'Vocabulary', 'vocabulary',
+    'MemoryProfiler', 'CpuProfiler', 'CpuProfilingControl', 'cpu_profiling', 'profile_stage',
+    'run_profilers',
+    'TermSketch', 'SentenceScoreCache', 'AgentExecution', 'agent_execution',
+    'AdmissionController', 'AdmissionRejected', 'DeadLetter', 'DeadLetterQueue', 'collecting', 'record_failure',
+    'replay_stages',
+    'BudgetOverrun', 'LengthGuardrails', 'OverrunLog', 'split_windows', 'tracking_overruns',
+    'ProximityMatcher'
+]
@@ -0,0 +1,174 @@
+"""
+Admission control for pipeline runs.
+
+A pipeline holds its batch's documents and every intermediate result in
+memory, so the number of runs and of documents in flight is bounded. Runs
+that cannot start yet wait in a bounded queue with one FIFO lane per client;
+free capacity goes to the lanes in round-robin order, so a client sending
+many batches cannot starve the others. When the queue is full, admission is
+refused with an estimate of when to retry.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+
+class AdmissionRejected(Exception):
+    """The admission queue is full; retry_after is the suggested wait in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class _Waiter:
+    client_id: str
+    documents: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class AdmissionController:
+    """Bounded, per-client fair admission of pipeline runs"""
+
+    def __init__(self, max_pipelines: int = 2, max_inflight_documents: int = 50_000, max_queue: int = 32):
+        """
+        Args:
+            max_pipelines: Runs processed at the same time
+            max_inflight_documents: Documents of the running batches; a larger
+                batch is admitted only when nothing else runs
+            max_queue: Runs waiting for admission before new ones are refused
+        """
+        if max_pipelines < 1 or max_inflight_documents < 1 or max_queue < 0:
+            raise ValueError("Admission limits must be positive")
+        self.max_pipelines = max_pipelines
+        self.max_inflight_documents = max_inflight_documents
+        self.max_queue = max_queue
+        self.running = 0
+        self.inflight_documents = 0
+        # Waiting runs per client; the order of the keys is the round-robin order
+        self.lanes: 'OrderedDict[str, Deque[_Waiter]]' = OrderedDict()
+        self.queue_depth = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queued = 0
+        self.waited = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.avg_run_seconds: Optional[float] = None
+
+    def _fits(self, documents: int) -> bool:
+        if self.running >= self.max_pipelines:
+            return False
+        return self.running == 0 or self.inflight_documents + documents <= self.max_inflight_documents
+
+    def _start(self, documents: int) -> None:
+        self.running += 1
+        self.inflight_documents += documents
+        self.admitted += 1
+
+    def retry_after(self) -> int:
+        """Seconds until a refused run is likely to be admitted"""
+        run_seconds = self.avg_run_seconds or 1.0
+        rounds = (self.queue_depth + self.running) / self.max_pipelines
+        return max(1, math.ceil(run_seconds * rounds))
+
+    async def acquire(self, client_id: str, documents: int) -> float:
+        """Wait for admission of a run; returns the seconds spent waiting"""
+        if self.queue_depth == 0 and self._fits(documents):
+            self._start(documents)
+            return 0.0
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"Admission queue is full ({self.queue_depth} runs waiting)", self.retry_after()
+            )
+
+        waiter = _Waiter(client_id, documents, asyncio.get_running_loop().create_future())
+        self.lanes.setdefault(client_id, deque()).append(waiter)
+        self.queue_depth += 1
+        self.queued += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just before the cancellation arrived
+                self.release(documents)
+            else:
+                self._remove(waiter)
+            raise
+
+        waited = time.perf_counter() - waiter.enqueued_at
+        self.waited += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def release(self, documents: int, run_seconds: Optional[float] = None) -> None:
+        """Free the capacity of a finished run and admit waiting ones"""
+        self.running -= 1
+        self.inflight_documents -= documents
+        if run_seconds is not None:
+            average = self.avg_run_seconds
+            self.avg_run_seconds = run_seconds if average is None else 0.8 * average + 0.2 * run_seconds
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiting runs, one per client in turn, while capacity remains"""
+        while self.lanes:
+            client_id, lane = next(iter(self.lanes.items()))
+            waiter = lane[0]
+            if not self._fits(waiter.documents):
+                break
+            lane.popleft()
+            self.queue_depth -= 1
+            # The client goes to the back of the rotation
+            del self.lanes[client_id]
+            if lane:
+                self.lanes[client_id] = lane
+            self._start(waiter.documents)
+            waiter.future.set_result(None)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        lane = self.lanes.get(waiter.client_id)
+        if lane is None or waiter not in lane:
+            return
+        lane.remove(waiter)
+        self.queue_depth -= 1
+        if not lane:
+            del self.lanes[waiter.client_id]
+        # The removed run may have been blocking the head of the rotation
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, client_id: str, documents: int) -> AsyncIterator[float]:
+        """Hold admission for the duration of a run; yields the seconds spent waiting"""
+        waited = await self.acquire(client_id, documents)
+        start = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            self.release(documents, time.perf_counter() - start)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'max_pipelines': self.max_pipelines,
+            'inflight_documents': self.inflight_documents,
+            'max_inflight_documents': self.max_inflight_documents,
+            'queue_depth': self.queue_depth,
+            'max_queue': self.max_queue,
+            'queue_depth_by_client': {client: len(lane) for client, lane in self.lanes.items()},
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'queued': self.queued,
+            'mean_wait_seconds': self.total_wait_seconds / self.waited if self.waited else 0.0,
+            'max_wait_seconds': self.max_wait_seconds,
+            'avg_run_seconds': self.avg_run_seconds
+        }
@@ -0,0 +1,257 @@
+"""
+Dead letters of the per-document pipeline stages.
+
+Agents process documents one at a time and keep going when one fails. The
+failure goes to record_failure(), which adds it, with the stage and the
+stage's input document, to the dead-letter queue of the current pipeline run
+(a context variable, so overlapping runs keep theirs apart; agent work
+offloaded to an executor runs in a copy of the context). A run can retry the
+transient failures in a later pass with exponential backoff, and writes the
+rest to a JSONL file, one failed document per line, that can be fed back in
+without rerunning the batch. replay_stages() runs a retry pass through the
+stages of the caller's pipeline.
+"""
+
+import asyncio
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Runs a stage on a list of documents, returning its outputs
+StageRunner = Callable[[List[Any]], Awaitable[List[Any]]]
+
+# Errors worth retrying: the same document may well succeed a moment later
+TRANSIENT_ERRORS = (TimeoutError, ConnectionError, MemoryError)
+
+
+def is_transient(error: Union[BaseException, str]) -> bool:
+    """Whether a failure may succeed on retry; exceptions can opt in with a transient attribute"""
+    if isinstance(error, str):
+        return False
+    return isinstance(error, TRANSIENT_ERRORS) or bool(getattr(error, 'transient', False))
+
+
+def document_key(document: Any) -> str:
+    """Id of a raw or cleaned document (or its input fields), falling back to its filename"""
+    if isinstance(document, dict):
+        return str(document.get('id') or document.get('filename') or '')
+    return (
+        getattr(document, 'original_id', None)
+        or getattr(document, 'id', None)
+        or getattr(document, 'filename', None)
+        or ''
+    )
+
+
+def serialize_document(document: Any) -> Optional[Dict[str, Any]]:
+    """JSON-ready fields of a stage input"""
+    if document is None or isinstance(document, dict):
+        return document
+    if hasattr(document, 'to_model'):
+        document = document.to_model()
+    if hasattr(document, 'model_dump'):
+        return document.model_dump(mode='json')
+    return None
+
+
+@dataclass(slots=True)
+class DeadLetter:
+    """A document a stage failed on"""
+    stage: str
+    document_id: str
+    error_type: str
+    error: str
+    transient: bool
+    attempts: int
+    failed_at: str
+    # The stage's input, kept for retries; serialized only when written
+    document: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.stage,
+            'document_id': self.document_id,
+            'error_type': self.error_type,
+            'error': self.error,
+            'transient': self.transient,
+            'attempts': self.attempts,
+            'failed_at': self.failed_at,
+            'document': serialize_document(self.document)
+        }
+
+
+class DeadLetterQueue:
+    """Failed documents of one pipeline run, keyed by stage and document"""
+
+    def __init__(self, max_retries: int = 2, backoff_seconds: float = 0.5, max_backoff_seconds: float = 10.0):
+        """
+        Args:
+            max_retries: Retries of a document after its first transient failure
+            backoff_seconds: Wait before the first retry pass; doubled on every pass
+            max_backoff_seconds: Longest wait before a retry pass
+        """
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.letters: Dict[Tuple[str, str], DeadLetter] = {}
+        # Letters taken for the current retry pass, by document: a retried
+        # document may fail again in a later stage than the one it is retried from
+        self.retrying: Dict[str, List[DeadLetter]] = {}
+        self.recovered = 0
+
+    def __len__(self) -> int:
+        return len(self.letters)
+
+    def __iter__(self) -> Iterator[DeadLetter]:
+        return iter(self.letters.values())
+
+    def record(self, stage: str, document: Any, error: Union[BaseException, str]) -> DeadLetter:
+        """Add a failure; a document failing again on retry, in any stage, keeps its attempt count"""
+        document_id = document_key(document)
+        key = (stage, document_id)
+        previous = [*self.retrying.get(document_id, ()), *filter(None, [self.letters.get(key)])]
+        letter = DeadLetter(
+            stage=stage,
+            document_id=document_id,
+            error_type=type(error).__name__ if isinstance(error, BaseException) else 'Rejected',
+            error=str(error),
+            transient=is_transient(error),
+            attempts=max((letter.attempts for letter in previous), default=0) + 1,
+            failed_at=datetime.now().isoformat(),
+            document=document
+        )
+        self.letters[key] = letter
+        return letter
+
+    def absorb(self, letters: Iterable[Dict[str, Any]]) -> None:
+        """Add failures recorded elsewhere (e.g. by worker processes) as dicts"""
+        for fields in letters:
+            letter = DeadLetter(**fields)
+            self.letters[(letter.stage, letter.document_id)] = letter
+
+    def failed_ids(self) -> Set[str]:
+        return {letter.document_id for letter in self.letters.values()}
+
+    def by_stage(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for letter in self.letters.values():
+            counts[letter.stage] = counts.get(letter.stage, 0) + 1
+        return counts
+
+    def _take_retryable(self) -> Dict[str, List[Any]]:
+        """Move the retryable letters aside and return their documents by stage"""
+        batch: Dict[str, List[Any]] = {}
+        for key, letter in list(self.letters.items()):
+            if letter.transient and letter.attempts <= self.max_retries and letter.document is not None:
+                self.retrying.setdefault(letter.document_id, []).append(self.letters.pop(key))
+                batch.setdefault(letter.stage, []).append(letter.document)
+        return batch
+
+    async def retry(self, replay: Callable[[Dict[str, List[Any]]], Awaitable[None]]) -> int:
+        """
+        Retry transient failures in passes with growing backoff. replay gets
+        the documents of each stage and runs them from that stage on; the
+        ones that fail again are recorded again. Returns the documents recovered,
+        i.e. retried documents without a new failure in any stage.
+        """
+        recovered = 0
+        for attempt in range(self.max_retries):
+            batch = self._take_retryable()
+            if not batch:
+                break
+            delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+            logger.info(f"Retrying {len(self.retrying)} failed documents in {delay:.1f}s")
+            try:
+                await asyncio.sleep(delay)
+                await replay(batch)
+            except Exception as e:
+                logger.error(f"Dead-letter retry pass failed: {str(e)}")
+                # Nothing was recovered; the letters stay dead unless failed again
+                for letters in self.retrying.values():
+                    for letter in letters:
+                        self.letters.setdefault((letter.stage, letter.document_id), letter)
+            else:
+                failed_ids = self.failed_ids()
+                recovered += sum(1 for document_id in self.retrying if document_id not in failed_ids)
+            finally:
+                self.retrying.clear()
+        self.recovered += recovered
+        return recovered
+
+    def write(self, path: Union[str, Path]) -> Optional[str]:
+        """Write the failures to a JSONL file; nothing is written if there are none"""
+        if not self.letters:
+            return None
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for letter in self.letters.values():
+                f.write(json.dumps(letter.to_dict(), default=str) + '\n')
+        return str(path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'failed_documents': len(self.failed_ids()),
+            'by_stage': self.by_stage(),
+            'transient': sum(letter.transient for letter in self.letters.values()),
+            'recovered': self.recovered
+        }
+
+
+async def replay_stages(
+    batch: Dict[str, List[Any]],
+    collect: StageRunner,
+    clean: StageRunner,
+    analyses: Dict[str, StageRunner]
+) -> Tuple[List[Any], Dict[str, List[Any]]]:
+    """
+    Run the documents of a retry pass from the stage each failed in:
+    'data_collection' documents are validated and cleaned, 'data_cleaning'
+    ones cleaned, and every cleaned document goes through all analyses, as do
+    the documents that failed in that analysis. Returns the cleaned documents
+    and the results of each analysis.
+    """
+    documents = batch.get('data_collection', [])
+    if documents:
+        documents = await collect(documents)
+    documents = documents + batch.get('data_cleaning', [])
+    cleaned = await clean(documents) if documents else []
+
+    results = {}
+    for stage, analyse in analyses.items():
+        stage_documents = cleaned + batch.get(stage, [])
+        results[stage] = await analyse(stage_documents) if stage_documents else []
+    return cleaned, results
+
+
+# Dead-letter queue of the pipeline run in the current task
+_current_queue: ContextVar[Optional[DeadLetterQueue]] = ContextVar('dead_letter_queue', default=None)
+
+
+@contextmanager
+def collecting(queue: DeadLetterQueue) -> Iterator[DeadLetterQueue]:
+    """Send the failures recorded in the enclosed block to queue"""
+    token = _current_queue.set(queue)
+    try:
+        yield queue
+    finally:
+        _current_queue.reset(token)
+
+
+def current_queue() -> Optional[DeadLetterQueue]:
+    return _current_queue.get()
+
+
+def record_failure(stage: str, document: Any, error: Union[BaseException, str]) -> None:
+    """Record a failed document in the current run's queue, if one is collecting"""
+    queue = _current_queue.get()
+    if queue is not None:
+        queue.record(stage, document, error)
@@ -0,0 +1,116 @@
+"""
+Execution of the agents' CPU-bound work.
+
+The agents' coroutines do no I/O of their own: their work is synchronous
+and lives in plain methods (clean_batch, analyze_batch, ...) that can be
+called directly. The coroutines hand that work to the process-wide
+agent_execution, which runs it either on an executor, so the event loop
+keeps serving requests while a batch is processed, or inline on the loop
+thread, which is what batch runs want. Per-document stages are handed over
+in slices of yield_every documents, and the loop gets control back between
+slices either way; stages that score a whole batch at once (matrix products,
+model inference) are handed over whole.
+
+Offloaded work always runs on one worker thread, owned by agent_execution.
+The agents' caches and counters (the sentence score cache, cascade
+statistics, ...) are not locked, and pure-Python work gains nothing from more
+threads: offloading is about keeping the loop free. There is therefore no
+setting for the number of threads or the executor.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .profiling import cpu_profiling
+
+
+class AgentExecution:
+    """Runs agent work inline on the event loop or on a single worker thread"""
+
+    def __init__(self, offload: bool = False, yield_every: int = 256):
+        """
+        Args:
+            offload: Run agent work on the worker thread instead of the loop thread
+            yield_every: Documents processed between returns to the loop
+        """
+        self.offload = offload
+        self.yield_every = yield_every
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.offloaded_calls = 0
+        self.inline_calls = 0
+
+    def configure(self, offload: Optional[bool] = None, yield_every: Optional[int] = None) -> None:
+        """Change the settings"""
+        if yield_every is not None:
+            if yield_every < 1:
+                raise ValueError("yield_every must be at least 1")
+            self.yield_every = yield_every
+        if offload is not None:
+            self.offload = offload
+
+    @property
+    def offloading(self) -> bool:
+        """
+        Whether work goes to the executor. A CPU profile only samples the
+        loop thread, so work stays inline while a run is being profiled.
+        """
+        return self.offload and not cpu_profiling.active
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-work")
+        return self.executor
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Result of func(*args, **kwargs), computed inline or on the worker thread"""
+        if not self.offloading:
+            self.inline_calls += 1
+            return func(*args, **kwargs)
+        self.offloaded_calls += 1
+        loop = asyncio.get_running_loop()
+        # Like asyncio.to_thread, the work sees the caller's context variables
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor(), functools.partial(context.run, func, *args, **kwargs))
+
+    async def map_slices(
+        self,
+        func: Callable[..., List[Any]],
+        items: Sequence[Any],
+        *args: Any,
+        whole: bool = False
+    ) -> List[Any]:
+        """
+        Concatenated results of func(slice, *args) over slices of yield_every
+        items; with whole, func(items, *args) in one call
+        """
+        if whole:
+            return await self.run(func, items, *args)
+        results: List[Any] = []
+        step = self.yield_every
+        for start in range(0, len(items), step):
+            results.extend(await self.run(func, items[start:start + step], *args))
+            # Let other tasks (requests, other pipelines) run between slices
+            await asyncio.sleep(0)
+        return results
+
+    def shutdown(self) -> None:
+        """Stop the worker thread; it is started again on the next offloaded call"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'offload': self.offload,
+            'offloading': self.offloading,
+            'yield_every': self.yield_every,
+            'offloaded_calls': self.offloaded_calls,
+            'inline_calls': self.inline_calls
+        }
+
+
+# Shared by every agent in the process
+agent_execution = AgentExecution()
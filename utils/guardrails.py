@@ -0,0 +1,156 @@
+"""
+Length guardrails of the per-document stages.
+
+Documents can be up to a megabyte long, and some heuristics (the lazy topic
+patterns of categorization) get slower than linearly with length. With
+segmentation on, a document longer than a window is scored window by
+window, split at sentence ends where possible, and the stage combines the
+per-window results. A per-document time budget
+is checked between windows: a document that used up its budget keeps the
+result of the windows scored so far and is recorded as an overrun of the
+current pipeline run (a context variable, like the dead letters in
+utils.dead_letter).
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dead_letter import document_key
+
+# Where a window may end, best first
+_SENTENCE_ENDS = ('. ', '! ', '? ', '\n')
+
+
+def split_windows(text: str, window_chars: int) -> List[str]:
+    """
+    Consecutive windows of at most window_chars characters covering text,
+    each ending at the last sentence end, else the last space, in its second half
+    """
+    if window_chars <= 0 or len(text) <= window_chars:
+        return [text]
+    windows = []
+    start = 0
+    while len(text) - start > window_chars:
+        stop = start + window_chars
+        floor = start + window_chars // 2
+        cut = max(text.rfind(end, floor, stop) + len(end) for end in _SENTENCE_ENDS)
+        if cut < floor:
+            cut = text.rfind(' ', floor, stop) + 1
+        if cut <= floor:
+            cut = stop
+        windows.append(text[start:cut])
+        start = cut
+    windows.append(text[start:])
+    return windows
+
+
+@dataclass(slots=True)
+class BudgetOverrun:
+    """A document whose stage stopped early on the time budget"""
+    stage: str
+    document_id: str
+    windows_scored: int
+    windows: int
+    seconds: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class OverrunLog:
+    """Documents of one pipeline run that hit the time budget, keyed by stage and document"""
+
+    def __init__(self):
+        self.overruns: Dict[Tuple[str, str], BudgetOverrun] = {}
+
+    def __len__(self) -> int:
+        return len(self.overruns)
+
+    def __iter__(self) -> Iterator[BudgetOverrun]:
+        return iter(self.overruns.values())
+
+    def record(self, overrun: BudgetOverrun) -> None:
+        self.overruns[(overrun.stage, overrun.document_id)] = overrun
+
+    def absorb(self, overruns: Iterable[Dict[str, Any]]) -> None:
+        """Add overruns recorded elsewhere (e.g. by worker processes) as dicts"""
+        for fields in overruns:
+            self.record(BudgetOverrun(**fields))
+
+    def document_ids(self) -> List[str]:
+        return list(dict.fromkeys(overrun.document_id for overrun in self.overruns.values()))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [overrun.to_dict() for overrun in self.overruns.values()]
+
+
+# Overrun log of the pipeline run in the current task
+_current_log: ContextVar[Optional[OverrunLog]] = ContextVar('overrun_log', default=None)
+
+
+@contextmanager
+def tracking_overruns(log: OverrunLog) -> Iterator[OverrunLog]:
+    """Send the overruns recorded in the enclosed block to log"""
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+def current_overrun_log() -> Optional[OverrunLog]:
+    return _current_log.get()
+
+
+class LengthGuardrails:
+    """Segmentation and time budget settings of an agent"""
+
+    def __init__(self, window_chars: int = 0, time_budget_seconds: float = 0.0):
+        """
+        Args:
+            window_chars: Score documents longer than this in windows of at
+                most this many characters; 0 scores every document whole
+            time_budget_seconds: Stop scoring a document's windows once it
+                has taken this long; 0 sets no budget
+        """
+        if window_chars < 0 or time_budget_seconds < 0:
+            raise ValueError("window_chars and time_budget_seconds must not be negative")
+        self.window_chars = window_chars
+        self.time_budget_seconds = time_budget_seconds
+        self.segmented_documents = 0
+        self.overruns = 0
+
+    def segments(self, text: str) -> bool:
+        """Whether text is scored in windows"""
+        return 0 < self.window_chars < len(text)
+
+    def windows(self, stage: str, document: Any, text: str) -> Iterator[str]:
+        """
+        The windows of text to score, in order. After the first, none is
+        started once the budget is used up; the document is then recorded
+        as an overrun of the current run.
+        """
+        windows = split_windows(text, self.window_chars)
+        if len(windows) > 1:
+            self.segmented_documents += 1
+        started = time.perf_counter()
+        for index, window in enumerate(windows):
+            elapsed = time.perf_counter() - started
+            if index and self.time_budget_seconds and elapsed >= self.time_budget_seconds:
+                self.overruns += 1
+                log = _current_log.get()
+                if log is not None:
+                    log.record(BudgetOverrun(stage, document_key(document), index, len(windows), round(elapsed, 3)))
+                return
+            yield window
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'window_chars': self.window_chars,
+            'time_budget_seconds': self.time_budget_seconds,
+            'segmented_documents': self.segmented_documents,
+            'overruns': self.overruns
+        }
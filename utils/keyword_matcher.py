@@ -0,0 +1,160 @@
+"""
+Keyword matcher module for the Feedback Processing System.
+Provides an Aho-Corasick automaton that finds every occurrence of a set of
+keywords in a single linear pass over the text.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+
+class KeywordMatch(NamedTuple):
+    """A single keyword occurrence"""
+    start: int
+    end: int
+    keyword: str
+    payload: Any
+
+
+def _is_word_char(ch: str) -> bool:
+    """Mirror the regex ``\\w`` class used by the agents' patterns"""
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern keyword matcher based on the Aho-Corasick algorithm.
+
+    Keywords are compiled once into a deterministic automaton; matching then
+    costs one transition per input character regardless of how many keywords
+    are registered. Each keyword carries an optional payload (for example the
+    category or source type it signals) and can be restricted to whole-word
+    matches, which mirrors ``\\b(?:...)\\b`` regex semantics.
+    """
+
+    def __init__(
+        self,
+        keywords: Optional[Iterable[Any]] = None,
+        whole_words: bool = True,
+        case_sensitive: bool = False
+    ):
+        """
+        Create a matcher.
+
+        Args:
+            keywords: Optional iterable of keywords or ``(keyword, payload)`` pairs
+            whole_words: Default word-boundary behaviour for added keywords
+            case_sensitive: Match case-sensitively (text is lowercased otherwise)
+        """
+        self.whole_words = whole_words
+        self.case_sensitive = case_sensitive
+
+        self._keywords: List[Tuple[str, Any, bool]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        self._delta: List[Dict[str, int]] = []
+        self._outputs_full: List[Tuple[int, ...]] = []
+        self._built = False
+
+        for item in keywords or []:
+            if isinstance(item, tuple):
+                self.add(*item)
+            else:
+                self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def add(self, keyword: str, payload: Any = None, whole_word: Optional[bool] = None) -> None:
+        """Register a keyword; the automaton is rebuilt lazily on next match"""
+        if not keyword:
+            raise ValueError("Keyword must be a non-empty string")
+
+        if not self.case_sensitive:
+            keyword = keyword.lower()
+
+        index = len(self._keywords)
+        self._keywords.append((
+            keyword,
+            keyword if payload is None else payload,
+            self.whole_words if whole_word is None else whole_word
+        ))
+
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._outputs.append(())
+            state = next_state
+        self._outputs[state] = self._outputs[state] + (index,)
+        self._built = False
+
+    def build(self) -> 'KeywordMatcher':
+        """Compute failure links and the full transition table"""
+        fail = [0] * len(self._goto)
+        outputs = list(self._outputs)
+        delta: List[Dict[str, int]] = [dict() for _ in self._goto]
+        delta[0] = dict(self._goto[0])
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # The state's transitions are its failure state's transitions
+            # overridden by its own trie edges; BFS order guarantees the
+            # failure state is already complete.
+            transitions = dict(delta[fail[state]])
+            for ch, child in self._goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0) if state else 0
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                transitions[ch] = child
+                queue.append(child)
+            delta[state] = transitions
+
+        self._delta = delta
+        self._outputs_full = outputs
+        self._built = True
+        return self
+
+    def finditer(self, text: str) -> Iterator[KeywordMatch]:
+        """Yield every (possibly overlapping) keyword occurrence in text"""
+        if not self._built:
+            self.build()
+        if not self.case_sensitive:
+            text = text.lower()
+
+        delta = self._delta
+        outputs = self._outputs_full
+        keywords = self._keywords
+        text_length = len(text)
+
+        state = 0
+        for position, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+
+            end = position + 1
+            for index in outputs[state]:
+                keyword, payload, whole_word = keywords[index]
+                start = end - len(keyword)
+                if whole_word:
+                    if start > 0 and _is_word_char(text[start - 1]):
+                        continue
+                    if end < text_length and _is_word_char(text[end]):
+                        continue
+                yield KeywordMatch(start, end, keyword, payload)
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """Return every keyword occurrence in text"""
+        return list(self.finditer(text))
+
+    def matched_keywords(self, text: str) -> Set[str]:
+        """Return the distinct keywords found in text"""
+        return {match.keyword for match in self.finditer(text)}
+
+    def matched_payloads(self, text: str) -> Set[Any]:
+        """Return the distinct payloads of keywords found in text"""
+        return {match.payload for match in self.finditer(text)}
@@ -0,0 +1,179 @@
+"""
+Keyword pattern matrix module for the Feedback Processing System.
+Compiles weighted ``\\b(?:a|b|c)\\b`` keyword patterns into a sparse
+keyword x pattern matrix, so the pattern match counts of a whole batch of
+documents come from one sparse term-count matrix and one matrix product.
+
+Keywords are matched on the token ids of each document's TextProfile.
+Multi-word keywords ("takes too long") are n-grams of consecutive tokens
+within a sentence, found by hashing every n-gram of the batch at once.
+"""
+
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from utils.text_profile import WORD_PATTERN, TextProfile, vocabulary
+
+# Keyword patterns are a single word-bounded, non-capturing alternation
+ALTERNATION_PATTERN = re.compile(r'^\\b\(\?:(.*)\)\\b$')
+
+# Optional parts understood inside an alternative, with the texts they stand
+# for: an optional apostrophe, and an optional separator (which either joins
+# the words or separates them into two tokens)
+OPTIONAL_PARTS = {"\\'?": ("'", ""), "'?": ("'", ""), ".?": ("", " ")}
+
+REGEX_SYNTAX = set('\\.^$*+?{}[]()|')
+
+# Multiplier of the polynomial n-gram hash (odd, so it is invertible mod 2**64)
+NGRAM_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def expand_alternative(alternative: str) -> List[str]:
+    """Literal texts an alternative matches; raises ValueError on other regex syntax"""
+    texts = ['']
+    position = 0
+    while position < len(alternative):
+        for part, options in OPTIONAL_PARTS.items():
+            if alternative.startswith(part, position):
+                texts = [text + option for text in texts for option in options]
+                position += len(part)
+                break
+        else:
+            ch = alternative[position]
+            if ch in REGEX_SYNTAX:
+                raise ValueError(f"Unsupported regex syntax in keyword pattern: {alternative!r}")
+            texts = [text + ch for text in texts]
+            position += 1
+    return texts
+
+
+def _ngram_hashes(ids: np.ndarray, n: int) -> np.ndarray:
+    """Hash of every window of n consecutive ids (rows of ids are windows when ids is 2-D)"""
+    if ids.ndim == 2:
+        columns = [ids[:, j] for j in range(n)]
+    else:
+        count = len(ids) - n + 1
+        columns = [ids[j:j + count] for j in range(n)]
+    hashes = columns[0].astype(np.uint64)
+    with np.errstate(over='ignore'):
+        for column in columns[1:]:
+            hashes = hashes * NGRAM_HASH_MULTIPLIER + column.astype(np.uint64)
+    return hashes
+
+
+class CategoryKeywordMatrix:
+    """
+    Sparse keyword x pattern incidence compiled from category patterns.
+
+    Term counts times the incidence give every pattern's match count. Scores
+    then add match count x weight per category in pattern order, the same
+    float operations as scoring pattern by pattern, so results are identical.
+    """
+
+    def __init__(self, category_patterns: Dict[Any, Sequence[Tuple[str, float]]]):
+        self.categories = list(category_patterns)
+        keyword_rows: Dict[Tuple[int, ...], int] = {}
+        entries: List[Tuple[int, int]] = []
+        # Category column and weight of each pattern
+        self.pattern_categories: List[int] = []
+        self.pattern_weights: List[float] = []
+
+        for category_column, patterns in enumerate(category_patterns.values()):
+            for pattern, weight in patterns:
+                column = len(self.pattern_weights)
+                self.pattern_categories.append(category_column)
+                self.pattern_weights.append(weight)
+                match = ALTERNATION_PATTERN.match(pattern)
+                if match is None:
+                    raise ValueError(f"Keyword patterns must look like \\b(?:a|b)\\b: {pattern!r}")
+                keywords = set()
+                for alternative in match.group(1).split('|'):
+                    for text in expand_alternative(alternative):
+                        tokens = WORD_PATTERN.findall(text.lower())
+                        if tokens:
+                            keywords.add(tuple(vocabulary.intern(token) for token in tokens))
+                # Each pattern counts a keyword once, however many of its
+                # alternatives spell it
+                for keyword in keywords:
+                    entries.append((keyword_rows.setdefault(keyword, len(keyword_rows)), column))
+
+        self.keywords = list(keyword_rows)
+        rows, columns = zip(*entries) if entries else ((), ())
+        self.incidence = sparse.csr_matrix(
+            (np.ones(len(entries)), (rows, columns)),
+            shape=(len(self.keywords), len(self.pattern_weights))
+        )
+
+        # Per n-gram length: sorted keyword hashes, their rows and token ids
+        self._ngram_tables: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for n in sorted({len(keyword) for keyword in self.keywords}):
+            rows = np.array([row for row, keyword in enumerate(self.keywords) if len(keyword) == n])
+            ids = np.array([self.keywords[row] for row in rows], dtype=np.uint32).reshape(len(rows), n)
+            hashes = _ngram_hashes(ids, n)
+            order = np.argsort(hashes)
+            self._ngram_tables[n] = (hashes[order], rows[order], ids[order])
+
+    def term_counts(self, profiles: Sequence[TextProfile]) -> sparse.csr_matrix:
+        """Document x keyword occurrence counts for a batch"""
+        id_parts, sentence_lengths, document_lengths = [], [], []
+        for profile in profiles:
+            id_parts.append(np.frombuffer(profile.token_ids, dtype=np.uint32))
+            offsets = np.frombuffer(profile.sentence_offsets, dtype=np.uint32)
+            sentence_lengths.append(np.diff(offsets))
+            document_lengths.append(len(profile.token_ids))
+
+        shape = (len(profiles), len(self.keywords))
+        if not id_parts or not sum(document_lengths):
+            return sparse.csr_matrix(shape)
+        ids = np.concatenate(id_parts)
+        # Sentence and document of every token of the batch
+        sentence_lengths = np.concatenate(sentence_lengths)
+        sentence_of = np.repeat(np.arange(len(sentence_lengths)), sentence_lengths)
+        document_of = np.repeat(np.arange(len(profiles)), document_lengths)
+
+        documents, keywords = [], []
+        for n, (keyword_hashes, keyword_rows, keyword_ids) in self._ngram_tables.items():
+            if len(ids) < n:
+                continue
+            hashes = _ngram_hashes(ids, n)
+            slots = np.minimum(np.searchsorted(keyword_hashes, hashes), len(keyword_hashes) - 1)
+            hits = keyword_hashes[slots] == hashes
+            # n-grams never span sentences (and so never span documents)
+            hits &= sentence_of[:len(hashes)] == sentence_of[n - 1:]
+            starts = np.flatnonzero(hits)
+            if n > 1 and len(starts):
+                # Confirm the tokens, in case two n-grams share a hash
+                windows = np.stack([ids[starts + j] for j in range(n)], axis=1)
+                confirmed = (windows == keyword_ids[slots[starts]]).all(axis=1)
+                starts = starts[confirmed]
+            documents.append(document_of[starts])
+            keywords.append(keyword_rows[slots[starts]])
+
+        if not documents:
+            return sparse.csr_matrix(shape)
+        documents = np.concatenate(documents)
+        keywords = np.concatenate(keywords)
+        # Duplicate (document, keyword) entries add up to occurrence counts
+        return sparse.csr_matrix((np.ones(len(documents)), (documents, keywords)), shape=shape)
+
+    def score(self, profiles: Sequence[TextProfile]) -> np.ndarray:
+        """
+        Document x category scores normalized by each document's highest
+        score (documents without matches keep all-zero rows)
+        """
+        pattern_counts = (self.term_counts(profiles) @ self.incidence).toarray()
+        scores = np.zeros((len(profiles), len(self.categories)))
+        for pattern, (column, weight) in enumerate(zip(self.pattern_categories, self.pattern_weights)):
+            scores[:, column] += pattern_counts[:, pattern] * weight
+        highest = scores.max(axis=1, initial=0.0)
+        matched = highest > 0
+        scores[matched] = np.minimum(scores[matched] / highest[matched, None], 1.0)
+        return scores
+
+    def score_dicts(self, profiles: Sequence[TextProfile]) -> List[Dict[Any, float]]:
+        """Normalized scores per document, keyed by category in pattern order"""
+        categories = self.categories
+        return [dict(zip(categories, row)) for row in self.score(profiles).tolist()]
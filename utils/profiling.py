@@ -0,0 +1,408 @@
+"""
+Memory and CPU profiling for pipeline runs.
+
+MemoryProfiler uses tracemalloc to record, for every stage of a run, the
+traced memory at its start and end, the peak reached while it ran and the
+allocation sites that grew the most. Stages may be nested (e.g. the steps of
+report generation inside the report stage); a nested stage's peak still
+counts towards its parent. tracemalloc is process-wide, so only one run is
+memory profiled at a time; runs that overlap it go unprofiled.
+
+CpuProfiler aggregates CPU time per stage with cProfile and/or a sampling
+profiler, and writes pstats files and collapsed stacks (the input format of
+flamegraph.pl and speedscope). It is switched on for live processes through
+the process-wide cpu_profiling control.
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+# Allocations made by tracemalloc itself and by this module are not reported
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__)
+]
+
+# Held by the memory profiler of the run being profiled
+_memory_profiling_lock = threading.Lock()
+
+
+class MemoryProfiler:
+    """Per-stage peak and allocation report of one pipeline run"""
+
+    def __init__(self, top_n: int = 10, frames: int = 1):
+        """
+        Args:
+            top_n: Allocation sites reported per stage
+            frames: Traceback depth stored per allocation; deeper is slower
+        """
+        self.top_n = top_n
+        self.frames = frames
+        self.stages: List[Dict[str, Any]] = []
+        self.active = False
+        self._started_tracing = False
+        self._open_stages: List[Dict[str, Any]] = []
+
+    def start(self) -> bool:
+        """
+        Start tracing allocations, unless something else already does.
+        Returns False, and profiles nothing, while another profiler is active.
+        """
+        if self.active:
+            return True
+        if not _memory_profiling_lock.acquire(blocking=False):
+            return False
+        self.active = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        return True
+
+    def stop(self) -> None:
+        """Stop tracing if this profiler started it, and let the next run profile"""
+        if not self.active:
+            return
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.active = False
+        _memory_profiling_lock.release()
+
+    def _line_totals(self) -> Dict[Tuple[str, int], Tuple[int, int]]:
+        """Traced (size, count) per allocating line. Only these totals are
+        kept, as a full snapshot held across a stage would skew its peak."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        return {
+            (stat.traceback[0].filename, stat.traceback[0].lineno): (stat.size, stat.count)
+            for stat in snapshot.statistics('lineno')
+        }
+
+    def _top_allocations(
+        self,
+        before: Dict[Tuple[str, int], Tuple[int, int]],
+        after: Dict[Tuple[str, int], Tuple[int, int]]
+    ) -> List[Dict[str, Any]]:
+        """Lines whose traced size changed the most between two totals"""
+        changes = []
+        for site in after.keys() | before.keys():
+            size, count = after.get(site, (0, 0))
+            old_size, old_count = before.get(site, (0, 0))
+            if size != old_size or count != old_count:
+                changes.append((site, size, size - old_size, count - old_count))
+        changes.sort(key=lambda change: abs(change[2]), reverse=True)
+        return [
+            {
+                'site': f"{filename}:{lineno}",
+                'size_bytes': size,
+                'size_diff_bytes': size_diff,
+                'count_diff': count_diff
+            }
+            for (filename, lineno), size, size_diff, count_diff in changes[:self.top_n]
+        ]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile the enclosed block as one stage"""
+        if not self.active or not tracemalloc.is_tracing():
+            yield
+            return
+
+        # Resetting the peak hides the parent's peak so far, so keep it first
+        if self._open_stages:
+            parent = self._open_stages[-1]
+            parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+
+        before = self._line_totals()
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        state = {'name': name, 'peak': start_bytes}
+        self._open_stages.append(state)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            self._open_stages.pop()
+            peak_bytes = max(peak_bytes, state['peak'])
+            if self._open_stages:
+                parent = self._open_stages[-1]
+                parent['peak'] = max(parent['peak'], peak_bytes)
+
+            top_allocations = self._top_allocations(before, self._line_totals())
+            # Keep the snapshot just taken out of the enclosing stage's peak
+            tracemalloc.reset_peak()
+            self.stages.append({
+                'stage': '.'.join([*(s['name'] for s in self._open_stages), name]),
+                'duration_seconds': round(duration, 4),
+                'start_bytes': start_bytes,
+                'end_bytes': end_bytes,
+                'peak_bytes': peak_bytes,
+                'peak_increase_bytes': peak_bytes - start_bytes,
+                'retained_bytes': end_bytes - start_bytes,
+                'top_allocations': top_allocations
+            })
+
+    def report(self) -> Dict[str, Any]:
+        """Profile of all finished stages"""
+        return {
+            'traceback_frames': self.frames,
+            'peak_bytes': max((stage['peak_bytes'] for stage in self.stages), default=0),
+            'stages': self.stages
+        }
+
+    def write(self, path: Path) -> str:
+        """Write the profile as JSON and return its path"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        return str(path)
+
+
+class CpuProfiler:
+    """
+    CPU profile of one pipeline run, aggregated per stage.
+
+    Stages run on the event loop thread, so time spent in other tasks that
+    run while a stage awaits is attributed to that stage.
+    """
+
+    MODES = ('cprofile', 'sampling', 'both')
+
+    def __init__(self, mode: str = 'both', interval: float = 0.005):
+        """
+        Args:
+            mode: 'cprofile' for exact per-function statistics, 'sampling'
+                for low-overhead collapsed stacks, or 'both'
+            interval: Seconds between stack samples
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown CPU profiling mode '{mode}', expected one of {self.MODES}")
+        self.mode = mode
+        self.interval = interval
+        self.stage_times: Dict[str, Dict[str, float]] = {}
+        self.stacks: Counter = Counter()
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._current_stage: Optional[str] = None
+        self._thread_id: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+
+    @property
+    def uses_cprofile(self) -> bool:
+        return self.mode in ('cprofile', 'both')
+
+    @property
+    def uses_sampling(self) -> bool:
+        return self.mode in ('sampling', 'both')
+
+    def start(self) -> None:
+        """Start the sampler for the calling thread"""
+        self._thread_id = threading.get_ident()
+        if self.uses_sampling and self._sampler is None:
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(target=self._sample, name="cpu-profiler", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop the sampler"""
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample(self) -> None:
+        while not self._stop_sampling.wait(self.interval):
+            stage = self._current_stage
+            frame = sys._current_frames().get(self._thread_id)
+            if stage is None or frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            names.append(stage)
+            self.stacks[';'.join(reversed(names))] += 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile the enclosed block as one call of the stage"""
+        # cProfile cannot nest; inner blocks count towards the open stage
+        if self._current_stage is not None:
+            yield
+            return
+
+        times = self.stage_times.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        profile = self._profiles.setdefault(name, cProfile.Profile()) if self.uses_cprofile else None
+        self._current_stage = name
+        started = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            times['calls'] += 1
+            times['seconds'] += time.perf_counter() - started
+            self._current_stage = None
+
+    def _top_functions(self, profile: cProfile.Profile, limit: int = 15) -> List[Dict[str, Any]]:
+        """Functions with the highest cumulative time in a stage"""
+        entries = sorted(pstats.Stats(profile).stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                'function': f"{filename}:{lineno}({function})",
+                'calls': calls,
+                'total_seconds': round(total_time, 6),
+                'cumulative_seconds': round(cumulative_time, 6)
+            }
+            for (filename, lineno, function), (_, calls, total_time, cumulative_time, _) in entries[:limit]
+        ]
+
+    def report(self) -> Dict[str, Any]:
+        """Per-stage wall time, sample counts and top functions"""
+        samples = Counter()
+        for stack, count in self.stacks.items():
+            samples[stack.split(';', 1)[0]] += count
+        stages = {}
+        for name, times in self.stage_times.items():
+            stage = {
+                'calls': times['calls'],
+                'seconds': round(times['seconds'], 6),
+                'samples': samples.get(name, 0)
+            }
+            if name in self._profiles:
+                stage['top_functions'] = self._top_functions(self._profiles[name])
+            stages[name] = stage
+        return {'mode': self.mode, 'interval_seconds': self.interval, 'stages': stages}
+
+    def write(self, directory: Path) -> Dict[str, str]:
+        """
+        Write the summary (cpu_profile.json), one pstats file per stage and
+        the collapsed stacks (stacks.collapsed) into directory
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        files = {'summary': str(directory / 'cpu_profile.json')}
+        with open(files['summary'], 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+        for name, profile in self._profiles.items():
+            path = directory / f"{name}.pstats"
+            profile.dump_stats(str(path))
+            files[name] = str(path)
+
+        if self.uses_sampling:
+            files['collapsed'] = str(directory / 'stacks.collapsed')
+            with open(files['collapsed'], 'w', encoding='utf-8') as f:
+                for stack, count in sorted(self.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+        return files
+
+
+class CpuProfilingControl:
+    """
+    Process-wide switch for CPU profiling of pipeline runs. Pipelines ask it
+    for a profiler at the start of every run, so profiling can be turned on
+    and off in a live process. Only one run is profiled at a time.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.mode = 'both'
+        self.interval = 0.005
+        self.remaining_runs: Optional[int] = None
+        self.runs_profiled = 0
+        self.last_output: Optional[Dict[str, str]] = None
+        self._active_run: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def enable(self, mode: str = 'both', interval: float = 0.005, runs: Optional[int] = None) -> None:
+        """Profile the next runs (all of them if runs is None)"""
+        if mode not in CpuProfiler.MODES:
+            raise ValueError(f"Unknown CPU profiling mode '{mode}', expected one of {CpuProfiler.MODES}")
+        with self._lock:
+            self.enabled = True
+            self.mode = mode
+            self.interval = interval
+            self.remaining_runs = runs
+
+    def disable(self) -> None:
+        with self._lock:
+            self.enabled = False
+            self.remaining_runs = None
+
+    @property
+    def active(self) -> bool:
+        """Whether a run is being profiled right now"""
+        return self._active_run is not None
+
+    def begin_run(self, run_id: str) -> Optional[CpuProfiler]:
+        """Started profiler for a run, or None if profiling is off or busy"""
+        with self._lock:
+            if not self.enabled or self._active_run is not None:
+                return None
+            if self.remaining_runs is not None:
+                self.remaining_runs -= 1
+                if self.remaining_runs <= 0:
+                    self.enabled = False
+            self._active_run = run_id
+        profiler = CpuProfiler(self.mode, self.interval)
+        profiler.start()
+        return profiler
+
+    def end_run(self, profiler: CpuProfiler, directory: Path) -> Dict[str, str]:
+        """Stop the run's profiler and write its output into directory"""
+        profiler.stop()
+        try:
+            files = profiler.write(directory)
+        finally:
+            with self._lock:
+                self._active_run = None
+                self.runs_profiled += 1
+        self.last_output = files
+        return files
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'mode': self.mode,
+            'interval_seconds': self.interval,
+            'remaining_runs': self.remaining_runs,
+            'active_run': self._active_run,
+            'runs_profiled': self.runs_profiled,
+            'last_output': self.last_output
+        }
+
+
+# Shared by every pipeline in the process
+cpu_profiling = CpuProfilingControl()
+
+# Memory and CPU profilers of the pipeline run in the current task; runs may
+# overlap. Set by the pipelines, read by the agents that profile their own steps.
+run_profilers: ContextVar[Tuple[Optional[MemoryProfiler], Optional[CpuProfiler]]] = ContextVar(
+    'run_profilers', default=(None, None)
+)
+
+
+@contextmanager
+def profile_stage(name: str, *profilers: Any) -> Iterator[None]:
+    """Run the enclosed block as stage name of every given profiler; None entries are skipped"""
+    with ExitStack() as stack:
+        for profiler in profilers:
+            if profiler is not None:
+                stack.enter_context(profiler.stage(name))
+        yield
@@ -0,0 +1,105 @@
+"""
+Token proximity matcher module for the Feedback Processing System.
+Compiles gapped keyword patterns such as
+``\\b(?:needs|requires)\\b.*\\b(?:immediate|urgent)\\b.*\\b(?:attention|action)\\b``
+into groups of token ids, and counts the sentences in which the groups occur
+in order, optionally within a window of K tokens.
+
+The regexes scan the rest of the line for every match of their first group,
+so their cost grows with the square of the line length, and since a cleaned
+document is a single line they match at most once per document. The matcher
+makes one pass over a document's TextProfile tokens, touching only keyword
+tokens, and counts matches per sentence. On a single sentence it agrees
+with the regex.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.keyword_patterns import ALTERNATION_PATTERN
+from utils.text_profile import WORD_PATTERN, TextProfile, vocabulary
+
+# Gap between the keyword groups of a pattern
+GAP = '.*'
+
+
+def parse_groups(pattern: str) -> List[List[str]]:
+    """Keyword groups of a gapped pattern; raises ValueError on other regex syntax"""
+    groups = []
+    for part in pattern.split(GAP):
+        alternation = ALTERNATION_PATTERN.match(part)
+        if alternation is None:
+            raise ValueError(f"Unsupported proximity pattern: {pattern!r}")
+        words = alternation.group(1).split('|')
+        if not all(WORD_PATTERN.fullmatch(word) for word in words):
+            raise ValueError(f"Proximity keywords must be single words: {pattern!r}")
+        groups.append([word.lower() for word in words])
+    return groups
+
+
+class ProximityMatcher:
+    """
+    Counts, per pattern, the sentences holding a token of each of the
+    pattern's keyword groups in order. With a window, the tokens of a match
+    must also lie within window consecutive tokens.
+    """
+
+    def __init__(self, patterns: Sequence[str], window: int = 0):
+        """
+        Args:
+            patterns: Gapped keyword patterns (see parse_groups)
+            window: Most tokens a match may span; 0 allows the whole sentence
+        """
+        if window < 0:
+            raise ValueError("window must not be negative")
+        self.patterns = list(patterns)
+        self.window = window
+        self.group_counts: List[int] = []
+        # Token id -> (pattern, group) pairs, later groups first so that one
+        # token never extends a chain it has just started
+        postings: Dict[int, List[Tuple[int, int]]] = {}
+        for pattern_index, pattern in enumerate(self.patterns):
+            groups = parse_groups(pattern)
+            self.group_counts.append(len(groups))
+            for group_index, words in enumerate(groups):
+                for token_id in vocabulary.ids_for(words):
+                    postings.setdefault(token_id, []).append((pattern_index, group_index))
+        for entries in postings.values():
+            entries.sort(key=lambda entry: (entry[0], -entry[1]))
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def counts(self, profile: TextProfile) -> List[int]:
+        """Sentences matching each pattern"""
+        counts = [0] * len(self.patterns)
+        postings = self._postings
+        token_ids = profile.token_ids
+        offsets = profile.sentence_offsets
+        window = self.window
+
+        for sentence in range(len(offsets) - 1):
+            # Latest first position of a chain through each group, per pattern
+            chains: Dict[int, List[Optional[int]]] = {}
+            matched = set()
+            for position in range(offsets[sentence], offsets[sentence + 1]):
+                entries = postings.get(token_ids[position])
+                if entries is None:
+                    continue
+                for pattern, group in entries:
+                    if pattern in matched:
+                        continue
+                    starts = chains.get(pattern)
+                    if starts is None:
+                        starts = chains[pattern] = [None] * self.group_counts[pattern]
+                    if group == 0:
+                        starts[0] = position
+                    elif starts[group - 1] is not None:
+                        starts[group] = starts[group - 1]
+                    else:
+                        continue
+                    if group == len(starts) - 1 and (not window or position - starts[group] < window):
+                        matched.add(pattern)
+                        counts[pattern] += 1
+        return counts
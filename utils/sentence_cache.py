@@ -0,0 +1,53 @@
+"""
+Bounded cache of per-sentence scores.
+
+Long reports repeat the same sentences across documents (disclaimers,
+template headers, sign-offs). Scores that depend on a sentence alone can be
+cached by the sentence, so a recurring sentence is scored once. Entries are
+keyed by the exact string that is scored, so a hit returns what computing the
+score would, and the least recently used ones are evicted past capacity.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+
+class SentenceScoreCache:
+    """LRU mapping of sentences to scores"""
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self.entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def score(self, sentence: str, compute: Callable[[str], Any]) -> Any:
+        """Score of a sentence, computed with compute(sentence) on a miss"""
+        entries = self.entries
+        if sentence in entries:
+            entries.move_to_end(sentence)
+            self.hits += 1
+            return entries[sentence]
+
+        self.misses += 1
+        value = entries[sentence] = compute(sentence)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
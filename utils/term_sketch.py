@@ -0,0 +1,135 @@
+"""
+Bounded-memory term frequencies.
+
+TermSketch counts terms in a count-min sketch and keeps the heaviest terms
+(by sketch estimate) as candidates, so its size is fixed however many
+documents or batches it has seen. Sketches with the same shape and seed
+merge by adding their tables, which lets workers and batches be combined
+and a history be persisted between runs and compared with the current batch.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+def _term_hash(term: str, seed: int) -> Tuple[int, int]:
+    """Two independent 64-bit hashes of a term, stable across processes"""
+    digest = hashlib.blake2b(term.encode('utf-8'), digest_size=16, salt=seed.to_bytes(16, 'little')).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class TermSketch:
+    """Count-min sketch of term frequencies with a bounded set of heavy hitters"""
+
+    def __init__(self, width: int = 4096, depth: int = 4, capacity: int = 1000, seed: int = 0):
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        # Candidate heavy hitters and their estimates
+        self.heavy: Dict[str, int] = {}
+        self._rows = np.arange(depth, dtype=np.uint64)
+
+    def _columns(self, terms: List[str]) -> np.ndarray:
+        """Column of every term in every row, shape (depth, len(terms))"""
+        hashes = np.array([_term_hash(term, self.seed) for term in terms], dtype=np.uint64).reshape(-1, 2)
+        # Double hashing: column_i = h1 + i * h2 (mod width)
+        with np.errstate(over='ignore'):
+            combined = hashes[:, 0][None, :] + self._rows[:, None] * hashes[:, 1][None, :]
+        return (combined % np.uint64(self.width)).astype(np.intp)
+
+    def _estimates(self, columns: np.ndarray) -> np.ndarray:
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def update(self, counts: Mapping[str, int]) -> None:
+        """Add term counts"""
+        if not counts:
+            return
+        terms = list(counts)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(terms))
+        columns = self._columns(terms)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], values)
+        self.total += int(values.sum())
+        self._offer(terms, self._estimates(columns))
+
+    def _offer(self, terms: List[str], estimates: np.ndarray) -> None:
+        """Keep the capacity terms with the highest estimates as heavy hitters"""
+        heavy = self.heavy
+        for term, estimate in zip(terms, estimates.tolist()):
+            heavy[term] = estimate
+        if len(heavy) > self.capacity:
+            # Estimates of candidates not in this update are stale
+            self.heavy = dict(self.top(self.capacity))
+
+    def estimate(self, term: str) -> int:
+        """Estimated count of a term; never below the true count"""
+        return int(self._estimates(self._columns([term]))[0])
+
+    def estimates(self, terms: Iterable[str]) -> Dict[str, int]:
+        terms = list(terms)
+        if not terms:
+            return {}
+        return dict(zip(terms, self._estimates(self._columns(terms)).tolist()))
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Heaviest terms, most frequent first"""
+        return sorted(self.estimates(self.heavy).items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def compatible(self, other: 'TermSketch') -> bool:
+        return (self.width, self.depth, self.seed) == (other.width, other.depth, other.seed)
+
+    def merge(self, other: 'TermSketch') -> None:
+        """Add another sketch of the same shape and seed into this one"""
+        if not self.compatible(other):
+            raise ValueError("Only sketches with the same width, depth and seed can be merged")
+        self.table += other.table
+        self.total += other.total
+        candidates = list(dict.fromkeys([*self.heavy, *other.heavy]))
+        self.heavy = {}
+        if candidates:
+            self._offer(candidates, self._estimates(self._columns(candidates)))
+
+    def growth(self, baseline: 'TermSketch', terms: Iterable[str]) -> Dict[str, float]:
+        """
+        Share of each term in this sketch relative to its share in baseline.
+        Add-one smoothing keeps terms unseen in the baseline finite.
+        """
+        current = self.estimates(terms)
+        if not current or self.total == 0:
+            return {}
+        past = baseline.estimates(current)
+        return {
+            term: (count / self.total) / ((past[term] + 1) / (baseline.total + 1))
+            for term, count in current.items()
+        }
+
+    def save(self, path: str) -> None:
+        """Persist the sketch, replacing the file atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            'width': self.width, 'depth': self.depth, 'capacity': self.capacity,
+            'seed': self.seed, 'total': self.total, 'heavy': self.heavy
+        }
+        temporary = path.with_name(path.name + '.tmp')
+        with open(temporary, 'wb') as f:
+            np.savez_compressed(f, table=self.table, meta=np.array(json.dumps(meta)))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'TermSketch':
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            sketch = cls(meta['width'], meta['depth'], meta['capacity'], meta['seed'])
+            sketch.table = data['table'].astype(np.int64)
+        sketch.total = meta['total']
+        sketch.heavy = meta['heavy']
+        return sketch
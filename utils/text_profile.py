@@ -0,0 +1,516 @@
+"""
+Text profile module for the Feedback Processing System.
+Tokenizes a document once so that every agent can reuse the same word tokens,
+sentence boundaries and counts instead of re-running its own regexes.
+
+Token ids, sentence offsets and sentence bounds are stored as ``array('I')``
+(or read-only ``memoryview`` slices of a memory-mapped batch file), so they
+also expose the buffer protocol for ``numpy.frombuffer(..., dtype=numpy.uint32)``.
+"""
+
+import json
+import mmap
+import re
+import sys
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Word tokens and sentence delimiters, as used throughout the agents
+WORD_PATTERN = re.compile(r'\b\w+\b')
+SENTENCE_DELIMITER_PATTERN = re.compile(r'[.!?]+')
+
+# Unsigned 32-bit array typecode used for all id and offset arrays
+ID_TYPECODE = 'I'
+
+IdSequence = Union[array, memoryview]
+
+
+class Vocabulary:
+    """
+    Table interning token strings to integer ids.
+
+    Ids live as long as the process: profiles, batches and the agents'
+    lexicon id sets hold them, so a token is never evicted and its id never
+    reused. To bound the table, document tokens (encode) stop getting new ids
+    once it holds capacity tokens; unseen tokens then map to OVERFLOW_ID, the
+    empty token, which still counts as a token but matches no lexicon.
+    Overflowed tokens are counted, with a warning the first time, and profiles
+    holding them re-read their strings from the text where exact terms matter
+    (TextProfile.token_counts). Words interned directly (intern, ids_for:
+    lexicons and keyword patterns) always get an id. Interning is locked, so
+    threads never give two tokens the same id.
+    """
+
+    # Id of the tokens seen after the table filled up
+    OVERFLOW_ID = 0
+
+    def __init__(self, capacity: Optional[int] = None):
+        """
+        Args:
+            capacity: Most tokens encode assigns ids to; None for no limit
+        """
+        self.capacity = capacity
+        self.overflowed_tokens = 0
+        self._ids: Dict[str, int] = {'': self.OVERFLOW_ID}
+        self._tokens: List[str] = ['']
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._ids
+
+    @property
+    def full(self) -> bool:
+        """Whether encode has stopped assigning new ids"""
+        return self.capacity is not None and len(self._tokens) >= self.capacity
+
+    def intern(self, token: str) -> int:
+        """Return the id of token, assigning a new one on first sight, even past capacity"""
+        token_id = self._ids.get(token)
+        if token_id is None:
+            with self._lock:
+                token_id = self._ids.get(token)
+                if token_id is None:
+                    token_id = len(self._tokens)
+                    self._tokens.append(token)
+                    self._ids[token] = token_id
+        return token_id
+
+    def _intern_bounded(self, token: str) -> int:
+        """Id of a document token; OVERFLOW_ID for unseen tokens once the table is full"""
+        if self.full:
+            token_id = self._ids.get(token)
+            if token_id is None:
+                with self._lock:
+                    self.overflowed_tokens += 1
+                    if self.overflowed_tokens == 1:
+                        logger.warning(
+                            f"Token vocabulary is full ({self.capacity} tokens): new document tokens "
+                            f"share one id from now on, and keywords and terms are read from the text"
+                        )
+                return self.OVERFLOW_ID
+            return token_id
+        return self.intern(token)
+
+    def encode(self, tokens: Iterable[str]) -> List[int]:
+        """Map tokens to ids, interning unseen tokens while the table has room"""
+        ids = self._ids
+        intern = self._intern_bounded
+        return [ids[token] if token in ids else intern(token) for token in tokens]
+
+    def decode(self, token_ids: Iterable[int]) -> List[str]:
+        """Map ids back to their token strings"""
+        tokens = self._tokens
+        return [tokens[token_id] for token_id in token_ids]
+
+    def token(self, token_id: int) -> str:
+        """Return the token string for an id"""
+        return self._tokens[token_id]
+
+    def ids_for(self, tokens: Iterable[str]) -> Set[int]:
+        """Intern a word list (e.g. a lexicon) and return its id set; never OVERFLOW_ID for a word"""
+        return {self.intern(token) for token in tokens}
+
+    def translation(self, tokens: Sequence[str]) -> Optional[array]:
+        """
+        Map ids of a foreign table (given as its token list) to ids in this one.
+        Returns None when the foreign table is a prefix of this one, i.e. the
+        ids already agree and need no remapping.
+        """
+        local_ids = self.encode(tokens)
+        if all(local_id == foreign_id for foreign_id, local_id in enumerate(local_ids)):
+            return None
+        return array(ID_TYPECODE, local_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tokens': len(self._tokens),
+            'capacity': self.capacity,
+            'overflowed_tokens': self.overflowed_tokens
+        }
+
+
+# Tokens the process-wide vocabulary holds before new document tokens
+# overflow; about 150 MB of strings and table entries
+VOCABULARY_CAPACITY = 1_000_000
+
+# Process-wide vocabulary shared by all profiles and agent lexicons
+vocabulary = Vocabulary(VOCABULARY_CAPACITY)
+
+
+def _as_array(values: IdSequence) -> array:
+    """Picklable array for an id sequence, copying only memoryviews"""
+    return values if isinstance(values, array) else array(ID_TYPECODE, values)
+
+
+def _compact_ids(token_ids: IdSequence) -> Tuple[List[str], array]:
+    """
+    Renumber ids densely in order of first use, returning the used tokens and
+    the renumbered ids in the narrowest unsigned array that holds them
+    """
+    local: Dict[int, int] = {}
+    setdefault = local.setdefault
+    local_ids = [setdefault(token_id, len(local)) for token_id in token_ids]
+    typecode = 'B' if len(local) <= 0xFF else 'H' if len(local) <= 0xFFFF else ID_TYPECODE
+    return vocabulary.decode(local), array(typecode, local_ids)
+
+
+def _expand_ids(tokens: Sequence[str], local_ids: IdSequence) -> IdSequence:
+    """Map ids numbered against the given token list into the process vocabulary"""
+    table = vocabulary.translation(tokens)
+    if table is None:
+        if isinstance(local_ids, memoryview) or local_ids.typecode == ID_TYPECODE:
+            return local_ids
+        return array(ID_TYPECODE, local_ids)
+    return array(ID_TYPECODE, [table[local_id] for local_id in local_ids])
+
+
+class TextProfile:
+    """
+    Tokenization of a single document, computed once and shared by all agents.
+
+    Tokens are the lowercased ``\\b\\w+\\b`` words of the text, stored as ids in
+    the shared vocabulary. Sentences are the segments produced by splitting on
+    ``[.!?]+``; ``sentence_bounds`` holds their (start, end) character offsets
+    into ``text.lower()`` as a flat array and ``sentence_offsets`` gives the
+    token range of each sentence.
+    """
+
+    __slots__ = ('token_ids', 'sentence_bounds', 'sentence_offsets', 'word_count', '_counts')
+
+    def __init__(
+        self,
+        token_ids: IdSequence,
+        sentence_bounds: IdSequence,
+        sentence_offsets: IdSequence,
+        word_count: int
+    ):
+        self.token_ids = token_ids
+        self.sentence_bounds = sentence_bounds
+        self.sentence_offsets = sentence_offsets
+        self.word_count = word_count  # Whitespace-separated words, as in len(text.split())
+        self._counts: Optional[Counter] = None
+
+    @classmethod
+    def from_text(cls, text: str) -> 'TextProfile':
+        """Tokenize text in a single pass over its sentences"""
+        lowered = text.lower()
+
+        sentence_bounds = array(ID_TYPECODE)
+        start = 0
+        for delimiter in SENTENCE_DELIMITER_PATTERN.finditer(lowered):
+            sentence_bounds.append(start)
+            sentence_bounds.append(delimiter.start())
+            start = delimiter.end()
+        sentence_bounds.append(start)
+        sentence_bounds.append(len(lowered))
+
+        # Delimiters are never word characters, so tokenizing sentence by
+        # sentence yields exactly the tokens of the whole text
+        token_ids = array(ID_TYPECODE)
+        sentence_offsets = array(ID_TYPECODE, [0])
+        encode = vocabulary.encode
+        for i in range(0, len(sentence_bounds), 2):
+            token_ids.extend(encode(WORD_PATTERN.findall(lowered, sentence_bounds[i], sentence_bounds[i + 1])))
+            sentence_offsets.append(len(token_ids))
+
+        return cls(token_ids, sentence_bounds, sentence_offsets, len(text.split()))
+
+    def __reduce__(self):
+        # Ids are only meaningful within one process, so ship the tokens in use
+        # once and the ids renumbered against them
+        tokens, local_ids = _compact_ids(self.token_ids)
+        return (_profile_from_state, (
+            tokens,
+            local_ids,
+            _as_array(self.sentence_bounds),
+            _as_array(self.sentence_offsets),
+            self.word_count
+        ))
+
+    @property
+    def token_count(self) -> int:
+        """Number of word tokens"""
+        return len(self.token_ids)
+
+    @property
+    def tokens(self) -> List[str]:
+        """Word tokens as strings"""
+        return vocabulary.decode(self.token_ids)
+
+    @property
+    def counts(self) -> Counter:
+        """Token id frequencies, in order of first occurrence"""
+        if self._counts is None:
+            self._counts = Counter(self.token_ids)
+        return self._counts
+
+    @property
+    def unique_token_count(self) -> int:
+        """Number of distinct word tokens"""
+        return len(self.counts)
+
+    @property
+    def sentence_count(self) -> int:
+        """Number of sentence segments, including empty ones"""
+        return len(self.sentence_bounds) // 2
+
+    @property
+    def delimiter_count(self) -> int:
+        """Number of ``[.!?]+`` runs in the text"""
+        return self.sentence_count - 1
+
+    @property
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """Character (start, end) span of each sentence"""
+        bounds = self.sentence_bounds
+        return [(bounds[i], bounds[i + 1]) for i in range(0, len(bounds), 2)]
+
+    def sentence_texts(self, lowered_text: str) -> Iterator[str]:
+        """Yield each sentence segment of the lowercased text"""
+        bounds = self.sentence_bounds
+        for i in range(0, len(bounds), 2):
+            yield lowered_text[bounds[i]:bounds[i + 1]]
+
+    def sentence_token_ids(self, index: int) -> IdSequence:
+        """Return the token ids of one sentence"""
+        return self.token_ids[self.sentence_offsets[index]:self.sentence_offsets[index + 1]]
+
+    def share_of(self, token_ids: Set[int]) -> float:
+        """Fraction of tokens that belong to the given id set"""
+        if not self.token_ids:
+            return 0.0
+        return sum(1 for token_id in self.token_ids if token_id in token_ids) / len(self.token_ids)
+
+    @property
+    def overflowed(self) -> bool:
+        """Whether some tokens came after the vocabulary filled up and share OVERFLOW_ID"""
+        return Vocabulary.OVERFLOW_ID in self.counts
+
+    def term_counts(self, min_length: int = 1) -> Dict[int, int]:
+        """Token id frequencies restricted to tokens of at least min_length characters"""
+        token = vocabulary.token
+        return {
+            token_id: count for token_id, count in self.counts.items()
+            if len(token(token_id)) >= min_length
+        }
+
+    def token_counts(self, text: str, min_length: int = 1) -> Dict[str, int]:
+        """
+        Token frequencies by string, restricted to tokens of at least
+        min_length characters, in order of first occurrence. text is the
+        profiled text; it is tokenized again if the profile has overflowed
+        tokens, whose strings the ids do not keep.
+        """
+        if self.overflowed:
+            counts = Counter(WORD_PATTERN.findall(text.lower()))
+            return {token: count for token, count in counts.items() if len(token) >= min_length}
+        token = vocabulary.token
+        return {token(token_id): count for token_id, count in self.term_counts(min_length).items()}
+
+
+def _profile_from_state(
+    tokens: List[str],
+    local_ids: array,
+    sentence_bounds: array,
+    sentence_offsets: array,
+    word_count: int
+) -> TextProfile:
+    """Rebuild a pickled profile against this process's vocabulary"""
+    return TextProfile(_expand_ids(tokens, local_ids), sentence_bounds, sentence_offsets, word_count)
+
+
+class TokenBatch:
+    """
+    Profiles of many documents packed into a few flat arrays.
+
+    Document ``i`` owns ``token_ids[token_index[i]:token_index[i + 1]]`` and
+    sentences ``sentence_index[i]`` to ``sentence_index[i + 1]``. A batch pickles
+    as the tokens it uses plus the raw arrays, with ids renumbered against
+    those tokens, and can be saved to a file that is later memory-mapped so
+    profiles are served as views.
+    """
+
+    MAGIC = b'TPB1'
+
+    ARRAY_FIELDS = (
+        'token_ids', 'token_index', 'sentence_offsets',
+        'sentence_bounds', 'sentence_index', 'word_counts'
+    )
+
+    def __init__(
+        self,
+        document_ids: List[str],
+        token_ids: IdSequence,
+        token_index: IdSequence,
+        sentence_offsets: IdSequence,
+        sentence_bounds: IdSequence,
+        sentence_index: IdSequence,
+        word_counts: IdSequence,
+        _mapping: Optional[mmap.mmap] = None
+    ):
+        self.document_ids = document_ids
+        self.token_ids = token_ids
+        self.token_index = token_index
+        self.sentence_offsets = sentence_offsets
+        self.sentence_bounds = sentence_bounds
+        self.sentence_index = sentence_index
+        self.word_counts = word_counts
+        self._mapping = _mapping
+
+    @classmethod
+    def from_profiles(cls, document_ids: List[str], profiles: Iterable[TextProfile]) -> 'TokenBatch':
+        """Pack profiles into a batch, keyed by document id"""
+        token_ids = array(ID_TYPECODE)
+        token_index = array(ID_TYPECODE, [0])
+        sentence_offsets = array(ID_TYPECODE)
+        sentence_bounds = array(ID_TYPECODE)
+        sentence_index = array(ID_TYPECODE, [0])
+        word_counts = array(ID_TYPECODE)
+
+        for profile in profiles:
+            token_ids.extend(profile.token_ids)
+            token_index.append(len(token_ids))
+            sentence_offsets.extend(profile.sentence_offsets)
+            sentence_bounds.extend(profile.sentence_bounds)
+            sentence_index.append(sentence_index[-1] + profile.sentence_count)
+            word_counts.append(profile.word_count)
+
+        if len(word_counts) != len(document_ids):
+            raise ValueError("Number of profiles does not match number of document ids")
+
+        return cls(
+            list(document_ids), token_ids, token_index, sentence_offsets,
+            sentence_bounds, sentence_index, word_counts
+        )
+
+    @classmethod
+    def from_documents(cls, documents: Iterable) -> 'TokenBatch':
+        """Pack the text profiles of cleaned documents"""
+        documents = list(documents)
+        return cls.from_profiles(
+            [doc.original_id for doc in documents],
+            [doc.text_profile for doc in documents]
+        )
+
+    def __len__(self) -> int:
+        return len(self.document_ids)
+
+    def profile(self, index: int) -> TextProfile:
+        """Profile of one document, as views into the batch arrays"""
+        first_sentence = self.sentence_index[index]
+        last_sentence = self.sentence_index[index + 1]
+        return TextProfile(
+            self.token_ids[self.token_index[index]:self.token_index[index + 1]],
+            self.sentence_bounds[2 * first_sentence:2 * last_sentence],
+            self.sentence_offsets[first_sentence + index:last_sentence + index + 1],
+            self.word_counts[index]
+        )
+
+    def profiles(self) -> Iterator[TextProfile]:
+        """Yield the profile of each document in order"""
+        for index in range(len(self)):
+            yield self.profile(index)
+
+    def attach(self, documents: Iterable) -> None:
+        """Attach the batch profiles to the cleaned documents they were built from"""
+        positions = {document_id: index for index, document_id in enumerate(self.document_ids)}
+        for doc in documents:
+            index = positions.get(doc.original_id)
+            if index is not None:
+                doc.attach_text_profile(self.profile(index))
+
+    def __reduce__(self):
+        # Like a profile, ship only the tokens the batch uses, so the payload
+        # does not grow with the process vocabulary
+        tokens, local_ids = _compact_ids(self.token_ids)
+        return (_batch_from_state, (
+            self.document_ids,
+            tokens,
+            local_ids,
+            *(_as_array(getattr(self, name)) for name in self.ARRAY_FIELDS[1:])
+        ))
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Write the batch to a binary file: magic, header length, JSON header
+        (document ids, the tokens used, array lengths), then the raw arrays,
+        token ids numbered against the tokens used.
+        """
+        path = Path(path)
+        tokens, local_ids = _compact_ids(self.token_ids)
+        arrays = [array(ID_TYPECODE, local_ids)]
+        arrays.extend(_as_array(getattr(self, name)) for name in self.ARRAY_FIELDS[1:])
+        header = json.dumps({
+            'byteorder': sys.byteorder,
+            'document_ids': self.document_ids,
+            'vocabulary': tokens,
+            'lengths': [len(values) for values in arrays]
+        }).encode('utf-8')
+
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            f.write(b'\0' * (-f.tell() % 4))  # Align the arrays for casting
+            for values in arrays:
+                values.tofile(f)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], use_mmap: bool = True) -> 'TokenBatch':
+        """
+        Read a saved batch. With use_mmap the arrays are views into the mapped
+        file, except token ids, which are copied into this process's
+        vocabulary unless the file's tokens already have the same ids.
+        """
+        with open(path, 'rb') as f:
+            if use_mmap:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+
+        if data[:4] != cls.MAGIC:
+            raise ValueError(f"Not a token batch file: {path}")
+        header_length = int.from_bytes(data[4:8], 'little')
+        header = json.loads(bytes(data[8:8 + header_length]).decode('utf-8'))
+
+        offset = 8 + header_length
+        offset += -offset % 4
+        view = memoryview(data)
+        fields = []
+        for length in header['lengths']:
+            values = view[offset:offset + 4 * length].cast(ID_TYPECODE)
+            if header['byteorder'] != sys.byteorder:
+                values = array(ID_TYPECODE, values)
+                values.byteswap()
+            fields.append(values)
+            offset += 4 * length
+
+        fields[0] = _expand_ids(header['vocabulary'], fields[0])
+
+        return cls(header['document_ids'], *fields, _mapping=data if use_mmap else None)
+
+
+def _batch_from_state(document_ids: List[str], tokens: List[str], token_ids: array, *arrays: array) -> TokenBatch:
+    """Rebuild a pickled batch against this process's vocabulary"""
+    return TokenBatch(document_ids, _expand_ids(tokens, token_ids), *arrays)
+
+
+def detect_language(profile: TextProfile, indicator_ids: Set[int], min_ratio: float) -> str:
+    """
+    Simple language heuristic shared by the agents: a text is English when
+    common English words make up more than min_ratio of its tokens.
+    """
+    if not profile.token_count:
+        return 'unknown'
+    return 'en' if profile.share_of(indicator_ids) > min_ratio else 'unknown'
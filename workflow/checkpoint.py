@@ -0,0 +1,154 @@
+"""
+On-disk checkpoints for chunked workflow runs.
+
+A chunked run processes its input in fixed-size chunks and stores each
+chunk's per-document results (cleaned documents, sentiment and category
+records) under <root>/<task_id>/. Records are stored column-packed (see
+workflow.transport) and a manifest lists the finished chunks together with
+a digest of their input, so a resumed run skips exactly the chunks whose
+input is unchanged. The documents a chunk failed on or cut short (its dead
+letters and budget overruns) are stored with it as JSON, so a resumed run
+still reports them.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.records import CleanedRecord, SentimentRecord, CategoryRecord
+from utils.logger import setup_logger
+from workflow.transport import pack_records, unpack_records
+
+logger = setup_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def chunk_digest(items: List[Any]) -> str:
+    """Digest of a chunk's raw input items"""
+    digest = hashlib.sha1()
+    for item in items:
+        digest.update(json.dumps(item, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write via a temporary file so a crash never leaves a partial file behind"""
+    temporary = path.with_name(path.name + '.tmp')
+    with open(temporary, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class CheckpointStore:
+    """Checkpoints of one chunked run, keyed by task id"""
+
+    def __init__(self, root_dir: str, task_id: str):
+        self.task_id = task_id
+        self.directory = Path(root_dir) / task_id
+        self.manifest: Dict[str, Any] = {'task_id': task_id, 'chunk_size': None, 'chunks': {}}
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def load(self) -> Dict[str, Any]:
+        """Read the manifest of an earlier run"""
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        return self.manifest
+
+    def reset(self, chunk_size: int) -> None:
+        """Start an empty checkpoint, discarding any earlier one for this task"""
+        self.clear()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest = {'task_id': self.task_id, 'chunk_size': chunk_size, 'chunks': {}}
+        self._write_manifest()
+
+    def clear(self) -> None:
+        """Remove all checkpoint files of this task"""
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+
+    @property
+    def chunk_size(self) -> Optional[int]:
+        return self.manifest.get('chunk_size')
+
+    def _write_manifest(self) -> None:
+        _write_atomic(self.manifest_path, json.dumps(self.manifest, indent=2).encode('utf-8'))
+
+    def is_complete(self, index: int, digest: str) -> bool:
+        """Whether chunk index was stored for the same input"""
+        entry = self.manifest['chunks'].get(str(index))
+        return entry is not None and entry['digest'] == digest and (self.directory / entry['file']).exists()
+
+    def save_chunk(
+        self,
+        index: int,
+        digest: str,
+        cleaned: List[CleanedRecord],
+        sentiments: List[SentimentRecord],
+        categories: List[CategoryRecord],
+        collected: int,
+        dead_letters: Optional[List[Dict[str, Any]]] = None,
+        overruns: Optional[List[Dict[str, Any]]] = None,
+        recovered: int = 0
+    ) -> None:
+        """Store a finished chunk, with the documents its retries recovered, then record it in the manifest"""
+        filename = f"chunk-{index:05d}.pkl"
+        payload = {
+            'cleaned': pack_records(cleaned, CleanedRecord),
+            'sentiment': pack_records(sentiments, SentimentRecord),
+            'category': pack_records(categories, CategoryRecord)
+        }
+        _write_atomic(self.directory / filename, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        failures_filename = None
+        if dead_letters or overruns:
+            failures_filename = f"chunk-{index:05d}.failures.json"
+            failures = {'dead_letters': dead_letters or [], 'overruns': overruns or []}
+            _write_atomic(self.directory / failures_filename, json.dumps(failures, default=str).encode('utf-8'))
+        self.manifest['chunks'][str(index)] = {
+            'file': filename,
+            'failures': failures_filename,
+            'digest': digest,
+            'collected_documents': collected,
+            'cleaned_documents': len(cleaned),
+            'recovered_documents': recovered
+        }
+        self._write_manifest()
+
+    def load_chunk(self, index: int) -> Tuple[List[CleanedRecord], List[SentimentRecord], List[CategoryRecord]]:
+        """Records of a stored chunk"""
+        entry = self.manifest['chunks'][str(index)]
+        with open(self.directory / entry['file'], 'rb') as f:
+            payload = pickle.load(f)
+        return (
+            unpack_records(payload['cleaned'], CleanedRecord),
+            unpack_records(payload['sentiment'], SentimentRecord),
+            unpack_records(payload['category'], CategoryRecord)
+        )
+
+    def load_failures(self, index: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Dead letters and budget overruns of a stored chunk, as dicts"""
+        filename = self.manifest['chunks'][str(index)].get('failures')
+        if not filename:
+            return [], []
+        with open(self.directory / filename, 'r', encoding='utf-8') as f:
+            failures = json.load(f)
+        return failures['dead_letters'], failures['overruns']
+
+    def collected_documents(self, index: int) -> int:
+        return self.manifest['chunks'][str(index)]['collected_documents']
+
+    def recovered_documents(self, index: int) -> int:
+        return self.manifest['chunks'][str(index)].get('recovered_documents', 0)
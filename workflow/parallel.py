@@ -0,0 +1,295 @@
+"""
+Parallel mode for the per-document pipeline stages.
+
+Cleaning, sentiment analysis and categorization only look at one document at
+a time, so batches are split into slices that worker processes run through
+all three stages. Documents reach the workers through a SharedTextBatch and
+results come back packed column-wise (see workflow.transport).
+
+Slices are sized by characters, not documents: document lengths range from a
+few characters to a megabyte, and the work of the stages grows with length.
+A WorkScheduler hands out slices only as workers free up, so an idle worker
+takes the next one instead of waiting behind a fixed split, and the target
+size follows the throughput measured on earlier slices. Documents filling half
+a slice or more run alone and first, so a batch finishes about as soon as its
+largest document does.
+"""
+
+import asyncio
+import heapq
+import os
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from agents.categorization import CategorizationAgent
+from agents.data_cleaning import DataCleaningAgent
+from agents.sentiment_analysis import SentimentAnalysisAgent
+from models.feedback_models import FeedbackDocument
+from models.records import CleanedRecord, SentimentRecord, CategoryRecord
+from utils.dead_letter import DeadLetterQueue, collecting, current_queue
+from utils.guardrails import OverrunLog, current_overrun_log, tracking_overruns
+from utils.logger import setup_logger
+from utils.text_profile import vocabulary
+from workflow.transport import SharedTextBatch, TextSlice, pack_records, unpack_records
+
+logger = setup_logger(__name__)
+
+# Fields of each document written to shared memory
+DOCUMENT_FIELDS = ('id', 'filename', 'content')
+
+# Agents owned by a worker process, created once by the pool initializer
+_worker_agents: Optional[Tuple[DataCleaningAgent, SentimentAnalysisAgent, CategorizationAgent]] = None
+
+
+def _init_worker(sentiment_options: Dict[str, Any], categorization_options: Dict[str, Any]) -> None:
+    global _worker_agents
+    sentiment_agent = SentimentAnalysisAgent(**sentiment_options)
+    sentiment_agent.load_backend()
+    categorization_agent = CategorizationAgent(**categorization_options)
+    categorization_agent.load_model()
+    _worker_agents = (DataCleaningAgent(), sentiment_agent, categorization_agent)
+
+
+async def _run_document_stages(documents: List[FeedbackDocument]) -> Dict[str, Any]:
+    cleaning_agent, sentiment_agent, categorization_agent = _worker_agents
+    started = time.perf_counter()
+    overflowed = vocabulary.overflowed_tokens
+    with collecting(DeadLetterQueue()) as dead_letters, tracking_overruns(OverrunLog()) as overruns:
+        cleaned = await cleaning_agent.clean_documents({'documents': documents, 'return_records': True})
+        sentiments = await sentiment_agent.analyze_sentiment({'documents': cleaned, 'return_records': True})
+        categories = await categorization_agent.categorize_feedback({'documents': cleaned, 'return_records': True})
+    return {
+        'cleaned': pack_records(cleaned, CleanedRecord),
+        'sentiment': pack_records(sentiments, SentimentRecord),
+        'category': pack_records(categories, CategoryRecord),
+        'dead_letters': [letter.to_dict() for letter in dead_letters],
+        'overruns': overruns.to_dicts(),
+        'overflowed_tokens': vocabulary.overflowed_tokens - overflowed,
+        'seconds': time.perf_counter() - started
+    }
+
+
+def _process_slice(text_slice: TextSlice) -> Dict[str, Any]:
+    """Worker entry point: read a slice from shared memory and run the stages on it"""
+    with SharedTextBatch.attach(text_slice.block_name) as batch:
+        rows = batch.rows(text_slice.start, text_slice.stop)
+
+    # Fields come from documents the parent already validated
+    documents = [
+        FeedbackDocument.model_construct(id=doc_id or None, filename=filename, content=content)
+        for doc_id, filename, content in rows
+    ]
+    return asyncio.run(_run_document_stages(documents))
+
+
+class WorkUnit(NamedTuple):
+    """Rows [start, stop) of a batch and their character count"""
+    start: int
+    stop: int
+    chars: int
+
+
+class WorkScheduler:
+    """
+    Hands out the rows of a batch as units of about a given number of
+    characters. Documents of at least isolate_chars characters become units
+    of their own and are handed out first, largest first; the others are
+    taken in order from the runs between them.
+    """
+
+    def __init__(self, lengths: Sequence[int], isolate_chars: int, max_documents: int):
+        """
+        Args:
+            lengths: Character count of each document
+            isolate_chars: Length from which a document is a unit of its own
+            max_documents: Most documents in one unit
+        """
+        self.max_documents = max(max_documents, 1)
+        self._prefix = list(accumulate(lengths, initial=0))
+        self.remaining_chars = self._prefix[-1]
+        self.largest_document = max(lengths, default=0)
+
+        # Max-heap of the isolated documents, by length then position
+        self._isolated = [(-length, index) for index, length in enumerate(lengths) if length >= isolate_chars]
+        heapq.heapify(self._isolated)
+        self.isolated_documents = len(self._isolated)
+
+        # Runs of the remaining documents, as [start, stop) ranges
+        self._runs: List[Tuple[int, int]] = []
+        start = 0
+        for _, index in sorted(self._isolated, key=lambda item: item[1]):
+            if index > start:
+                self._runs.append((start, index))
+            start = index + 1
+        if start < len(lengths):
+            self._runs.append((start, len(lengths)))
+        self._runs.reverse()
+
+    def __bool__(self) -> bool:
+        return bool(self._isolated or self._runs)
+
+    def next_unit(self, budget_chars: int) -> Optional[WorkUnit]:
+        """The next unit of at most budget_chars characters (or one document), None when done"""
+        if self._isolated:
+            _, index = heapq.heappop(self._isolated)
+            unit = WorkUnit(index, index + 1, self._prefix[index + 1] - self._prefix[index])
+        elif self._runs:
+            start, stop = self._runs.pop()
+            # Rows whose cumulative length stays within the budget, at least one
+            end = bisect_right(self._prefix, self._prefix[start] + budget_chars, start + 1, stop + 1) - 1
+            end = min(max(end, start + 1), start + self.max_documents)
+            if end < stop:
+                self._runs.append((end, stop))
+            unit = WorkUnit(start, end, self._prefix[end] - self._prefix[start])
+        else:
+            return None
+        self.remaining_chars -= unit.chars
+        return unit
+
+
+class ParallelDocumentProcessor:
+    """
+    Runs cleaning, sentiment analysis and categorization for a batch of
+    documents on a pool of worker processes.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        slice_size: int = 256,
+        sentiment_options: Optional[Dict[str, Any]] = None,
+        categorization_options: Optional[Dict[str, Any]] = None,
+        target_slice_seconds: float = 0.25,
+        min_slice_chars: int = 16_384,
+        max_slice_chars: int = 4_194_304
+    ):
+        """
+        sentiment_options and categorization_options are the keyword
+        arguments of the workers' SentimentAnalysisAgent and CategorizationAgent.
+        A slice holds at most slice_size documents and is sized to take
+        about target_slice_seconds, within [min_slice_chars, max_slice_chars].
+        """
+        self.workers = workers
+        self.slice_size = slice_size
+        self.target_slice_seconds = target_slice_seconds
+        self.min_slice_chars = min_slice_chars
+        self.max_slice_chars = max_slice_chars
+        # Measured throughput of a worker; kept across batches
+        self.chars_per_second: Optional[float] = None
+        self.schedule_stats: Dict[str, Any] = {}
+        # Tokens the workers' full vocabularies gave no id of their own, over all batches
+        self.overflowed_tokens = 0
+        self.sentiment_options = dict(sentiment_options or {})
+        self.categorization_options = dict(categorization_options or {})
+        # Split the cores between the workers' model inference threads
+        self.sentiment_options.setdefault('model_threads', max(1, (os.cpu_count() or 1) // workers))
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """Start the worker pool"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.sentiment_options, self.categorization_options)
+            )
+            logger.info(f"Started parallel document processing with {self.workers} workers")
+
+    def slice_chars(self, remaining_chars: int) -> int:
+        """
+        Target characters of the next slice: what a worker gets through in
+        target_slice_seconds, and no more than a share of what is left, so
+        slices get smaller towards the end of a batch and workers finish together
+        """
+        if self.chars_per_second is None:
+            target = self.max_slice_chars // 16
+        else:
+            target = int(self.chars_per_second * self.target_slice_seconds)
+        target = min(target, remaining_chars // (2 * self.workers))
+        return max(self.min_slice_chars, min(target, self.max_slice_chars))
+
+    def _observe(self, chars: int, seconds: float) -> None:
+        """Fold a finished slice into the throughput estimate"""
+        if chars <= 0 or seconds <= 0:
+            return
+        rate = chars / seconds
+        if self.chars_per_second is None:
+            self.chars_per_second = rate
+        else:
+            self.chars_per_second = 0.7 * self.chars_per_second + 0.3 * rate
+
+    async def process(
+        self,
+        documents: List[FeedbackDocument]
+    ) -> Tuple[List[CleanedRecord], List[SentimentRecord], List[CategoryRecord]]:
+        """Process documents in slices across the pool, preserving document order"""
+        self.start()
+        rows = [(doc.id or '', doc.filename, doc.content) for doc in documents]
+        lengths = [len(doc.content) for doc in documents]
+        # A document filling half a slice would dominate any slice it shared
+        scheduler = WorkScheduler(lengths, self.slice_chars(sum(lengths)) // 2, self.slice_size)
+        stats = {'slices': 0, 'isolated_documents': scheduler.isolated_documents,
+                 'largest_document_chars': scheduler.largest_document, 'max_slice_seconds': 0.0}
+
+        batch = SharedTextBatch.create(rows, len(DOCUMENT_FIELDS))
+        loop = asyncio.get_running_loop()
+        pending: Dict[asyncio.Future, WorkUnit] = {}
+        slice_results: Dict[int, Dict[str, Any]] = {}
+
+        def dispatch() -> None:
+            # One slice queued per worker beyond the running ones, so a worker
+            # that finishes picks up the next slice without a round trip
+            while scheduler and len(pending) <= self.workers:
+                unit = scheduler.next_unit(self.slice_chars(scheduler.remaining_chars))
+                future = loop.run_in_executor(self.executor, _process_slice, batch.slice(unit.start, unit.stop))
+                pending[future] = unit
+                stats['slices'] += 1
+
+        try:
+            logger.info(
+                f"Dispatching {len(documents)} documents to workers "
+                f"({scheduler.isolated_documents} large documents in slices of their own)"
+            )
+            dispatch()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    unit = pending.pop(future)
+                    packed = future.result()
+                    slice_results[unit.start] = packed
+                    self._observe(unit.chars, packed['seconds'])
+                    stats['max_slice_seconds'] = max(stats['max_slice_seconds'], packed['seconds'])
+                dispatch()
+        finally:
+            for future in pending:
+                future.cancel()
+            batch.close()
+
+        stats['chars_per_second'] = round(self.chars_per_second or 0.0, 1)
+        stats['max_slice_seconds'] = round(stats['max_slice_seconds'], 4)
+        self.schedule_stats = stats
+
+        # Documents the workers failed on or cut short join the caller's logs
+        dead_letters = current_queue()
+        overruns = current_overrun_log()
+        cleaned, sentiments, categories = [], [], []
+        # Slices are row ranges, so ordering them by first row restores document order
+        for _, packed in sorted(slice_results.items()):
+            cleaned.extend(unpack_records(packed['cleaned'], CleanedRecord))
+            sentiments.extend(unpack_records(packed['sentiment'], SentimentRecord))
+            categories.extend(unpack_records(packed['category'], CategoryRecord))
+            if dead_letters is not None:
+                dead_letters.absorb(packed['dead_letters'])
+            if overruns is not None:
+                overruns.absorb(packed['overruns'])
+            self.overflowed_tokens += packed['overflowed_tokens']
+        return cleaned, sentiments, categories
+
+    def shutdown(self) -> None:
+        """Stop the worker pool"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,234 @@
+"""
+Inter-process transport for parallel document processing.
+
+Document text is written once into a shared memory block with an offsets
+table, so worker processes receive only small slice descriptors and read
+their documents straight from the block. Results travel back column-wise:
+numbers and enums as typed arrays, strings joined into one buffer with
+offsets, and text profiles as a TokenBatch, instead of one pickled object
+per document and field.
+"""
+
+import typing
+from array import array
+from enum import Enum
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from utils.text_profile import TextProfile, TokenBatch
+
+# Block layout: row count, field count, (rows * fields + 1) byte offsets, UTF-8 data
+_HEADER_FORMAT = 'Q'
+_HEADER_SIZE = array(_HEADER_FORMAT).itemsize
+
+
+class TextSlice(NamedTuple):
+    """Descriptor of rows [start, stop) of a shared text batch"""
+    block_name: str
+    start: int
+    stop: int
+
+
+class SharedTextBatch:
+    """
+    Rows of string fields (e.g. id, filename, content per document) stored
+    as UTF-8 in a shared memory block. The creating process owns the block
+    and must unlink it; other processes attach by name.
+    """
+
+    def __init__(self, block: shared_memory.SharedMemory, owner: bool):
+        self.block = block
+        self.owner = owner
+        header = block.buf[:2 * _HEADER_SIZE].cast(_HEADER_FORMAT)
+        self.row_count, self.field_count = header[0], header[1]
+        header.release()
+        self._data_start = (2 + self.row_count * self.field_count + 1) * _HEADER_SIZE
+        self._offsets = block.buf[2 * _HEADER_SIZE:self._data_start].cast(_HEADER_FORMAT)
+
+    @classmethod
+    def create(cls, rows: Sequence[Sequence[str]], field_count: int) -> 'SharedTextBatch':
+        """Write rows of field_count strings into a new shared memory block"""
+        encoded = [value.encode('utf-8') for row in rows for value in row]
+        if len(encoded) != len(rows) * field_count:
+            raise ValueError(f"Every row must have exactly {field_count} fields")
+
+        offsets = array(_HEADER_FORMAT, [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+
+        data_start = (2 + len(offsets)) * _HEADER_SIZE
+        block = shared_memory.SharedMemory(create=True, size=max(data_start + offsets[-1], 1))
+        header = array(_HEADER_FORMAT, [len(rows), field_count])
+        block.buf[:2 * _HEADER_SIZE] = header.tobytes()
+        block.buf[2 * _HEADER_SIZE:data_start] = offsets.tobytes()
+        block.buf[data_start:data_start + offsets[-1]] = b''.join(encoded)
+        return cls(block, owner=True)
+
+    @classmethod
+    def attach(cls, block_name: str) -> 'SharedTextBatch':
+        """Open a block created by another process"""
+        return cls(shared_memory.SharedMemory(name=block_name), owner=False)
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __enter__(self) -> 'SharedTextBatch':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def row(self, index: int) -> Tuple[str, ...]:
+        """Decode the fields of one row"""
+        first = index * self.field_count
+        offsets = self._offsets
+        start = self._data_start
+        buf = self.block.buf
+        return tuple(
+            str(buf[start + offsets[i]:start + offsets[i + 1]], 'utf-8')
+            for i in range(first, first + self.field_count)
+        )
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Tuple[str, ...]]:
+        """Decode a range of rows"""
+        stop = self.row_count if stop is None else stop
+        return [self.row(index) for index in range(start, stop)]
+
+    def slice(self, start: int, stop: int) -> TextSlice:
+        """Descriptor of rows [start, stop)"""
+        return TextSlice(self.block.name, start, stop)
+
+    def slices(self, size: int) -> List[TextSlice]:
+        """Split the batch into descriptors of at most size rows"""
+        return [
+            self.slice(start, min(start + size, self.row_count))
+            for start in range(0, self.row_count, max(size, 1))
+        ]
+
+    def close(self) -> None:
+        """Detach from the block, removing it if this process created it"""
+        self._offsets.release()
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    """Optional[X] -> X"""
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _pack_strings(values: Sequence[str]) -> Tuple[str, array]:
+    """Join strings into one buffer plus character offsets"""
+    offsets = array('Q', [0])
+    for value in values:
+        offsets.append(offsets[-1] + len(value))
+    return ''.join(values), offsets
+
+
+def _unpack_strings(packed: Tuple[str, array]) -> List[str]:
+    joined, offsets = packed
+    return [joined[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def _split_by_counts(items: List[Any], counts: array) -> List[List[Any]]:
+    """Regroup a flattened list using the per-row item counts"""
+    groups = []
+    position = 0
+    for count in counts:
+        groups.append(items[position:position + count])
+        position += count
+    return groups
+
+
+def _pack_scalars(annotation: Any, values: List[Any]) -> Tuple[str, Any]:
+    if annotation is str:
+        return 'str', _pack_strings(values)
+    if annotation is int:
+        return 'int', array('q', values)
+    if annotation is float:
+        return 'float', array('d', values)
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        codes = {member: code for code, member in enumerate(annotation)}
+        return 'enum', array('B', [codes[annotation(value)] for value in values])
+    return 'object', values
+
+
+def _unpack_scalars(annotation: Any, kind: str, packed: Any) -> List[Any]:
+    if kind == 'str':
+        return _unpack_strings(packed)
+    if kind == 'enum':
+        members = list(annotation)
+        return [members[code] for code in packed]
+    return list(packed)
+
+
+def _pack_column(annotation: Any, values: List[Any]) -> Tuple[str, Any]:
+    annotation = _unwrap_optional(annotation)
+    origin = typing.get_origin(annotation)
+
+    if annotation is TextProfile:
+        return 'profiles', TokenBatch.from_profiles([str(i) for i in range(len(values))], values)
+
+    if origin in (list, List):
+        (item_type,) = typing.get_args(annotation)
+        items = [item for value in values for item in value]
+        return 'list', (_pack_scalars(item_type, items), array('I', map(len, values)))
+
+    if origin in (dict, Dict):
+        key_type, value_type = typing.get_args(annotation)
+        keys = [key for value in values for key in value]
+        entries = [entry for value in values for entry in value.values()]
+        return 'dict', (
+            _pack_scalars(key_type, keys),
+            _pack_scalars(value_type, entries),
+            array('I', map(len, values))
+        )
+
+    return _pack_scalars(annotation, values)
+
+
+def _unpack_column(annotation: Any, kind: str, packed: Any) -> List[Any]:
+    annotation = _unwrap_optional(annotation)
+
+    if kind == 'profiles':
+        return list(packed.profiles())
+
+    if kind == 'list':
+        (item_type,) = typing.get_args(annotation)
+        (item_kind, items), counts = packed
+        return _split_by_counts(_unpack_scalars(item_type, item_kind, items), counts)
+
+    if kind == 'dict':
+        key_type, value_type = typing.get_args(annotation)
+        (key_kind, keys), (value_kind, entries), counts = packed
+        keys = _split_by_counts(_unpack_scalars(key_type, key_kind, keys), counts)
+        entries = _split_by_counts(_unpack_scalars(value_type, value_kind, entries), counts)
+        return [dict(zip(row_keys, row_entries)) for row_keys, row_entries in zip(keys, entries)]
+
+    return _unpack_scalars(annotation, kind, packed)
+
+
+def pack_records(records: List[Any], record_cls: Type) -> Dict[str, Any]:
+    """Convert a list of dataclass records into typed columns for transfer"""
+    hints = typing.get_type_hints(record_cls)
+    return {
+        name: _pack_column(hints[name], [getattr(record, name) for record in records])
+        for name in record_cls.__dataclass_fields__
+    }
+
+
+def unpack_records(packed: Dict[str, Any], record_cls: Type) -> List[Any]:
+    """Rebuild the records produced by pack_records"""
+    hints = typing.get_type_hints(record_cls)
+    columns = {
+        name: _unpack_column(hints[name], kind, values)
+        for name, (kind, values) in packed.items()
+    }
+    if not columns:
+        return []
+    return [record_cls(**dict(zip(columns, row))) for row in zip(*columns.values())]
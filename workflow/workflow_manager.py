@@ -7,6 +7,7 @@ import logging
 import json
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
+from pathlib import Path
 
 from models.feedback_models import (
     FeedbackDocument, CleanedDocument, SentimentAnalysis, 
@@ -19,17 +20,86 @@ from agents.categorization import CategorizationAgent
 from agents.insight_generation import InsightGenerationAgent
 from agents.recommendation import RecommendationAgent
 from agents.report_generation import ReportGenerationAgent
+from models.records import CleanedRecord
+from utils.dead_letter import DeadLetterQueue, collecting, current_queue, record_failure, replay_stages
+from utils.guardrails import OverrunLog, current_overrun_log, tracking_overruns
 from utils.logger import setup_logger
+from utils.profiling import CpuProfiler, MemoryProfiler, cpu_profiling, profile_stage, run_profilers
+from utils.text_profile import vocabulary
+from workflow.checkpoint import CheckpointStore, chunk_digest
+from workflow.parallel import ParallelDocumentProcessor
 
 logger = setup_logger(__name__)
 
+
+def _stage_inputs(documents: List[Any], model: type) -> List[Any]:
+    """Stage inputs, rebuilding the ones serialized by worker processes as model"""
+    return [model(**document) if isinstance(document, dict) else document for document in documents]
+
+
 class WorkflowManager:
     """
     Manages the end-to-end feedback processing workflow by coordinating
     between different specialized agents.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        parallel_workers: int = 0,
+        parallel_slice_size: int = 256,
+        profile_memory: bool = False,
+        chunk_size: int = 0,
+        checkpoint_dir: str = "./checkpoints",
+        term_history_path: Optional[str] = None,
+        category_scoring: str = "patterns",
+        category_model_path: Optional[str] = None,
+        category_model_weight: float = 0.5,
+        sentiment_backend: str = "lexicon",
+        sentiment_model_dir: Optional[str] = None,
+        sentiment_cascade: bool = False,
+        sentiment_sentence_level: bool = False,
+        segment_chars: int = 0,
+        document_time_budget: float = 0.0,
+        max_retries: int = 2,
+        retry_backoff_seconds: float = 0.5
+    ):
+        """
+        Args:
+            parallel_workers: Worker processes for cleaning, sentiment analysis
+                and categorization; 0 or 1 runs them in this process
+            parallel_slice_size: Most documents in a unit of work sent to a
+                worker; units are otherwise sized by characters
+            profile_memory: Trace allocations per stage and write a memory
+                profile next to each report
+            chunk_size: Run the per-document stages in chunks of this many
+                input items, checkpointing each chunk; 0 processes the input
+                in one go
+            checkpoint_dir: Where chunk checkpoints are stored, per task id
+            term_history_path: File keeping the term frequencies of earlier
+                runs, the baseline for emerging topics
+            category_scoring: 'patterns' scores categories with the regexes
+                per document, 'matrix' per batch with the compiled keyword
+                matrix (see utils.keyword_patterns)
+            category_model_path: Trained category model artifact blended with
+                the pattern scores (see agents.category_model)
+            category_model_weight: Share of the model in the blended scores
+            sentiment_backend: 'lexicon' or 'transformer' (see
+                agents.sentiment_backends)
+            sentiment_model_dir: Local model directory of the transformer
+                sentiment backend
+            sentiment_cascade: Score sentiment with the lexicon first and use
+                the backend only for uncertain documents
+            sentiment_sentence_level: Score sentiment context per sentence,
+                caching the scores of recurring sentences
+            segment_chars: Score documents longer than this in windows of
+                this many characters (see utils.guardrails); 0 scores them whole
+            document_time_budget: Seconds after which sentiment analysis and
+                categorization stop scoring a document's windows; 0 sets no budget
+            max_retries: Retries of a document after its first transient
+                failure, once the per-document stages are through
+            retry_backoff_seconds: Wait before the first retry pass; doubled
+                on every pass
+        """
         self.agent_id = "workflow_manager"
         self.status = "idle"
         self.current_task_id = None
@@ -38,6 +108,9 @@ class WorkflowManager:
         self.processing_stats = {
             'documents_processed': 0,
             'errors_encountered': 0,
+            'failed_documents': 0,
+            'budget_overruns': 0,
+            'overflowed_tokens': 0,
             'processing_time_seconds': 0,
             'agent_stats': {}
         }
@@ -45,12 +118,47 @@ class WorkflowManager:
         # Initialize all agents
         self.data_collection_agent = DataCollectionAgent()
         self.data_cleaning_agent = DataCleaningAgent()
-        self.sentiment_analysis_agent = SentimentAnalysisAgent()
-        self.categorization_agent = CategorizationAgent()
-        self.insight_generation_agent = InsightGenerationAgent()
+        sentiment_options = {
+            'backend': sentiment_backend,
+            'model_dir': sentiment_model_dir,
+            'cascade': sentiment_cascade,
+            'sentence_level': sentiment_sentence_level,
+            'segment_chars': segment_chars,
+            'time_budget_seconds': document_time_budget
+        }
+        categorization_options = {
+            'scoring_mode': category_scoring,
+            'model_path': category_model_path,
+            'model_weight': category_model_weight,
+            'segment_chars': segment_chars,
+            'time_budget_seconds': document_time_budget
+        }
+        self.sentiment_analysis_agent = SentimentAnalysisAgent(**sentiment_options)
+        self.categorization_agent = CategorizationAgent(**categorization_options)
+        self.insight_generation_agent = InsightGenerationAgent(term_history_path)
         self.recommendation_agent = RecommendationAgent()
         self.report_generation_agent = ReportGenerationAgent()
         
+        # Optional process pool for the per-document stages
+        self.parallel_processor = (
+            ParallelDocumentProcessor(parallel_workers, parallel_slice_size, sentiment_options, categorization_options)
+            if parallel_workers > 1 else None
+        )
+        
+        # Chunked execution with checkpoints (see workflow.checkpoint)
+        self.chunk_size = chunk_size
+        self.checkpoint_dir = checkpoint_dir
+        
+        # Retries of transient per-document failures (see utils.dead_letter)
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        
+        # Memory profiling of each run, and CPU profiling while switched on
+        # through utils.profiling.cpu_profiling
+        self.profile_memory = profile_memory
+        self.memory_profiler: Optional[MemoryProfiler] = None
+        self.cpu_profiler: Optional[CpuProfiler] = None
+        
         # Store intermediate results
         self.cleaned_documents = []
         self.sentiment_results = []
@@ -76,6 +184,9 @@ class WorkflowManager:
                 self.report_generation_agent.initialize()
             )
             
+            if self.parallel_processor is not None:
+                self.parallel_processor.start()
+            
             self.status = "ready"
             logger.info("Workflow Manager and all agents initialized successfully")
             return {"status": "success", "message": "Workflow Manager initialized"}
@@ -88,7 +199,8 @@ class WorkflowManager:
     async def process_feedback(
         self, 
         input_data: Union[Dict[str, Any], List[Dict[str, Any]]],
-        task_id: Optional[str] = None
+        task_id: Optional[str] = None,
+        resume: bool = False
     ) -> Dict[str, Any]:
         """
         Process feedback through the entire pipeline
@@ -96,6 +208,8 @@ class WorkflowManager:
         Args:
             input_data: Raw feedback data or list of feedback items
             task_id: Optional task ID for tracking
+            resume: Continue the chunked run task_id from its checkpoint,
+                skipping the chunks it already finished
             
         Returns:
             Dict containing processing results and status
@@ -106,60 +220,77 @@ class WorkflowManager:
         self.processing_stats = {
             'documents_processed': 0,
             'errors_encountered': 0,
+            'failed_documents': 0,
+            'budget_overruns': 0,
+            'overflowed_tokens': 0,
             'processing_time_seconds': 0,
             'agent_stats': {}
         }
         
         logger.info(f"Starting feedback processing for task {self.current_task_id}")
         
+        if self.profile_memory:
+            self.memory_profiler = MemoryProfiler()
+            if not self.memory_profiler.start():
+                logger.info(f"Another run is being memory profiled, task {self.current_task_id} runs unprofiled")
+                self.memory_profiler = None
+        self.cpu_profiler = cpu_profiling.begin_run(self.current_task_id)
+        profilers_token = run_profilers.set((self.memory_profiler, self.cpu_profiler))
+        
+        # Documents the per-document stages fail on, written next to the report,
+        # and documents they cut short on the time budget
+        dead_letters = DeadLetterQueue(self.max_retries, self.retry_backoff_seconds)
+        overruns = OverrunLog()
+        overflowed_tokens = self._overflowed_tokens()
+        
         try:
-            # 1. Data Collection
-            collection_result = await self._run_data_collection(input_data)
-            if not collection_result.get('success', False):
-                raise Exception(f"Data collection failed: {collection_result.get('message')}")
-            
-            # 2. Data Cleaning
-            cleaning_result = await self._run_data_cleaning(collection_result['documents'])
-            if not cleaning_result.get('success', False):
-                raise Exception(f"Data cleaning failed: {cleaning_result.get('message')}")
-            
-            # 3. Sentiment Analysis
-            sentiment_result = await self._run_sentiment_analysis(cleaning_result['cleaned_documents'])
-            if not sentiment_result.get('success', False):
-                raise Exception(f"Sentiment analysis failed: {sentiment_result.get('message')}")
-            
-            # 4. Categorization
-            categorization_result = await self._run_categorization(
-                cleaning_result['cleaned_documents'], 
-                sentiment_result['sentiment_results']
-            )
-            if not categorization_result.get('success', False):
-                raise Exception(f"Categorization failed: {categorization_result.get('message')}")
+            with collecting(dead_letters), tracking_overruns(overruns):
+                if self.chunk_size > 0 or resume:
+                    # 1-4. Per-document stages chunk by chunk, with checkpoints
+                    document_result = await self._run_chunked_document_stages(input_data, resume)
+                else:
+                    # 1-4. Per-document stages over the whole input, then
+                    # another chance for the transient failures
+                    document_result = await self._run_document_stages(input_data)
+                    await self._retry_failed_documents(document_result)
+            self.processing_stats['failed_documents'] = len(dead_letters.failed_ids())
+            self.processing_stats['agent_stats']['dead_letters'] = dead_letters.stats()
+            self.processing_stats['budget_overruns'] = len(overruns.document_ids())
+            self.processing_stats['overflowed_tokens'] = self._overflowed_tokens() - overflowed_tokens
+            if self.processing_stats['overflowed_tokens']:
+                self.processing_stats['agent_stats']['vocabulary'] = vocabulary.stats()
             
             # 5. Insight Generation
-            insight_result = await self._run_insight_generation(
-                cleaning_result['cleaned_documents'],
-                sentiment_result['sentiment_results'],
-                categorization_result['categorization_results']
-            )
+            with profile_stage("insight_generation", self.memory_profiler, self.cpu_profiler):
+                insight_result = await self._run_insight_generation(
+                    document_result['cleaned_documents'],
+                    document_result['sentiment_results'],
+                    document_result['categorization_results']
+                )
             if not insight_result.get('success', False):
                 raise Exception(f"Insight generation failed: {insight_result.get('message')}")
             
             # 6. Recommendation Generation
-            recommendation_result = await self._run_recommendation_generation(
-                insight_result['insights']
-            )
+            with profile_stage("recommendation_generation", self.memory_profiler, self.cpu_profiler):
+                recommendation_result = await self._run_recommendation_generation(
+                    insight_result['insights']
+                )
             if not recommendation_result.get('success', False):
                 raise Exception(f"Recommendation generation failed: {recommendation_result.get('message')}")
             
             # 7. Generate Final Report
-            report = await self._generate_final_report(
-                cleaning_result['cleaned_documents'],
-                sentiment_result['sentiment_results'],
-                categorization_result['categorization_results'],
-                insight_result['insights'],
-                recommendation_result['recommendations']
-            )
+            with profile_stage("report_generation", self.memory_profiler, self.cpu_profiler):
+                report = await self._generate_final_report(
+                    document_result['cleaned_documents'],
+                    document_result['sentiment_results'],
+                    document_result['categorization_results'],
+                    insight_result['insights'],
+                    recommendation_result['recommendations']
+                )
+            
+            # The checkpoint is only needed to resume a failed run
+            if document_result.get('checkpoint') is not None:
+                document_result['checkpoint'].clear()
             
             # Update status and stats
             self.status = "completed"
@@ -170,30 +301,307 @@ class WorkflowManager:
             
             logger.info(f"Successfully completed processing for task {self.current_task_id}")
             
-            return {
+            result = {
                 "status": "success",
                 "task_id": self.current_task_id,
                 "report": report,
                 "processing_stats": self.processing_stats
             }
+            if overruns:
+                result["budget_overruns"] = overruns.to_dicts()
+            self._write_dead_letters(dead_letters, result)
+            self._write_profiles(result)
+            return result
             
         except Exception as e:
             self.status = "error"
             self.processing_stats['errors_encountered'] += 1
             logger.error(f"Error processing feedback: {str(e)}", exc_info=True)
             
-            return {
+            result = {
                 "status": "error",
                 "task_id": self.current_task_id,
                 "message": str(e),
                 "processing_stats": self.processing_stats
             }
+            self._write_profiles(result)
+            return result
+        
+        finally:
+            run_profilers.reset(profilers_token)
+            if self.memory_profiler is not None:
+                self.memory_profiler.stop()
+                self.memory_profiler = None
+            if self.cpu_profiler is not None:
+                cpu_profiling.end_run(self.cpu_profiler, self._profile_dir())
+                self.cpu_profiler = None
+    
+    def _overflowed_tokens(self) -> int:
+        """Tokens that came after the vocabulary filled up, here and in the worker processes, so far"""
+        workers = self.parallel_processor.overflowed_tokens if self.parallel_processor is not None else 0
+        return vocabulary.overflowed_tokens + workers
+    
+    def _profile_dir(self) -> Path:
+        """Directory for the CPU profile files of the current run"""
+        return self.report_generation_agent.output_dir / "profiles" / self.current_task_id
+    
+    def _write_dead_letters(self, dead_letters: DeadLetterQueue, result: Dict[str, Any]) -> None:
+        """Write the failed documents of the current run next to its report and add the path to result"""
+        try:
+            path = dead_letters.write(
+                self.report_generation_agent.output_dir / f"{self.current_task_id}_dead_letter.jsonl"
+            )
+        except Exception as e:
+            logger.error(f"Error writing dead letters: {str(e)}")
+            return
+        if path:
+            result["dead_letter"] = path
+            logger.warning(f"{len(dead_letters)} failed documents written to {path}")
+    
+    def _write_profiles(self, result: Dict[str, Any]) -> None:
+        """Write the profiles of the current run next to its report and add their paths to result"""
+        if self.memory_profiler is not None:
+            try:
+                path = self.report_generation_agent.output_dir / f"{self.current_task_id}_memory_profile.json"
+                result["memory_profile"] = self.memory_profiler.write(path)
+                logger.info(f"Memory profile written: {result['memory_profile']}")
+            except Exception as e:
+                logger.error(f"Error writing memory profile: {str(e)}")
+        
+        if self.cpu_profiler is not None:
+            profiler, self.cpu_profiler = self.cpu_profiler, None
+            try:
+                result["cpu_profile"] = cpu_profiling.end_run(profiler, self._profile_dir())
+                logger.info(f"CPU profile written: {result['cpu_profile']['summary']}")
+            except Exception as e:
+                logger.error(f"Error writing CPU profile: {str(e)}")
+    
+    async def _run_document_stages(
+        self,
+        input_data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        allow_empty: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run collection, cleaning, sentiment analysis and categorization, raising
+        on failure. With allow_empty (a chunk of a larger run), input whose
+        documents are all rejected before analysis gives empty results instead.
+        """
+        empty_result = {
+            "collected_documents": 0,
+            "cleaned_documents": [],
+            "sentiment_results": [],
+            "categorization_results": []
+        }
+        
+        # 1. Data Collection
+        with profile_stage("data_collection", self.memory_profiler, self.cpu_profiler):
+            collection_result = await self._run_data_collection(input_data, allow_empty)
+        if not collection_result.get('success', False):
+            raise Exception(f"Data collection failed: {collection_result.get('message')}")
+        if not collection_result['documents']:
+            return empty_result
+        
+        if self.parallel_processor is not None:
+            # 2-4. Cleaning, Sentiment Analysis and Categorization in worker processes
+            with profile_stage("parallel_document_stages", self.memory_profiler, self.cpu_profiler):
+                document_result = await self._run_parallel_document_stages(collection_result['documents'])
+            if not document_result.get('success', False):
+                raise Exception(f"Parallel document processing failed: {document_result.get('message')}")
+            cleaning_result = sentiment_result = categorization_result = document_result
+        else:
+            # 2. Data Cleaning
+            with profile_stage("data_cleaning", self.memory_profiler, self.cpu_profiler):
+                cleaning_result = await self._run_data_cleaning(collection_result['documents'], allow_empty)
+            if not cleaning_result.get('success', False):
+                raise Exception(f"Data cleaning failed: {cleaning_result.get('message')}")
+            if not cleaning_result['cleaned_documents']:
+                return {**empty_result, "collected_documents": len(collection_result['documents'])}
+            
+            # 3. Sentiment Analysis
+            with profile_stage("sentiment_analysis", self.memory_profiler, self.cpu_profiler):
+                sentiment_result = await self._run_sentiment_analysis(cleaning_result['cleaned_documents'])
+            if not sentiment_result.get('success', False):
+                raise Exception(f"Sentiment analysis failed: {sentiment_result.get('message')}")
+            
+            # 4. Categorization
+            with profile_stage("categorization", self.memory_profiler, self.cpu_profiler):
+                categorization_result = await self._run_categorization(
+                    cleaning_result['cleaned_documents'], 
+                    sentiment_result['sentiment_results']
+                )
+            if not categorization_result.get('success', False):
+                raise Exception(f"Categorization failed: {categorization_result.get('message')}")
+        
+        return {
+            "collected_documents": len(collection_result['documents']),
+            "cleaned_documents": cleaning_result['cleaned_documents'],
+            "sentiment_results": sentiment_result['sentiment_results'],
+            "categorization_results": categorization_result['categorization_results']
+        }
+    
+    async def _retry_failed_documents(self, document_result: Dict[str, Any]) -> None:
+        """Retry the transient failures of the current run, adding what recovers to document_result"""
+        dead_letters = current_queue()
+        if not dead_letters:
+            return
+        recovered = await dead_letters.retry(
+            lambda batch: self._replay_failed_documents(batch, document_result)
+        )
+        logger.info(f"{len(dead_letters.failed_ids())} documents failed, {recovered} recovered on retry")
+        
+        # The stage counts include the recovered documents
+        collected = document_result['collected_documents']
+        self.processing_stats['documents_processed'] = collected
+        agent_stats = self.processing_stats['agent_stats']
+        if 'data_collection' in agent_stats:
+            agent_stats['data_collection']['documents_processed'] = collected
+        for stage, count, results in (
+            ('data_cleaning', 'documents_cleaned', 'cleaned_documents'),
+            ('sentiment_analysis', 'documents_analyzed', 'sentiment_results'),
+            ('categorization', 'documents_categorized', 'categorization_results')
+        ):
+            if stage in agent_stats:
+                agent_stats[stage][count] = len(document_result[results])
+    
+    async def _replay_failed_documents(self, batch: Dict[str, List[Any]], document_result: Dict[str, Any]) -> None:
+        """
+        Run retried documents through the stages from the one they failed in,
+        in this process. Failures recorded by worker processes hold their
+        documents as dicts, which are turned back into stage inputs first.
+        """
+        async def collect(documents: List[Any]) -> List[Any]:
+            validated = await self.data_collection_agent.validate_and_enrich({
+                'documents': _stage_inputs(documents, FeedbackDocument)
+            })
+            document_result['collected_documents'] += len(validated)
+            return validated
+        
+        async def clean(documents: List[Any]) -> List[Any]:
+            return await self.data_cleaning_agent.clean_documents({
+                'documents': _stage_inputs(documents, FeedbackDocument), 'return_records': True
+            })
+        
+        async def analyze(documents: List[Any]) -> List[Any]:
+            return await self.sentiment_analysis_agent.analyze_sentiment({
+                'documents': _stage_inputs(documents, CleanedRecord), 'return_records': True
+            })
+        
+        async def categorize(documents: List[Any]) -> List[Any]:
+            return await self.categorization_agent.categorize_feedback({
+                'documents': _stage_inputs(documents, CleanedRecord), 'return_records': True
+            })
+        
+        cleaned, results = await replay_stages(
+            batch, collect, clean, {'sentiment_analysis': analyze, 'categorization': categorize}
+        )
+        document_result['cleaned_documents'].extend(cleaned)
+        document_result['sentiment_results'].extend(results['sentiment_analysis'])
+        document_result['categorization_results'].extend(results['categorization'])
+    
+    async def _run_chunked_document_stages(
+        self,
+        input_data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        resume: bool
+    ) -> Dict[str, Any]:
+        """
+        Run the per-document stages chunk by chunk, checkpointing every
+        finished chunk, and merge all chunks for the aggregate stages
+        """
+        items = [input_data] if isinstance(input_data, dict) else list(input_data)
+        store = CheckpointStore(self.checkpoint_dir, self.current_task_id)
+        
+        if resume and store.exists():
+            store.load()
+            chunk_size = store.chunk_size
+            logger.info(f"Resuming task {self.current_task_id}: {len(store.manifest['chunks'])} chunks checkpointed")
+        else:
+            if resume:
+                logger.warning(f"No checkpoint found for task {self.current_task_id}, starting from the beginning")
+            chunk_size = self.chunk_size or len(items) or 1
+            store.reset(chunk_size)
+        
+        chunk_count = (len(items) + chunk_size - 1) // chunk_size
+        skipped = 0
+        for index in range(chunk_count):
+            chunk = items[index * chunk_size:(index + 1) * chunk_size]
+            digest = chunk_digest(chunk)
+            if store.is_complete(index, digest):
+                skipped += 1
+                continue
+            
+            logger.info(f"Processing chunk {index + 1}/{chunk_count} ({len(chunk)} items)")
+            # The chunk's transient failures are retried before it is checkpointed; the
+            # rest are checkpointed with it, so a resumed run still reports them
+            chunk_queue = DeadLetterQueue(self.max_retries, self.retry_backoff_seconds)
+            with collecting(chunk_queue) as chunk_letters, tracking_overruns(OverrunLog()) as chunk_overruns:
+                chunk_result = await self._run_document_stages(chunk, allow_empty=True)
+                await self._retry_failed_documents(chunk_result)
+            store.save_chunk(
+                index, digest,
+                chunk_result['cleaned_documents'],
+                chunk_result['sentiment_results'],
+                chunk_result['categorization_results'],
+                chunk_result['collected_documents'],
+                [letter.to_dict() for letter in chunk_letters],
+                chunk_overruns.to_dicts(),
+                chunk_letters.recovered
+            )
+        
+        if skipped:
+            logger.info(f"Skipped {skipped} chunks completed by an earlier run")
+        
+        # Merge the checkpoints for the aggregate stages, and the chunks' failures into the run's
+        dead_letters = current_queue()
+        overruns = current_overrun_log()
+        collected = 0
+        cleaned, sentiments, categories = [], [], []
+        for index in range(chunk_count):
+            chunk_cleaned, chunk_sentiments, chunk_categories = store.load_chunk(index)
+            cleaned.extend(chunk_cleaned)
+            sentiments.extend(chunk_sentiments)
+            categories.extend(chunk_categories)
+            collected += store.collected_documents(index)
+            chunk_letters, chunk_overruns = store.load_failures(index)
+            if dead_letters is not None:
+                dead_letters.absorb(chunk_letters)
+                dead_letters.recovered += store.recovered_documents(index)
+            if overruns is not None:
+                overruns.absorb(chunk_overruns)
+        
+        self.cleaned_documents = cleaned
+        self.sentiment_results = sentiments
+        self.categorization_results = categories
+        self.processing_stats['documents_processed'] = collected
+        agent_stats = self.processing_stats['agent_stats']
+        agent_stats['data_collection'] = {'documents_processed': collected, 'status': 'completed'}
+        agent_stats['data_cleaning'] = {'documents_cleaned': len(cleaned), 'status': 'completed'}
+        agent_stats['sentiment_analysis'] = {
+            'documents_analyzed': len(sentiments), 'status': 'completed', 'success': bool(sentiments)
+        }
+        agent_stats['categorization'] = {
+            'documents_categorized': len(categories), 'status': 'completed', 'success': bool(categories)
+        }
+        agent_stats['chunks'] = {
+            'chunk_size': chunk_size,
+            'total': chunk_count,
+            'resumed': skipped,
+            'checkpoint': str(store.directory)
+        }
+        
+        return {
+            "collected_documents": collected,
+            "cleaned_documents": cleaned,
+            "sentiment_results": sentiments,
+            "categorization_results": categories,
+            "checkpoint": store
+        }
     
     async def _run_data_collection(
         self, 
-        input_data: Union[Dict[str, Any], List[Dict[str, Any]]]
+        input_data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        allow_empty: bool = False
     ) -> Dict[str, Any]:
-        """Run the data collection phase"""
+        """Run the data collection phase; with allow_empty, rejecting every document is not an error"""
         logger.info("Starting data collection phase")
         
         try:
@@ -219,15 +627,19 @@ class WorkflowManager:
                     feedback_docs.append(feedback_doc)
                 except Exception as e:
                     logger.error(f"Error creating FeedbackDocument: {str(e)}")
+                    record_failure('data_collection', doc_data, e)
                     continue
             
-            if not feedback_docs:
+            if not feedback_docs and not allow_empty:
                 raise ValueError("No valid documents to process")
             
             # Process documents through the data collection agent
-            result = await self.data_collection_agent.validate_and_enrich({"documents": feedback_docs})
+            result = (
+                await self.data_collection_agent.validate_and_enrich({"documents": feedback_docs})
+                if feedback_docs else []
+            )
             
-            if not result:
+            if not result and not allow_empty:
                 raise ValueError("No documents were processed during data collection")
                 
             self.processing_stats['documents_processed'] = len(result)
@@ -251,16 +663,20 @@ class WorkflowManager:
     
     async def _run_data_cleaning(
         self, 
-        documents: List[Dict[str, Any]]
+        documents: List[Dict[str, Any]],
+        allow_empty: bool = False
     ) -> Dict[str, Any]:
-        """Run the data cleaning phase"""
+        """Run the data cleaning phase; with allow_empty, failing on every document is not an error"""
         logger.info("Starting data cleaning phase")
         
         try:
-            # Process all documents in a batch
-            result = await self.data_cleaning_agent.clean_documents({"documents": documents})
+            # Process all documents in a batch, keeping lightweight records between stages
+            result = await self.data_cleaning_agent.clean_documents({
+                "documents": documents,
+                "return_records": True
+            })
             
-            if not result:
+            if not result and not allow_empty:
                 raise ValueError("No documents were processed during data cleaning")
                 
             self.cleaned_documents = result
@@ -296,7 +712,8 @@ class WorkflowManager:
                 
             # Process all documents in a batch
             sentiment_results = await self.sentiment_analysis_agent.analyze_sentiment({
-                'documents': cleaned_documents
+                'documents': cleaned_documents,
+                'return_records': True
             })
             
             if not sentiment_results or not isinstance(sentiment_results, list):
@@ -310,6 +727,10 @@ class WorkflowManager:
                 'status': 'completed',
                 'success': bool(self.sentiment_results)
             }
+            if self.sentiment_analysis_agent.cascade:
+                self.processing_stats['agent_stats']['sentiment_analysis']['cascade'] = (
+                    self.sentiment_analysis_agent.cascade_metrics()
+                )
             
             logger.info(f"Completed sentiment analysis: {len(self.sentiment_results)} documents analyzed")
             
@@ -339,7 +760,8 @@ class WorkflowManager:
             # Prepare input data for categorization
             input_data = {
                 'documents': cleaned_documents,
-                'sentiment_results': sentiment_results
+                'sentiment_results': sentiment_results,
+                'return_records': True
             }
             
             # Categorize all documents in a batch
@@ -370,6 +792,59 @@ class WorkflowManager:
             self.processing_stats['errors_encountered'] += 1
             return {"success": False, "message": str(e)}
     
+    async def _run_parallel_document_stages(
+        self,
+        documents: List[FeedbackDocument]
+    ) -> Dict[str, Any]:
+        """Run the cleaning, sentiment analysis and categorization phases on the worker pool"""
+        logger.info("Starting parallel document processing phase")
+        
+        try:
+            cleaned, sentiments, categories = await self.parallel_processor.process(documents)
+            
+            if not cleaned or not sentiments or not categories:
+                raise ValueError("No documents were processed by the worker pool")
+            
+            self.cleaned_documents = cleaned
+            self.sentiment_results = sentiments
+            self.categorization_results = categories
+            
+            agent_stats = self.processing_stats['agent_stats']
+            agent_stats['data_cleaning'] = {
+                'documents_cleaned': len(cleaned),
+                'status': 'completed'
+            }
+            agent_stats['sentiment_analysis'] = {
+                'documents_analyzed': len(sentiments),
+                'status': 'completed',
+                'success': True
+            }
+            agent_stats['categorization'] = {
+                'documents_categorized': len(categories),
+                'status': 'completed',
+                'success': True
+            }
+            agent_stats['parallel'] = {
+                'workers': self.parallel_processor.workers,
+                'slice_size': self.parallel_processor.slice_size,
+                **self.parallel_processor.schedule_stats
+            }
+            
+            logger.info(f"Completed parallel document processing: {len(cleaned)} documents")
+            
+            return {
+                "success": True,
+                "cleaned_documents": cleaned,
+                "sentiment_results": sentiments,
+                "categorization_results": categories,
+                "message": f"Processed {len(cleaned)} documents in parallel"
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in parallel document processing: {str(e)}", exc_info=True)
+            self.processing_stats['errors_encountered'] += 1
+            return {"success": False, "message": str(e)}
+    
     async def _run_insight_generation(
         self,
         cleaned_documents: List[CleanedDocument],
@@ -557,5 +1032,8 @@ class WorkflowManager:
             return_exceptions=True  # Don't let one agent's failure prevent others from shutting down
         )
         
+        if self.parallel_processor is not None:
+            self.parallel_processor.shutdown()
+        
         self.status = "shutdown"
         logger.info("Workflow Manager and all agents have been shut down successfully")